@@ -18,7 +18,7 @@ from processamento.api_anymarket import obter_token_anymarket_seguro
 from processamento.comparar_prazos import processar_comparacao
 from processamento.google_sheets import ler_planilha_google
 from token_manager_secure import ml_token_manager
-from mercadolivre_api_secure import ml_api_secure
+from mercadolivre_api_secure import ml_api_secure, cache_categorias, ORDENACOES_QUALIDADE
 from utils.stats_utils import get_processing_stats, obter_dados_grafico_7dias
 import logging
 from logging.handlers import RotatingFileHandler
@@ -52,8 +52,11 @@ app.secret_key = Config.SECRET_KEY
 # 🔹 PRIMEIRO: Inicializa o banco de dados
 #db.init_app(app)
 db.init_app(app)
+# Cache compartilhado entre os workers do gunicorn (SQLite em instance/cache)
 cache = Cache(app, config={
-    'CACHE_TYPE': 'SimpleCache',
+    'CACHE_TYPE': 'utils.cache_compartilhado.CacheSQLiteFlask' if Config.CACHE_BACKEND == 'sqlite' else 'SimpleCache',
+    'CACHE_SQLITE_ARQUIVO': Config.CACHE_COMPARTILHADO_ARQUIVO,
+    'CACHE_THRESHOLD': Config.CACHE_COMPARTILHADO_MAX_ENTRADAS,
     'CACHE_DEFAULT_TIMEOUT': 60
 })
 # 🔹 SEGUNDO: Configura o Login Manager (DEPOIS do db.init_app)
@@ -115,6 +118,8 @@ app.register_blueprint(intelipost_bp)
 app.register_blueprint(ml_oauth_bp)
 from routes_ml_dashboard import ml_dashboard_bp
 app.register_blueprint(ml_dashboard_bp)
+from routes_jobs import jobs_bp
+app.register_blueprint(jobs_bp)
 
 # Configuração de logs
 handler = RotatingFileHandler('app.log', maxBytes=10000, backupCount=1)
@@ -130,6 +135,9 @@ with app.app_context():
     try:
         db.create_all()
         print("✅ Banco de dados inicializado com sucesso!")
+
+        from utils.jobs import recuperar_jobs_interrompidos
+        recuperar_jobs_interrompidos()
         
         # ============================================
         # CRIA PERFIS PADRÃO
@@ -1101,18 +1109,41 @@ def processar_campanha(campanha):
 
 
             
+def _responder_job(tipo, parametros):
+    """Agenda a operação como job em background e devolve 202 com o id para polling"""
+    from utils.jobs import submeter_job
+    # Job sem dono ficaria visível para todos em /api/jobs/<id>
+    if not current_user.is_authenticated:
+        return jsonify({'sucesso': False, 'erro': 'Faça login para executar em background'}), 401
+    job = submeter_job(tipo, parametros, usuario_id=current_user.id)
+    return jsonify({
+        'sucesso': True,
+        'job': job.to_dict(),
+        'status_url': f'/api/jobs/{job.id}',
+        'stream_url': f'/api/jobs/{job.id}/stream',
+        'resultado_url': f'/api/jobs/{job.id}/resultado'
+    }), 202
+
+
 @app.route('/api/mercadolivre/atualizar-manufacturing', methods=['POST'])
 def atualizar_manufacturing():
-    """Rota para atualizar manufacturing time"""
+    """
+    Rota para atualizar manufacturing time
+    Com "background": true a atualização em massa vira um job (202 + id).
+    """
     try:
         data = request.get_json()
         mlb = data.get('mlb')
         dias = data.get('dias')
         atualizacoes = data.get('atualizacoes')  # Para múltiplos
         
-        if atualizacoes:
-            # Atualização em massa
-            resultado = ml_api_secure.atualizar_multiplos_manufacturing(atualizacoes)
+        concorrencia = max(1, min(int(data.get('concorrencia') or 4), 8))
+
+        if atualizacoes and data.get('background'):
+            return _responder_job('ml_manufacturing', {'atualizacoes': atualizacoes, 'concorrencia': concorrencia})
+        elif atualizacoes:
+            # Atualização em massa (lê prazos em lote e só altera o necessário)
+            resultado = ml_api_secure.atualizar_multiplos_manufacturing(atualizacoes, concorrencia=concorrencia)
         elif mlb and dias:
             # Atualização única
             resultado = ml_api_secure.atualizar_manufacturing_time(mlb, dias)
@@ -1330,15 +1361,23 @@ def api_verificar_me2(mlb):
 
 @app.route('/api/mercadolivre/alterar-me2', methods=['POST'])
 def api_alterar_me2():
-    """API para alterar modo de envio para ME2"""
+    """
+    API para alterar modo de envio para ME2
+    Com "background": true a migração em massa vira um job (202 + id).
+    """
     try:
         data = request.get_json()
         mlb = data.get('mlb')
         mlbs = data.get('mlbs')
         
-        if mlbs:
+        concorrencia = data.get('concorrencia')
+        concorrencia = max(1, min(int(concorrencia), 8)) if concorrencia else None
+
+        if mlbs and data.get('background'):
+            return _responder_job('ml_alterar_me2', {'mlbs': mlbs, 'concorrencia': concorrencia})
+        elif mlbs:
             # Migração em massa
-            resultado = ml_api_secure.alterar_multiplos_para_me2(mlbs)
+            resultado = ml_api_secure.alterar_multiplos_para_me2(mlbs, concorrencia=concorrencia)
         elif mlb:
             # Migração única
             resultado = ml_api_secure.alterar_para_me2(mlb)
@@ -1715,8 +1754,13 @@ def api_alterar_modelo():
             return jsonify({'sucesso': False, 'erro': 'Nome do modelo é obrigatório'}), 400
         
         if mlbs and len(mlbs) > 0:
-            # Alteração em lote
-            resultado = ml_api_secure.alterar_modelo_multiplos(mlbs, novo_modelo_nome)
+            # Alteração em lote (categorias resolvidas uma vez, PUTs em paralelo)
+            concorrencia = max(1, min(int(data.get('concorrencia') or 4), 8))
+            if data.get('background'):
+                return _responder_job('ml_alterar_modelo', {
+                    'mlbs': mlbs, 'modelo_nome': novo_modelo_nome, 'concorrencia': concorrencia
+                })
+            resultado = ml_api_secure.alterar_modelo_multiplos(mlbs, novo_modelo_nome, concorrencia=concorrencia)
         elif mlb:
             # Alteração única
             resultado = ml_api_secure.alterar_modelo_produto(mlb, novo_modelo_nome)
@@ -1733,6 +1777,9 @@ def api_alterar_modelo():
 def api_excluir_mlb_definitivo():
     """
     Rota para exclusão definitiva de MLB (2 etapas)
+
+    Body JSON: {"mlb": "MLB123"} ou {"mlbs": [...], "concorrencia": 4, "background": false}
+    Em lote, os anúncios são agrupados pelo status atual e cada etapa roda em paralelo.
     """
     try:
         if not ml_token_manager.is_authenticated():
@@ -1786,26 +1833,15 @@ def api_excluir_mlb_definitivo():
                 }), 400
             
             print(f"🔍 Iniciando exclusão em lote de {len(mlbs_validos)} MLBs")
-            
-            resultados = []
-            for mlb_valido in mlbs_validos:
-                resultado = ml_api_secure.excluir_anuncio_definitivo(mlb_valido)
-                resultado['mlb'] = mlb_valido
-                resultados.append(resultado)
-                
-                # Delay entre exclusões para evitar rate limit
-                import time
-                time.sleep(1)
-            
-            sucessos = sum(1 for r in resultados if r.get('sucesso'))
-            
-            return jsonify({
-                'sucesso': sucessos > 0,
-                'resultados': resultados,
-                'total': len(mlbs_validos),
-                'sucessos': sucessos,
-                'erros': len(mlbs_validos) - sucessos
-            })
+
+            concorrencia = max(1, min(int(data.get('concorrencia') or Config.ML_EXCLUSAO_CONCORRENCIA), 8))
+            if data.get('background'):
+                return _responder_job('ml_excluir_definitivo', {'mlbs': mlbs_validos, 'concorrencia': concorrencia})
+
+            resultado = ml_api_secure.excluir_multiplos_definitivo(mlbs_validos, concorrencia=concorrencia)
+            if 'falhas' in resultado:
+                resultado['erros'] = resultado['falhas']
+            return jsonify(resultado)
             
         else:
             # Exclusão única
@@ -2081,7 +2117,23 @@ def api_status_mercadolivre():
             'autenticado': esta_autenticado,
             'conexao_ativa': conexao_ativa
         })
-        
+
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+@app.route('/api/mercadolivre/conexoes/estatisticas')
+@login_required
+def api_estatisticas_conexoes_ml():
+    """Contadores do pool HTTP (keep-alive), do limitador de taxa e do cache de categorias"""
+    try:
+        return jsonify({
+            'sucesso': True,
+            'conexoes': ml_api_secure.estatisticas_conexoes(),
+            'limitador': ml_api_secure.estatisticas_limitador(),
+            'cache_categorias': cache_categorias.estatisticas(),
+            'cache_itens': ml_api_secure.estatisticas_cache_itens(),
+            'timestamp': datetime.now().isoformat()
+        })
     except Exception as e:
         return jsonify({'sucesso': False, 'erro': str(e)}), 500
 
@@ -2130,42 +2182,235 @@ def api_buscar_mlb():
         return jsonify({'sucesso': False, 'erro': str(e)}), 500
 
 
-@app.route('/api/mercadolivre/buscar-todos', methods=['POST'])
+def _stream_varredura_ml(formato, **params):
+    """
+    Executa buscar_todos_anuncios em uma thread e transmite cada anúncio
+    detalhado (e os eventos de progresso) assim que fica pronto.
+
+    formato 'ndjson': uma linha JSON por evento.
+    formato 'sse':    server-sent events (event: <tipo> / data: <json>).
+
+    Eventos: {'tipo': 'progresso'|'item'|'fim'|'erro', ...}. A fila é
+    limitada, então o servidor não acumula a conta inteira em memória; se
+    o cliente desconectar, a varredura é cancelada.
+    """
+    import json as json_std
+    import queue
+    import threading
+
+    fila     = queue.Queue(maxsize=500)
+    cancelar = threading.Event()
+    fim      = object()
+    app_obj  = current_app._get_current_object()
+
+    def _publicar(evento):
+        while not cancelar.is_set():
+            try:
+                fila.put(evento, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def _executar():
+        with app_obj.app_context():
+            try:
+                resumo = ml_api_secure.buscar_todos_anuncios(
+                    progresso_callback=lambda msg, pct: _publicar({'tipo': 'progresso', 'mensagem': msg, 'pct': pct}),
+                    item_callback=lambda item: _publicar({'tipo': 'item', 'dados': item}),
+                    cancelar=cancelar,
+                    **params
+                )
+                resumo.pop('resultados', None)
+                _publicar({'tipo': 'fim' if resumo.get('sucesso') else 'erro', **resumo})
+            except Exception as e:
+                _publicar({'tipo': 'erro', 'sucesso': False, 'erro': str(e)})
+            finally:
+                _publicar(fim)
+
+    def _formatar(evento):
+        dados = json_std.dumps(evento, ensure_ascii=False, default=str)
+        if formato == 'sse':
+            return f"event: {evento['tipo']}\ndata: {dados}\n\n"
+        return dados + '\n'
+
+    def _gerar():
+        threading.Thread(target=_executar, daemon=True).start()
+        try:
+            while True:
+                evento = fila.get()
+                if evento is fim:
+                    break
+                yield _formatar(evento)
+        finally:
+            cancelar.set()
+
+    mimetype = 'text/event-stream' if formato == 'sse' else 'application/x-ndjson'
+    resposta = app.response_class(_gerar(), mimetype=mimetype)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    resposta.headers['X-Accel-Buffering'] = 'no'  # nginx/Render: não bufferizar o stream
+    return resposta
+
+
+@app.route('/api/mercadolivre/buscar-todos', methods=['GET', 'POST'])
 @login_required
 def api_buscar_todos_anuncios():
     """
     Busca TODOS os anúncios do usuário com filtros opcionais.
  
-    Body JSON esperado:
+    Body JSON esperado (ou query string no GET):
     {
         "status": "active",          // "active" | "paused" | "closed" | "all"
         "data_de": "2024-01-01",     // opcional, YYYY-MM-DD
         "data_ate": "2024-12-31",    // opcional, YYYY-MM-DD
-        "limite": 500                // opcional, máximo de anúncios
+        "limite": 500,               // opcional, máximo de anúncios
+        "concorrencia": 4,           // opcional, lotes do multi-get em paralelo (1-8)
+        "formato": "json",           // "json" | "ndjson" | "sse" (streaming)
+        "fonte": "api",              // "api" | "espelho" (sincroniza incremental e consulta o banco)
+        "background": false,         // true: agenda como job e devolve 202 com o id
+        "retomavel": false,          // true: grava checkpoint em disco (sempre ativo em background)
+        "retomar": "<checkpoint_id>" // continua uma varredura interrompida
     }
+
+    Sem "formato", Accept: application/x-ndjson ou text/event-stream
+    também ativam o streaming. O GET existe para o EventSource do navegador.
     """
     try:
         if not ml_token_manager.is_authenticated():
             return jsonify({'sucesso': False, 'erro': 'Não autenticado no Mercado Livre'}), 401
  
-        data = request.get_json() or {}
+        data = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args.to_dict()
  
         status    = data.get('status', 'active')
         data_de   = data.get('data_de')    # 'YYYY-MM-DD' ou None
         data_ate  = data.get('data_ate')   # 'YYYY-MM-DD' ou None
         limite    = data.get('limite')     # int ou None
- 
-        resultado = ml_api_secure.buscar_todos_anuncios(
+        concorrencia = max(1, min(int(data.get('concorrencia') or 4), 8))
+
+        formato = (data.get('formato') or '').lower()
+        if not formato:
+            accept = request.headers.get('Accept', '')
+            if 'text/event-stream' in accept:
+                formato = 'sse'
+            elif 'application/x-ndjson' in accept:
+                formato = 'ndjson'
+
+        background = str(data.get('background')).lower() in ('1', 'true')
+        checkpoint_id = data.get('retomar')
+        if not checkpoint_id and (background or str(data.get('retomavel')).lower() in ('1', 'true')):
+            from utils.ml_checkpoint import CheckpointVarredura
+            checkpoint_id = CheckpointVarredura.novo_id()
+
+        params = dict(
             status=status,
             data_criacao_de=data_de,
             data_criacao_ate=data_ate,
-            limite_total=int(limite) if limite else None
+            limite_total=int(limite) if limite else None,
+            concorrencia=concorrencia,
+            checkpoint_id=checkpoint_id
         )
+
+        if background:
+            return _responder_job('ml_buscar_todos', {
+                'status': status, 'data_de': data_de, 'data_ate': data_ate,
+                'limite': limite, 'concorrencia': concorrencia, 'checkpoint_id': checkpoint_id
+            })
+
+        if data.get('fonte') == 'espelho':
+            from utils.ml_espelho import sincronizar_espelho, consultar_espelho
+            params.pop('checkpoint_id')
+            sync = sincronizar_espelho(status=status, concorrencia=concorrencia)
+            if not sync.get('sucesso'):
+                return jsonify(sync), 502
+            resultado = consultar_espelho(
+                status=status,
+                data_criacao_de=data_de,
+                data_criacao_ate=data_ate,
+                limite_total=params['limite_total'],
+                seller_id=sync.get('seller_id')
+            )
+            resultado['sincronizacao'] = sync
+            return jsonify(resultado)
+
+        if formato in ('ndjson', 'sse'):
+            return _stream_varredura_ml(formato, **params)
+ 
+        resultado = ml_api_secure.buscar_todos_anuncios(**params)
  
         return jsonify(resultado)
  
     except Exception as e:
         return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
+@app.route('/api/mercadolivre/buscar-todos/checkpoints')
+@login_required
+def api_checkpoints_varredura_ml():
+    """
+    Varreduras interrompidas que podem ser retomadas com {"retomar": checkpoint_id}.
+    Só as da conta ML atual; Master pode pedir ?todas=1.
+    """
+    try:
+        from utils.ml_checkpoint import listar_checkpoints
+        user_id = None
+        if not (current_user.is_master() and request.args.get('todas') in ('1', 'true')):
+            conta = ml_token_manager.accounts.get(ml_token_manager.current_account_id) or {}
+            user_id = conta.get('user_id')
+            if user_id is None:
+                resp_me = ml_api_secure._request('GET', '/users/me', headers=ml_api_secure._get_headers(), timeout=10)
+                if resp_me.status_code != 200:
+                    return jsonify({'sucesso': False, 'erro': 'Não autenticado no Mercado Livre'}), 401
+                user_id = resp_me.json()['id']
+        checkpoints = listar_checkpoints(user_id=user_id)
+        return jsonify({'sucesso': True, 'total': len(checkpoints), 'checkpoints': checkpoints})
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
+@app.route('/api/mercadolivre/espelho/sincronizar', methods=['POST'])
+@login_required
+def api_sincronizar_espelho_ml():
+    """
+    Sincroniza o espelho local de anúncios (só baixa o que mudou).
+
+    Body JSON: {"status": "all", "concorrencia": 4}
+    """
+    try:
+        if not ml_token_manager.is_authenticated():
+            return jsonify({'sucesso': False, 'erro': 'Não autenticado no Mercado Livre'}), 401
+
+        from utils.ml_espelho import sincronizar_espelho
+        data = request.get_json(silent=True) or {}
+        resultado = sincronizar_espelho(
+            status=data.get('status', 'all'),
+            concorrencia=max(1, min(int(data.get('concorrencia') or 4), 8))
+        )
+        return jsonify(resultado), (200 if resultado.get('sucesso') else 502)
+
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
+@app.route('/api/mercadolivre/espelho')
+@login_required
+def api_consultar_espelho_ml():
+    """
+    Consulta o espelho local sem acessar a API do ML.
+
+    Query string: status, data_de, data_ate, limite, seller_id
+    """
+    try:
+        from utils.ml_espelho import consultar_espelho
+        limite = request.args.get('limite', type=int)
+        return jsonify(consultar_espelho(
+            status=request.args.get('status', 'active'),
+            data_criacao_de=request.args.get('data_de'),
+            data_criacao_ate=request.args.get('data_ate'),
+            limite_total=limite,
+            seller_id=request.args.get('seller_id')
+        ))
+
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
 @app.route('/api/mercadolivre/analisar-envio-manufacturing', methods=['POST'])
 def api_analisar_envio_manufacturing():
     """API para análise específica de envio e manufacturing time"""
@@ -2963,8 +3208,9 @@ def verificar_status_mlb(mlb):
         headers = ml_api_secure._get_headers()
         
         # Tenta acessar o item diretamente
-        response = requests.get(
-            f"https://api.mercadolibre.com/items/{mlb}",
+        response = ml_api_secure._request(
+            'GET',
+            f"/items/{mlb}",
             headers=headers,
             timeout=10
         )
@@ -5215,10 +5461,12 @@ def api_testar_conta(account_id):
                 'erro': 'Conta não tem token configurado'
             })
         
-        # Testa o token
+        # Testa o token com o cliente da própria conta (limitador separado)
+        from mercadolivre_api_secure import cliente_ml
         headers = {'Authorization': f'Bearer {token}'}
-        response = requests.get(
-            'https://api.mercadolibre.com/users/me',
+        response = cliente_ml(account_id)._request(
+            'GET',
+            '/users/me',
             headers=headers,
             timeout=10
         )
@@ -5241,6 +5489,53 @@ def api_testar_conta(account_id):
     except Exception as e:
         return jsonify({'sucesso': False, 'erro': str(e)}), 500
 
+@app.route('/api/mercadolivre/contas/testar-todas')
+@login_required
+def api_testar_todas_contas():
+    """Testa todas as contas em paralelo (cada uma com seu limitador de taxa)"""
+    try:
+        from utils.ml_multicontas import executar_em_contas
+        return jsonify(executar_em_contas('resumo'))
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
+@app.route('/api/mercadolivre/contas/executar', methods=['POST'])
+@login_required
+def api_executar_em_contas():
+    """
+    Executa uma operação de leitura em várias contas ao mesmo tempo.
+
+    Body JSON:
+    {
+        "operacao": "varredura",     // resumo | varredura | qualidade
+        "contas": ["conta_1", ...],  // opcional; padrão: todas com token
+        "parametros": {...},         // repassados à operação (status, limite, concorrencia...)
+        "background": true           // padrão true, exceto para "resumo"
+    }
+    Linhas de 'resultados'/'linhas' vêm marcadas com conta_id e conta_nome.
+    """
+    try:
+        from utils.ml_multicontas import OPERACOES, executar_em_contas
+        data = request.get_json(silent=True) or {}
+        operacao = data.get('operacao')
+        if operacao not in OPERACOES:
+            return jsonify({'sucesso': False, 'erro': f'Operação inválida: {operacao}',
+                            'operacoes': sorted(OPERACOES)}), 400
+
+        parametros = {'operacao': operacao, 'contas': data.get('contas') or [],
+                      'parametros': data.get('parametros') or {}}
+        # Varredura/qualidade em várias contas são longas: job por padrão
+        if data.get('background', operacao != 'resumo'):
+            return _responder_job('ml_multicontas', parametros)
+
+        return jsonify(executar_em_contas(
+            operacao, parametros=parametros['parametros'], contas=parametros['contas'] or None
+        ))
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
 @app.route('/api/mercadolivre/contas/<account_id>', methods=['DELETE'])
 def api_remover_conta(account_id):
     """Remove conta (não permite remover a atual)"""
@@ -6140,12 +6435,9 @@ def api_produto_completo(mlb):
 def api_atributos_categoria(category_id):
     """Retorna todos os atributos possíveis de uma categoria"""
     try:
-        headers = ml_api_secure._get_headers()
-        url = f"https://api.mercadolibre.com/categories/{category_id}/attributes"
-        response = requests.get(url, headers=headers)
+        atributos = ml_api_secure.obter_atributos_categoria(category_id)
         
-        if response.status_code == 200:
-            atributos = response.json()
+        if atributos is not None:
             atributos_filtrados = []
             for attr in atributos:
                 atributos_filtrados.append({
@@ -6206,6 +6498,38 @@ def api_alterar_multiplos_atributos():
             'erro': str(e)
         }), 500
 
+@app.route('/api/mercadolivre/alterar-atributos-lote', methods=['POST'])
+def api_alterar_atributos_lote():
+    """
+    Altera atributos de vários anúncios (um schema por categoria, PUTs em paralelo)
+
+    Body JSON:
+    {
+        "edicoes": [{"mlb": "MLB123", "atributos": {"BRAND": "Marca", ...}}, ...],
+        "concorrencia": 4,
+        "background": false
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        edicoes = data.get('edicoes') or []
+
+        if not edicoes:
+            return jsonify({'sucesso': False, 'erro': 'Nenhuma edição informada'}), 400
+
+        concorrencia = max(1, min(int(data.get('concorrencia') or 4), 8))
+
+        if data.get('background'):
+            return _responder_job('ml_atributos_lote', {'edicoes': edicoes, 'concorrencia': concorrencia})
+
+        resultado = ml_api_secure.alterar_atributos_em_massa(edicoes, concorrencia=concorrencia)
+        return jsonify(resultado)
+    except Exception as e:
+        return jsonify({
+            'sucesso': False,
+            'erro': str(e)
+        }), 500
+
 # ROTA 5: Dashboard do produto (HTML)
 @app.route('/produto/dashboard')
 def produto_dashboard():
@@ -6934,6 +7258,115 @@ def testar_dados_webhook():
         ]
     })
 
+@app.route('/api/mercadolivre/qualidade/relatorio', methods=['POST'])
+@login_required
+def api_relatorio_qualidade():
+    """
+    Relatório de qualidade em massa (score, nível e pendências por anúncio).
+
+    Body JSON:
+    {
+        "mlbs": ["MLB123", ...],     // opcional; sem mlbs audita a conta inteira
+        "status": "active",          // usado quando mlbs não é informado
+        "concorrencia": 6,
+        "ordenar_por": "pontuacao",  // pontuacao | total_pendencias | titulo | nivel | status
+        "decrescente": false,
+        "gravar_historico": true,    // grava uma foto por anúncio em ml_qualidade_snapshots
+        "background": false          // true: agenda como job (recomendado para a conta inteira)
+    }
+    """
+    try:
+        if not ml_token_manager.is_authenticated():
+            return jsonify({'sucesso': False, 'erro': 'Não autenticado no Mercado Livre'}), 401
+
+        data = request.get_json(silent=True) or {}
+        parametros = {
+            'mlbs': data.get('mlbs') or [],
+            'status': data.get('status', 'active'),
+            'concorrencia': max(1, min(int(data.get('concorrencia') or 6), 12)),
+            'ordenar_por': data.get('ordenar_por', 'pontuacao'),
+            'decrescente': bool(data.get('decrescente')),
+            'gravar_historico': data.get('gravar_historico', True) is not False,
+        }
+
+        if parametros['ordenar_por'] not in ORDENACOES_QUALIDADE:
+            return jsonify({
+                'sucesso': False,
+                'erro': f"ordenar_por inválido: {parametros['ordenar_por']}",
+                'opcoes': list(ORDENACOES_QUALIDADE)
+            }), 400
+
+        if data.get('background'):
+            return _responder_job('ml_relatorio_qualidade', parametros)
+
+        mlbs = parametros['mlbs'] or ml_api_secure.listar_ids_conta(parametros['status'])
+        resultado = ml_api_secure.gerar_relatorio_qualidade(
+            mlbs,
+            concorrencia=parametros['concorrencia'],
+            ordenar_por=parametros['ordenar_por'],
+            decrescente=parametros['decrescente']
+        )
+        if parametros['gravar_historico'] and resultado.get('sucesso'):
+            from utils.ml_qualidade_historico import gravar_snapshots
+            resultado['snapshots_gravados'] = gravar_snapshots(resultado['linhas'])
+        return jsonify(resultado)
+
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
+@app.route('/api/mercadolivre/qualidade/historico/quedas')
+@login_required
+def api_qualidade_quedas():
+    """
+    Anúncios cujo score caiu em relação à foto de N dias atrás (lido do banco).
+
+    Query: ?dias=7&queda_minima=1&limite=100
+    """
+    try:
+        from utils.ml_qualidade_historico import queda_de_pontuacao
+        dias = max(1, request.args.get('dias', 7, type=int))
+        anuncios = queda_de_pontuacao(
+            dias=dias,
+            queda_minima=request.args.get('queda_minima', 1.0, type=float),
+            limite=min(request.args.get('limite', 100, type=int), 1000)
+        )
+        return jsonify({'sucesso': True, 'dias': dias, 'total': len(anuncios), 'anuncios': anuncios})
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
+@app.route('/api/mercadolivre/qualidade/historico/piores')
+@login_required
+def api_qualidade_piores():
+    """
+    Os N anúncios com menor score na foto mais recente (lido do banco).
+
+    Query: ?n=20&nivel=Básica
+    """
+    try:
+        from utils.ml_qualidade_historico import piores_anuncios
+        anuncios = piores_anuncios(
+            n=min(request.args.get('n', 20, type=int), 1000),
+            nivel=request.args.get('nivel')
+        )
+        return jsonify({'sucesso': True, 'total': len(anuncios), 'anuncios': anuncios})
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
+@app.route('/api/mercadolivre/qualidade/historico/<mlb>')
+@login_required
+def api_qualidade_historico_mlb(mlb):
+    """Evolução do score de um anúncio. Query: ?dias=90"""
+    try:
+        from utils.ml_qualidade_historico import historico_mlb
+        fotos = historico_mlb(mlb.upper(), dias=request.args.get('dias', 90, type=int))
+        return jsonify({'sucesso': True, 'mlb': mlb.upper(), 'total': len(fotos), 'historico': fotos})
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
 @app.route('/api/mercadolivre/qualidade-detalhada/<mlb>')
 def api_qualidade_detalhada(mlb):
     """
@@ -35,4 +35,61 @@ class Config:
     # ── Intelipost ─────────────────────────────────────────────────────────
     INTELIPOST_API_KEY       = os.environ.get('INTELIPOST_API_KEY', 'sua_chave_api_aqui')
     INTELIPOST_BASE_URL      = 'https://api.intelipost.com.br/api/v1'
-    INTELIPOST_CACHE_TIMEOUT = 300
\ No newline at end of file
+    INTELIPOST_CACHE_TIMEOUT = 300
+
+    # ── Mercado Livre (HTTP) ───────────────────────────────────────────────
+    ML_HTTP_POOL_SIZE        = int(os.environ.get('ML_HTTP_POOL_SIZE', 20))
+    ML_HTTP_MAX_RETRIES      = int(os.environ.get('ML_HTTP_MAX_RETRIES', 3))
+
+    # Limitador de taxa (token bucket adaptativo, por processo)
+    ML_RATE_LIMIT_RPS            = float(os.environ.get('ML_RATE_LIMIT_RPS', 10))
+    ML_RATE_LIMIT_RPS_MIN        = float(os.environ.get('ML_RATE_LIMIT_RPS_MIN', 1))
+    ML_RATE_LIMIT_MAX_TENTATIVAS = int(os.environ.get('ML_RATE_LIMIT_MAX_TENTATIVAS', 5))
+
+    # Cache de schemas de categoria (/categories/{id}/attributes)
+    ML_CATEGORIA_CACHE_TTL       = int(os.environ.get('ML_CATEGORIA_CACHE_TTL', 86400))
+    ML_CATEGORIA_CACHE_MAX       = int(os.environ.get('ML_CATEGORIA_CACHE_MAX', 300))
+    ML_CATEGORIA_CACHE_DIR       = Path(os.environ.get('ML_CATEGORIA_CACHE_DIR', 'instance/cache/ml_categorias'))
+
+    # Operações em massa
+    ML_ME2_CONCORRENCIA          = int(os.environ.get('ML_ME2_CONCORRENCIA', 4))
+    ML_ME2_TENTATIVAS            = int(os.environ.get('ML_ME2_TENTATIVAS', 3))
+    ML_EXCLUSAO_CONCORRENCIA     = int(os.environ.get('ML_EXCLUSAO_CONCORRENCIA', 4))
+    ML_EXCLUSAO_TENTATIVAS       = int(os.environ.get('ML_EXCLUSAO_TENTATIVAS', 3))
+
+    # Cache de /items/{id} (sessões de edição de um anúncio)
+    ML_ITEM_CACHE_TTL            = int(os.environ.get('ML_ITEM_CACHE_TTL', 30))      # fresco sem consultar o ML
+    ML_ITEM_CACHE_REVALIDAR      = int(os.environ.get('ML_ITEM_CACHE_REVALIDAR', 600))  # guardado para If-None-Match
+    ML_ITEM_CACHE_MAX            = int(os.environ.get('ML_ITEM_CACHE_MAX', 500))
+
+    # Checkpoints das varreduras completas (retomada após queda/reinício)
+    ML_SCAN_CHECKPOINT_DIR       = Path(os.environ.get('ML_SCAN_CHECKPOINT_DIR', 'instance/cache/ml_varreduras'))
+    ML_SCAN_CHECKPOINT_TTL       = int(os.environ.get('ML_SCAN_CHECKPOINT_TTL', 172800))
+
+    # Operações em várias contas ao mesmo tempo (cada conta com limitador próprio)
+    ML_MULTICONTAS_CONCORRENCIA  = int(os.environ.get('ML_MULTICONTAS_CONCORRENCIA', 4))
+
+    # Agregação incremental dos pedidos (vendas do dashboard)
+    ML_PEDIDOS_CONCORRENCIA      = int(os.environ.get('ML_PEDIDOS_CONCORRENCIA', 4))
+    ML_VENDAS_FUSO               = os.environ.get('ML_VENDAS_FUSO', 'America/Sao_Paulo')   # dia das vendas
+
+    # Relatório de qualidade (/item/{id}/performance)
+    ML_QUALIDADE_CACHE_TTL       = int(os.environ.get('ML_QUALIDADE_CACHE_TTL', 3600))
+
+    # ── Jobs em background ─────────────────────────────────────────────────
+    JOBS_MAX_WORKERS         = int(os.environ.get('JOBS_MAX_WORKERS', 2))
+
+    # ── Cache compartilhado entre workers (utils/cache_compartilhado) ──────
+    CACHE_BACKEND                    = os.environ.get('CACHE_BACKEND', 'sqlite')   # sqlite | memoria
+    CACHE_COMPARTILHADO_ARQUIVO      = Path(os.environ.get('CACHE_COMPARTILHADO_ARQUIVO', 'instance/cache/compartilhado.sqlite3'))
+    CACHE_COMPARTILHADO_MAX_ENTRADAS = int(os.environ.get('CACHE_COMPARTILHADO_MAX_ENTRADAS', 5000))
+    METRICS_CACHE_MAX_ENTRADAS       = int(os.environ.get('METRICS_CACHE_MAX_ENTRADAS', 200))
+    METRICS_CACHE_MAX_BYTES          = int(os.environ.get('METRICS_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+
+    # Pré-carga agendada das métricas do dashboard (intervalos em segundos);
+    # a thread sobe na primeira requisição de cada worker, nunca em scripts/CLI
+    METRICS_PREFETCH_ATIVO           = os.environ.get('METRICS_PREFETCH_ATIVO', 'true').lower() == 'true'
+    METRICS_INTERVALO_ML             = int(os.environ.get('METRICS_INTERVALO_ML', 300))
+    METRICS_INTERVALO_ANYMARKET      = int(os.environ.get('METRICS_INTERVALO_ANYMARKET', 300))
+    METRICS_INTERVALO_INTELIPOST     = int(os.environ.get('METRICS_INTERVALO_INTELIPOST', 300))
+    METRICS_INTERVALO_SISTEMA        = int(os.environ.get('METRICS_INTERVALO_SISTEMA', 60))
\ No newline at end of file
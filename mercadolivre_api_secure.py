@@ -1,18 +1,259 @@
 import requests
 import json
+import re
+import threading
 from datetime import datetime
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from token_manager_secure import ml_token_manager
+from config import Config
+from utils.ml_http import criar_sessao_ml, estatisticas_pool
+from utils.rate_limiter import LimitadorTaxaAdaptativo, ler_retry_after, espera_backoff
+from utils.ml_categoria_cache import CacheCategorias
+from utils.ttl_cache import CacheTTL
 import unicodedata
 import difflib
 
+# Limitador único do processo: todo tráfego para a API do ML passa por ele
+limitador_ml = LimitadorTaxaAdaptativo(
+    rps=Config.ML_RATE_LIMIT_RPS,
+    rps_minimo=Config.ML_RATE_LIMIT_RPS_MIN
+)
+
+STATUS_LIMITE = (429, 500, 502, 503, 504)
+
+# Schemas de /categories/{id}/attributes compartilhados por todo o processo
+cache_categorias = CacheCategorias(
+    ttl=Config.ML_CATEGORIA_CACHE_TTL,
+    max_entradas=Config.ML_CATEGORIA_CACHE_MAX,
+    diretorio=Config.ML_CATEGORIA_CACHE_DIR
+)
+
+# Respostas de /item/{id}/performance já interpretadas (relatório de qualidade)
+cache_qualidade = CacheTTL(ttl=Config.ML_QUALIDADE_CACHE_TTL, max_entradas=20000)
+
+# Respostas de GET /items/{id} (corpo JSON + ETag, por conta): frescas por
+# ML_ITEM_CACHE_TTL, depois revalidadas com If-None-Match. Qualquer PUT/POST/DELETE
+# do cliente no item invalida a cópia — só neste processo: outros workers do
+# gunicorn podem servir o corpo anterior por até ML_ITEM_CACHE_TTL após a escrita.
+cache_itens = CacheTTL(ttl=Config.ML_ITEM_CACHE_REVALIDAR, max_entradas=Config.ML_ITEM_CACHE_MAX)
+_geracao_itens = {}  # mlb -> contador de escritas (evita regravar cópia antiga após um PUT)
+_geracao_lock = threading.Lock()
+
+# Anúncio que não pôde ser lido (lote do multi-get e releitura individual falharam)
+ERRO_LEITURA_ITEM = 'Não foi possível ler o anúncio agora (falha temporária da API); tente novamente'
+
+# Colunas escalares do relatório de qualidade aceitas em ordenar_por
+ORDENACOES_QUALIDADE = ('pontuacao', 'total_pendencias', 'titulo', 'nivel', 'status')
+
+_RE_ITEM_URL = re.compile(r'/items/([A-Z]{3}\d+)(?=[/?]|$)', re.I)
+
+
+class ErroVarreduraScan(Exception):
+    """Página do scroll (/users/{id}/items/search) falhou: a varredura ficou incompleta"""
+
 class MercadoLivreAPISecure:
-    def __init__(self):
+    def __init__(self, pool_size=None, limitador=None, account_id=None, session=None):
         self.base_url = "https://api.mercadolibre.com"
-    
+        # Sessão única (keep-alive + pool) compartilhada por todas as threads
+        self.session = session or criar_sessao_ml(
+            pool_size=pool_size or Config.ML_HTTP_POOL_SIZE,
+            max_retries=Config.ML_HTTP_MAX_RETRIES
+        )
+        self.limitador = limitador or limitador_ml
+        # None = segue a conta atual do token manager; com id, fica presa à conta
+        self.account_id = account_id
+
+    def _enviar(self, method, url, **kwargs):
+        """
+        Envia passando pelo limitador de taxa.
+        429 (qualquer método) e 5xx (exceto POST, que não é idempotente)
+        reduzem a taxa e são repetidos com Retry-After ou backoff com jitter.
+        """
+        tentativas = Config.ML_RATE_LIMIT_MAX_TENTATIVAS
+        for tentativa in range(tentativas):
+            self.limitador.adquirir()
+            response = self.session.request(method, url, **kwargs)
+
+            repetir = response.status_code == 429 or (
+                response.status_code in STATUS_LIMITE and method.upper() != 'POST'
+            )
+            if not repetir:
+                self.limitador.registrar_sucesso()
+                return response
+
+            retry_after = ler_retry_after(response.headers.get('Retry-After'))
+            self.limitador.registrar_limite(retry_after)
+            if tentativa == tentativas - 1:
+                break
+
+            espera = retry_after if retry_after is not None else espera_backoff(tentativa)
+            print(f"  ⚠️  HTTP {response.status_code} em {method} {url} — "
+                  f"nova tentativa em {espera:.1f}s ({tentativa + 1}/{tentativas})")
+            time.sleep(espera)
+
+        return response
+
+    def _request(self, method, url, usar_cache=True, **kwargs):
+        """
+        Ponto único de saída HTTP do cliente.
+        Aceita URL completa ou caminho relativo ao base_url (ex: '/items/MLB123').
+        GET /items/{id} passa pelo cache de itens (usar_cache=False ignora);
+        escritas em /items/{id}/... invalidam o item.
+        """
+        if url.startswith('/'):
+            url = f"{self.base_url}{url}"
+
+        alvo = _RE_ITEM_URL.search(url)
+        mlb = alvo.group(1).upper() if alvo else None
+        if alvo and method.upper() == 'GET':
+            if usar_cache and url == f"{self.base_url}/items/{alvo.group(1)}":
+                return self._get_item_cacheado(mlb, url, **kwargs)
+        elif alvo:
+            self._invalidar_item(mlb)
+            try:
+                return self._enviar_autenticado(method, url, **kwargs)
+            finally:
+                self._invalidar_item(mlb)
+
+        return self._enviar_autenticado(method, url, **kwargs)
+
+    def _invalidar_item(self, mlb):
+        with _geracao_lock:
+            _geracao_itens[mlb] = _geracao_itens.get(mlb, 0) + 1
+        cache_itens.remover_onde(lambda chave: chave[1] == mlb)
+
+    def _conta_cache(self):
+        """Conta usada na chave do cache de itens (anúncios de contas diferentes nunca se misturam)"""
+        return self.account_id or ml_token_manager.current_account_id
+
+    @staticmethod
+    def _resposta_do_cache(entrada, url):
+        """Response nova para cada chamador, montada a partir do corpo JSON guardado"""
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = 'utf-8'
+        response.headers = requests.structures.CaseInsensitiveDict(
+            {'Content-Type': 'application/json', **({'ETag': entrada['etag']} if entrada['etag'] else {})}
+        )
+        response._content = json.dumps(entrada['dados']).encode('utf-8')
+        return response
+
+    def _get_item_cacheado(self, mlb, url, **kwargs):
+        """
+        GET /items/{id} servido do cache enquanto fresco; depois revalida com ETag.
+        A chave inclui a conta; a cópia guardada é o JSON do corpo, e cada
+        chamador recebe uma Response própria. Escritas feitas por outros
+        processos não invalidam esta cópia (vale o TTL ML_ITEM_CACHE_TTL).
+        """
+        chave = (self._conta_cache(), mlb, tuple(sorted((kwargs.get('params') or {}).items())))
+        entrada = cache_itens.obter(chave)
+        if entrada and time.monotonic() - entrada['salvo_em'] < Config.ML_ITEM_CACHE_TTL:
+            return self._resposta_do_cache(entrada, url)
+
+        if entrada and entrada['etag']:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), 'If-None-Match': entrada['etag']}
+
+        with _geracao_lock:
+            geracao = _geracao_itens.get(mlb, 0)
+        response = self._enviar_autenticado('GET', url, **kwargs)
+
+        with _geracao_lock:
+            mudou = _geracao_itens.get(mlb, 0) != geracao
+        if response.status_code == 304 and entrada:
+            if not mudou:
+                cache_itens.guardar(chave, {**entrada, 'salvo_em': time.monotonic()})
+            return self._resposta_do_cache(entrada, url)
+        if response.status_code == 200 and not mudou:
+            try:
+                dados = response.json()
+            except ValueError:
+                return response
+            cache_itens.guardar(chave, {
+                'dados': dados,
+                'etag': response.headers.get('ETag'),
+                'salvo_em': time.monotonic()
+            })
+        return response
+
+    def _enviar_autenticado(self, method, url, **kwargs):
+        """_enviar + renovação do token em caso de 401"""
+        response = self._enviar(method, url, **kwargs)
+
+        # Token em cache rejeitado: renova uma vez e repete a chamada.
+        # O dict de headers do chamador é atualizado no lugar para que as
+        # próximas requisições do mesmo método já usem o token novo.
+        headers = kwargs.get('headers')
+        if response.status_code == 401 and headers and str(headers.get('Authorization', '')).startswith('Bearer '):
+            token_rejeitado = headers['Authorization'][len('Bearer '):]
+            novo_token = ml_token_manager.renovar_apos_401(account_id=self.account_id, token_rejeitado=token_rejeitado)
+            if novo_token and novo_token != token_rejeitado:
+                headers['Authorization'] = f'Bearer {novo_token}'
+                response = self._enviar(method, url, **kwargs)
+
+        return response
+
+    def estatisticas_conexoes(self):
+        """Conexões TCP/TLS abertas vs. reaproveitadas pelo pool da sessão"""
+        return estatisticas_pool(self.session)
+
+    def estatisticas_limitador(self):
+        """Taxa atual, requisições liberadas/limitadas e tempo total de espera"""
+        return self.limitador.estatisticas()
+
+    def estatisticas_cache_itens(self):
+        return {**cache_itens.estatisticas(), 'fresco_segundos': Config.ML_ITEM_CACHE_TTL}
+
+    def obter_atributos_categoria(self, category_id):
+        """
+        Schema de atributos da categoria (/categories/{id}/attributes) via
+        cache compartilhado. Vencido o TTL, revalida com If-None-Match; se a
+        API falhar, devolve a última cópia conhecida.
+
+        Returns:
+            lista de atributos da categoria ou None se indisponível
+        """
+        if not category_id:
+            return None
+
+        entrada = cache_categorias.obter(category_id)
+        if entrada and entrada['fresco']:
+            return entrada['atributos']
+
+        with cache_categorias.lock_categoria(category_id):
+            # Outra thread pode ter baixado enquanto esperávamos o lock
+            entrada = cache_categorias.obter(category_id, contar=False) or entrada
+            if entrada and entrada['fresco']:
+                return entrada['atributos']
+
+            headers = self._get_headers()
+            if entrada and entrada.get('etag'):
+                headers['If-None-Match'] = entrada['etag']
+
+            response = self._request(
+                'GET',
+                f"/categories/{category_id}/attributes",
+                headers=headers,
+                timeout=15
+            )
+
+            if response.status_code == 304 and entrada:
+                cache_categorias.revalidar(category_id)
+                return entrada['atributos']
+
+            if response.status_code == 200:
+                atributos = response.json()
+                cache_categorias.guardar(category_id, atributos, response.headers.get('ETag'))
+                return atributos
+
+            print(f"⚠️  Categoria {category_id}: HTTP {response.status_code}"
+                  f"{' — usando cópia vencida' if entrada else ''}")
+            return entrada['atributos'] if entrada else None
+
     def _get_headers(self):
         """Retorna headers com token"""
-        token = ml_token_manager.get_valid_token()
+        token = ml_token_manager.get_valid_token(self.account_id)
         if not token:
             raise Exception("Token do Mercado Livre não disponível. Faça a autenticação primeiro.")
         
@@ -25,7 +266,8 @@ class MercadoLivreAPISecure:
         """Testa a conexão com a API"""
         try:
             headers = self._get_headers()
-            response = requests.get(
+            response = self._request(
+                'GET',
                 f"{self.base_url}/users/me",
                 headers=headers,
                 timeout=10
@@ -52,7 +294,8 @@ class MercadoLivreAPISecure:
             print("=" * 60)
             
             # Busca dados atuais
-            response = requests.get(
+            response = self._request(
+                'GET',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 timeout=10
@@ -108,8 +351,20 @@ class MercadoLivreAPISecure:
             if not dados_item:
                 return {'sucesso': False, 'erro': 'Não foi possível buscar dados do item'}
             
-            sale_terms_atuais = dados_item.get('sale_terms', [])
+            return self._remover_manufacturing_com_termos(mlb_id, dados_item.get('sale_terms', []), headers)
             
+        except Exception as e:
+            print(f"❌ Erro: {str(e)}")
+            return {'sucesso': False, 'erro': str(e)}
+
+    def _remover_manufacturing_com_termos(self, mlb_id, sale_terms_atuais, headers=None):
+        """
+        Tenta as abordagens de remoção do prazo usando os sale_terms já
+        conhecidos do anúncio (sem buscar o item de novo).
+        """
+        try:
+            headers = headers or self._get_headers()
+
             # 🔍 Vamos testar abordagens possíveis
             abordagens = [
                 # 1. Sale_terms vazio
@@ -135,7 +390,8 @@ class MercadoLivreAPISecure:
                 if not update_data:
                     continue
                 
-                response = requests.put(
+                response = self._request(
+                    'PUT',
                     f"{self.base_url}/items/{mlb_id}",
                     headers=headers,
                     json=update_data,
@@ -205,7 +461,8 @@ class MercadoLivreAPISecure:
                 ]
             }
             
-            response = requests.put(
+            response = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=update_data,
@@ -225,7 +482,8 @@ class MercadoLivreAPISecure:
                     "manufacturing_time": f"{manufacturing_time_days} dias"
                 }
                 
-                response_alt = requests.put(
+                response_alt = self._request(
+                    'PUT',
                     f"{self.base_url}/items/{mlb_id}",
                     headers=headers,
                     json=update_data_alt,
@@ -251,7 +509,8 @@ class MercadoLivreAPISecure:
         """Atualiza apenas o manufacturing_time sem mexer em outros campos"""
         try:
             # Primeiro verifica se o item existe e está ativo
-            response_get = requests.get(
+            response_get = self._request(
+                'GET',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 timeout=10
@@ -272,7 +531,8 @@ class MercadoLivreAPISecure:
             
             print(f"📤 Enviando update direto: {update_data}")
             
-            response = requests.put(
+            response = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=update_data,
@@ -296,7 +556,8 @@ class MercadoLivreAPISecure:
                 
                 update_data_final = {"sale_terms": sale_terms}
                 
-                response_final = requests.put(
+                response_final = self._request(
+                    'PUT',
                     f"{self.base_url}/items/{mlb_id}",
                     headers=headers,
                     json=update_data_final,
@@ -352,7 +613,8 @@ class MercadoLivreAPISecure:
             
             print(f"📤 Tentativa 1 (campo vazio): {update_data_alt1}")
             
-            response = requests.put(
+            response = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=update_data_alt1,
@@ -374,7 +636,8 @@ class MercadoLivreAPISecure:
                 "manufacturing_time": None
             }
             
-            response = requests.put(
+            response = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=update_data_alt2,
@@ -420,7 +683,8 @@ class MercadoLivreAPISecure:
             
             print(f"📤 Enviando update completo (campos filtrados)")
             
-            response = requests.put(
+            response = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=dados_filtrados,
@@ -447,59 +711,141 @@ class MercadoLivreAPISecure:
             print(f"❌ Erro na abordagem alternativa: {str(e)}")
             return {'sucesso': False, 'erro': str(e)}
        
-    def atualizar_multiplos_manufacturing(self, atualizacoes):
-        """Atualiza manufacturing time para múltiplos anúncios - VERSÃO MELHORADA"""
+    @staticmethod
+    def _dias_manufacturing(sale_terms):
+        """Prazo atual em dias a partir dos sale_terms (None = sem prazo)"""
+        for term in sale_terms or []:
+            if term.get('id') != 'MANUFACTURING_TIME':
+                continue
+            numero = (term.get('value_struct') or {}).get('number')
+            if numero is not None:
+                return int(numero)
+            digitos = ''.join(c for c in str(term.get('value_name') or '') if c.isdigit())
+            return int(digitos) if digitos else None
+        return None
+
+    def atualizar_multiplos_manufacturing(self, atualizacoes, progresso_callback=None, cancelar=None, concorrencia=4):
+        """
+        Atualiza manufacturing time para múltiplos anúncios em lote:
+
+        1. Lê os sale_terms atuais de todos via multi-get (20 por requisição);
+        2. Ignora quem já está com o prazo pedido (ou já sem prazo, para dias=0);
+        3. Aplica só os PUTs necessários em paralelo (`concorrencia` workers).
+
+        progresso_callback(msg, pct) acompanha o andamento; cancelar é um
+        threading.Event que impede o início de novas atualizações.
+        """
+        def _prog(msg, pct):
+            if progresso_callback:
+                try:
+                    progresso_callback(msg, pct)
+                except Exception:
+                    pass
+
         try:
-            resultados = []
+            resultados = [None] * len(atualizacoes)
             log_detalhado = []
+            alvos = []  # (indice, mlb, dias)
             
             for idx, atualizacao in enumerate(atualizacoes):
                 mlb_id = atualizacao.get('mlb')
                 dias = atualizacao.get('dias')
                 
                 if not mlb_id or dias is None:
-                    resultado = {
+                    resultados[idx] = {
                         'mlb': mlb_id,
                         'sucesso': False,
                         'erro': 'MLB ou dias não fornecidos'
                     }
-                    resultados.append(resultado)
                     log_detalhado.append(f"❌ {mlb_id}: MLB ou dias não fornecidos")
                     continue
-                
-                # Atualiza individualmente
-                log_detalhado.append(f"🔄 [{idx+1}/{len(atualizacoes)}] {mlb_id} → {dias} dias")
-                resultado = self.atualizar_manufacturing_time(mlb_id, dias)
-                resultado['mlb'] = mlb_id
-                resultados.append(resultado)
-                
-                if resultado.get('sucesso'):
-                    log_detalhado.append(f"   ✅ Sucesso: {resultado.get('mensagem', '')}")
-                else:
-                    log_detalhado.append(f"   ❌ Erro: {resultado.get('erro', '')}")
-                
-                # Delay para evitar rate limit (maior delay para remoções)
-                delay = 1.0 if dias == 0 else 0.5  # Mais tempo para remoções
-                time.sleep(delay)
+                alvos.append((idx, mlb_id.strip().upper(), int(dias)))
+
+            # 1. Prazo atual de todos os alvos
+            _prog(f'Lendo prazos atuais de {len(alvos)} anúncios...', 2)
+            mlbs_unicos = list(dict.fromkeys(mlb for _, mlb, _ in alvos))
+            itens, inexistentes = self._ler_itens_em_lote(mlbs_unicos, concorrencia=concorrencia,
+                                                          atributos='id,sale_terms')
+            termos = {mlb: item.get('sale_terms') or [] for mlb, item in itens.items()}
+
+            # 2. Filtra o que já está no valor desejado
+            pendentes = []
+            for idx, mlb_id, dias in alvos:
+                if mlb_id not in termos:
+                    if mlb_id in inexistentes:
+                        resultados[idx] = {'mlb': mlb_id, 'sucesso': False, 'erro': 'Item não encontrado'}
+                        log_detalhado.append(f"❌ {mlb_id}: item não encontrado")
+                    else:
+                        resultados[idx] = {'mlb': mlb_id, 'sucesso': False, 'erro': ERRO_LEITURA_ITEM}
+                        log_detalhado.append(f"❌ {mlb_id}: não foi possível ler o prazo atual")
+                    continue
+                atual = self._dias_manufacturing(termos[mlb_id])
+                if (dias == 0 and not atual) or (dias > 0 and atual == dias):
+                    resultados[idx] = {
+                        'mlb': mlb_id,
+                        'sucesso': True,
+                        'ignorado': True,
+                        'dias': dias,
+                        'mensagem': 'Prazo já estava no valor desejado'
+                    }
+                    log_detalhado.append(f"⏭️ {mlb_id}: já estava com {dias} dias")
+                    continue
+                pendentes.append((idx, mlb_id, dias))
+
+            print(f"\n⏱️  Manufacturing em lote: {len(pendentes)} a atualizar, "
+                  f"{len(alvos) - len(pendentes)} sem alteração necessária")
+
+            # 3. PUTs necessários em paralelo
+            def _aplicar(mlb_id, dias):
+                if cancelar and cancelar.is_set():
+                    return {'sucesso': False, 'erro': 'Cancelado'}
+                if dias == 0:
+                    return self._remover_manufacturing_com_termos(mlb_id, termos[mlb_id])
+                return self.atualizar_manufacturing_time(mlb_id, dias)
+
+            if pendentes:
+                with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(pendentes)))) as executor:
+                    futures = {executor.submit(_aplicar, mlb_id, dias): (idx, mlb_id, dias)
+                               for idx, mlb_id, dias in pendentes}
+                    for concluidos, future in enumerate(as_completed(futures), 1):
+                        idx, mlb_id, dias = futures[future]
+                        try:
+                            resultado = future.result()
+                        except Exception as e:
+                            resultado = {'sucesso': False, 'erro': str(e)}
+                        resultado['mlb'] = mlb_id
+                        resultado.setdefault('dias', dias)
+                        resultados[idx] = resultado
+
+                        log_detalhado.append(f"🔄 [{concluidos}/{len(pendentes)}] {mlb_id} → {dias} dias")
+                        if resultado.get('sucesso'):
+                            log_detalhado.append(f"   ✅ Sucesso: {resultado.get('mensagem', '')}")
+                        else:
+                            log_detalhado.append(f"   ❌ Erro: {resultado.get('erro', '')}")
+                        _prog(f"Atualizando {concluidos} de {len(pendentes)}",
+                              5 + round(concluidos / len(pendentes) * 90))
             
             # Estatísticas finais
-            sucessos = len([r for r in resultados if r.get('sucesso')])
+            ignorados = len([r for r in resultados if r.get('ignorado')])
+            sucessos = len([r for r in resultados if r.get('sucesso') and not r.get('ignorado')])
             erros = len([r for r in resultados if not r.get('sucesso')])
-            removidos = len([r for r in resultados if r.get('sucesso') and r.get('dias') == 0])
+            removidos = len([r for r in resultados if r.get('sucesso') and not r.get('ignorado') and r.get('dias') == 0])
             
             print(f"\n📊 RESUMO DA ATUALIZAÇÃO EM MASSA:")
             print(f"   Total processados: {len(atualizacoes)}")
             print(f"   Sucessos: {sucessos}")
+            print(f"   Já no valor desejado: {ignorados}")
             print(f"   Erros: {erros}")
             print(f"   Prazos removidos: {removidos}")
             
             return {
-                'sucesso': sucessos > 0,
+                'sucesso': sucessos > 0 or ignorados > 0,
                 'resultados': resultados,
                 'total_atualizado': sucessos,
+                'total_ignorado': ignorados,
                 'total_erros': erros,
                 'prazos_removidos': removidos,
-                'mensagem': f'{sucessos} de {len(atualizacoes)} atualizados com sucesso',
+                'mensagem': f'{sucessos} de {len(atualizacoes)} atualizados com sucesso ({ignorados} já estavam corretos)',
                 'log_detalhado': log_detalhado
             }
             
@@ -528,7 +874,8 @@ class MercadoLivreAPISecure:
                 
                 print(f"🔍 Buscando lote {i//20 + 1}: {len(lote)} MLBs")
                 
-                response = requests.get(
+                response = self._request(
+                    'GET',
                     f"{self.base_url}/items?ids={ids_str}",
                     headers=headers,
                     timeout=30
@@ -554,9 +901,6 @@ class MercadoLivreAPISecure:
                             })
                             nao_encontrados += 1
                             print(f"   ❌ {mlb_id}")
-                
-                # Delay para evitar rate limit
-                time.sleep(0.5)
             
             return {
                 'sucesso': True,
@@ -747,7 +1091,8 @@ class MercadoLivreAPISecure:
             print("=" * 60)
             
             # Faz a requisição para um item específico
-            response = requests.get(
+            response = self._request(
+                'GET',
                 f"{self.base_url}/items/{mlb}",
                 headers=headers,
                 timeout=30
@@ -799,7 +1144,8 @@ class MercadoLivreAPISecure:
             headers = self._get_headers()
             
             # Primeiro obtém o user_id
-            response_me = requests.get(
+            response_me = self._request(
+                'GET',
                 f"{self.base_url}/users/me",
                 headers=headers,
                 timeout=10
@@ -822,7 +1168,8 @@ class MercadoLivreAPISecure:
                 'limit': limit
             }
             
-            response = requests.get(
+            response = self._request(
+                'GET',
                 url,
                 headers=headers,
                 params=params,
@@ -878,7 +1225,8 @@ class MercadoLivreAPISecure:
             
             # ETAPA 0: VERIFICAR STATUS ATUAL
             print("📋 ETAPA 0: Verificando status atual...")
-            response_status = requests.get(
+            response_status = self._request(
+                'GET',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 timeout=10
@@ -906,7 +1254,8 @@ class MercadoLivreAPISecure:
                 # Tenta excluir diretamente sem fechar
                 payload_excluir = {"deleted": True}
                 
-                response_excluir = requests.put(
+                response_excluir = self._request(
+                    'PUT',
                     f"{self.base_url}/items/{mlb_id}",
                     headers=headers,
                     json=payload_excluir,
@@ -937,7 +1286,8 @@ class MercadoLivreAPISecure:
                 print("📋 ETAPA 1 (ativo): Pausando anúncio primeiro...")
                 payload_pausar = {"status": "paused"}
                 
-                response_pausar = requests.put(
+                response_pausar = self._request(
+                    'PUT',
                     f"{self.base_url}/items/{mlb_id}",
                     headers=headers,
                     json=payload_pausar,
@@ -966,7 +1316,8 @@ class MercadoLivreAPISecure:
             print("📋 ETAPA 1 (geral): Alterando status para 'closed'...")
             payload_fechar = {"status": "closed"}
             
-            response_fechar = requests.put(
+            response_fechar = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=payload_fechar,
@@ -992,7 +1343,8 @@ class MercadoLivreAPISecure:
                             "status": "closed",
                             "deleted": False
                         }
-                        response_fechar = requests.put(
+                        response_fechar = self._request(
+                            'PUT',
                             f"{self.base_url}/items/{mlb_id}",
                             headers=headers,
                             json=payload_alt,
@@ -1023,7 +1375,8 @@ class MercadoLivreAPISecure:
             print("📋 ETAPA 2: Marcando como deletado permanente (deleted: true)...")
             payload_excluir = {"deleted": True}
             
-            response_excluir = requests.put(
+            response_excluir = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=payload_excluir,
@@ -1038,7 +1391,8 @@ class MercadoLivreAPISecure:
                 time.sleep(5)
                 
                 # Segunda tentativa
-                response_excluir = requests.put(
+                response_excluir = self._request(
+                    'PUT',
                     f"{self.base_url}/items/{mlb_id}",
                     headers=headers,
                     json=payload_excluir,
@@ -1056,7 +1410,8 @@ class MercadoLivreAPISecure:
                     "deleted": True,
                     "status": "closed"
                 }
-                response_excluir = requests.put(
+                response_excluir = self._request(
+                    'PUT',
                     f"{self.base_url}/items/{mlb_id}",
                     headers=headers,
                     json=payload_alt,
@@ -1069,7 +1424,8 @@ class MercadoLivreAPISecure:
                 
                 # Verifica se realmente foi deletado
                 try:
-                    response_verificacao = requests.get(
+                    response_verificacao = self._request(
+                        'GET',
                         f"{self.base_url}/items/{mlb_id}",
                         headers=headers,
                         timeout=10
@@ -1132,16 +1488,30 @@ class MercadoLivreAPISecure:
         data_criacao_ate=None,
         limite_total=None,
         delay_entre_lotes=0.1,
-        progresso_callback=None
+        progresso_callback=None,
+        concorrencia=4,
+        item_callback=None,
+        cancelar=None,
+        checkpoint_id=None
     ):
     
         """
         Busca TODOS os anúncios da conta usando scroll/scan.
         Contorna o limite de offset=1000 da API do ML.
         progresso_callback(msg, pct) é chamado a cada etapa para atualizar o frontend.
+        concorrencia: lotes do multi-get (20 IDs) buscados em paralelo no detalhamento.
+        A coleta de IDs e o detalhamento se sobrepõem: cada página do scroll
+        já é enviada aos workers enquanto a próxima página é buscada.
+        item_callback(item) recebe cada anúncio assim que é detalhado; nesse
+        modo os itens não são acumulados em 'resultados' (memória constante).
+        cancelar: threading.Event que interrompe a varredura quando setado.
+        checkpoint_id: grava o andamento em disco (utils/ml_checkpoint); se já
+        existir um checkpoint com esse id, retoma a varredura de onde parou
+        (os parâmetros salvos prevalecem sobre os informados).
         """
         import time
         from datetime import datetime
+        from utils.ml_checkpoint import CheckpointVarredura
 
         def _prog(msg, pct):
             if progresso_callback:
@@ -1150,10 +1520,13 @@ class MercadoLivreAPISecure:
                 except Exception:
                     pass
  
+        checkpoint = CheckpointVarredura(checkpoint_id) if checkpoint_id else None
+        salvo = checkpoint.carregar() if checkpoint else None
+
         try:
             headers = self._get_headers()
  
-            resp_me = requests.get(f"{self.base_url}/users/me", headers=headers, timeout=10)
+            resp_me = self._request('GET', f"{self.base_url}/users/me", headers=headers, timeout=10)
             if resp_me.status_code != 200:
                 return {'sucesso': False, 'erro': 'Erro ao obter dados do usuário'}
  
@@ -1161,171 +1534,343 @@ class MercadoLivreAPISecure:
             nickname = resp_me.json().get('nickname', '')
             print(f"👤 Usuário: {nickname} (ID: {user_id})")
 
-            _prog('Conectado. Coletando IDs da conta...', 3)
+            if salvo:
+                p = salvo['parametros']
+                if p.get('user_id') != user_id:
+                    return {'sucesso': False, 'erro': 'Checkpoint pertence a outra conta do Mercado Livre'}
+                status, data_criacao_de, data_criacao_ate, limite_total = (
+                    p.get('status', status), p.get('data_de'), p.get('data_ate'), p.get('limite')
+                )
+                print(f"♻️  Retomando varredura {checkpoint.id}: {len(salvo['ids'])} IDs coletados, "
+                      f"{len(salvo['lotes'])} lotes já detalhados")
+            elif checkpoint:
+                checkpoint.iniciar({
+                    'user_id': user_id, 'status': status, 'data_de': data_criacao_de,
+                    'data_ate': data_criacao_ate, 'limite': limite_total
+                })
+
+            _prog('Conectado. Coletando IDs e detalhando em paralelo...', 3)
  
             status_list = ['active', 'paused', 'closed'] if status == 'all' else [status]
-            todos_ids   = []
- 
-            for st in status_list:
-                print(f"\n🔍 Buscando IDs — status '{st}' (scroll)...")
-                scroll_id = None
-                pagina    = 1
- 
-                while True:
-                    params = {'status': st, 'search_type': 'scan', 'limit': 100}
-                    if scroll_id:
-                        params['scroll_id'] = scroll_id
-                    else:
-                        params['offset'] = 0
- 
-                    resp = requests.get(
-                        f"{self.base_url}/users/{user_id}/items/search",
-                        headers=headers, params=params, timeout=30
-                    )
- 
-                    if resp.status_code != 200:
-                        print(f"  ❌ Erro HTTP {resp.status_code}: {resp.text[:200]}")
-                        break
- 
-                    data_page  = resp.json()
-                    ids_pagina = data_page.get('results', [])
- 
-                    if not ids_pagina:
-                        print(f"  ✅ Fim dos resultados para '{st}'")
-                        break
- 
-                    todos_ids.extend(ids_pagina)
-                    print(f"  Página {pagina}: +{len(ids_pagina)} IDs (total acumulado: {len(todos_ids)})")
-                    _prog(f"Coletando IDs '{st}'... {len(todos_ids)} encontrados", 5)
- 
-                    if limite_total and len(todos_ids) >= limite_total:
-                        print(f"  ⏹ Limite de {limite_total} atingido")
-                        break
- 
-                    scroll_id = data_page.get('scroll_id')
-                    if not scroll_id:
-                        print(f"  ✅ Sem scroll_id — fim da busca para '{st}'")
-                        break
+            total_scroll_anteriores = 0
+            posicao = dict(salvo['posicao']) if salvo else {}
  
-                    pagina += 1
-                    time.sleep(0.3)
- 
-                if limite_total and len(todos_ids) >= limite_total:
-                    break
+            # Produtor (este loop de scroll) e consumidores (workers do multi-get)
+            # rodam ao mesmo tempo: cada página de IDs já vira lotes de detalhamento.
+            with ThreadPoolExecutor(max_workers=max(1, concorrencia)) as executor:
+                pipeline = _PipelineDetalhamento(
+                    self, executor, data_criacao_de, data_criacao_ate,
+                    limite_total=limite_total, progresso_callback=progresso_callback,
+                    item_callback=item_callback, checkpoint=checkpoint, cancelar=cancelar
+                )
+
+                if salvo:
+                    pipeline.retomar(salvo['lotes'])
+                    pipeline.enfileirar(salvo['ids'])
+                    total_scroll_anteriores = pipeline.total_ids
  
-            todos_ids = list(dict.fromkeys(todos_ids))
-            if limite_total:
-                todos_ids = todos_ids[:limite_total]
+                status_anterior = posicao.get('status')
+                erro_scan = None
+                try:
+                    for st, ids_pagina, total_status in self._iterar_paginas_scan(
+                            user_id, status_list, headers, cancelar, posicao=posicao):
+                        if st != status_anterior:
+                            total_scroll_anteriores = pipeline.total_ids
+                            status_anterior = st
+
+                        pipeline.total_estimado = max(total_scroll_anteriores + total_status, pipeline.total_ids)
+                        pipeline.enfileirar(ids_pagina)
+                        if checkpoint:
+                            checkpoint.registrar_pagina(ids_pagina, posicao)
+                        pipeline.coletar()
+                        print(f"  +{len(ids_pagina)} IDs (total enfileirado: {pipeline.total_ids})")
+
+                        if pipeline.limite_atingido:
+                            print(f"  ⏹ Limite de {limite_total} atingido")
+                            break
+                except ErroVarreduraScan as e:
+                    # IDs já coletados ainda são detalhados (e gravados no checkpoint)
+                    erro_scan = str(e)
+                    print(f"  ❌ Varredura interrompida: {erro_scan}")
+
+                cancelada = bool(cancelar and cancelar.is_set())
+                if not erro_scan and not cancelada and not pipeline.limite_atingido:
+                    pendentes = [st for st in status_list if st not in posicao.get('concluidos', [])]
+                    if pendentes:
+                        erro_scan = f"Varredura incompleta para: {', '.join(pendentes)}"
  
-            print(f"\n📦 Total de IDs únicos coletados: {len(todos_ids)}")
-            _prog(f'{len(todos_ids)} IDs coletados. Iniciando detalhamento...', 10)
+                if cancelada:
+                    print("⏹ Varredura cancelada")
+                    pipeline.descartar_pendentes()
  
-            if not todos_ids:
-                return {
-                    'sucesso': True,
-                    'total_encontrado': 0,
-                    'total_nao_encontrado': 0,
-                    'resultados': [],
-                    'timestamp': datetime.now().isoformat()
-                }
+                pipeline.total_estimado = pipeline.total_ids
+                print(f"\n📦 Total de IDs únicos coletados: {pipeline.total_ids}")
+                pipeline.fechar()
+                pipeline.coletar(bloquear=True)
+                # Cancelamento durante o detalhamento: os lotes descartados voltam na retomada
+                if pipeline.cancelado and not cancelada:
+                    cancelada = True
+                    print("⏹ Detalhamento cancelado")
  
-            return self._detalhar_anuncios_completo(
-                todos_ids, data_criacao_de, data_criacao_ate, delay_entre_lotes,
-                progresso_callback=progresso_callback
-            )
+            resultado = pipeline.resultado()
+            if cancelada:
+                resultado.update({'cancelado': True, 'parcial': True})
+            if erro_scan:
+                resultado.update({'sucesso': False, 'erro': erro_scan, 'parcial': True})
+            if checkpoint:
+                # Cancelada, scroll interrompido ou com lotes falhos: mantém o checkpoint para retomar
+                if cancelada or erro_scan or pipeline.lotes_falhos:
+                    resultado['checkpoint_id'] = checkpoint.id
+                    resultado['retomavel'] = True
+                else:
+                    checkpoint.concluir()
+            return resultado
  
         except Exception as e:
             import traceback
             traceback.print_exc()
-            return {'sucesso': False, 'erro': str(e)}
+            resultado = {'sucesso': False, 'erro': str(e)}
+            if checkpoint and checkpoint.existe():
+                resultado.update({'checkpoint_id': checkpoint.id, 'retomavel': True})
+            return resultado
 
     
 
-    def _detalhar_anuncios_completo(self, todos_ids, data_criacao_de, data_criacao_ate, delay_entre_lotes, progresso_callback=None):
-        import time
-        from datetime import datetime
+    def _iterar_paginas_scan(self, user_id, status_list, headers, cancelar=None, posicao=None):
+        """
+        Percorre /users/{id}/items/search em modo scan (scroll), que não tem
+        o limite de offset=1000. Gera (status, ids_da_pagina, total_do_status)
+        a cada página de até 100 IDs.
 
-        def _prog(msg, pct):
-            if progresso_callback:
-                try:
-                    progresso_callback(msg, pct)
-                except Exception:
-                    pass
- 
-        resultados      = []
-        encontrados     = 0
-        nao_encontrados = 0
- 
-        dt_de  = datetime.strptime(data_criacao_de,  '%Y-%m-%d').date() if data_criacao_de  else None
-        dt_ate = datetime.strptime(data_criacao_ate, '%Y-%m-%d').date() if data_criacao_ate else None
- 
-        LOTE        = 20  # API do ML aceita no máximo 20 IDs por requisição no multi-get
-        total_lotes = (len(todos_ids) - 1) // LOTE + 1
- 
-        print(f"\n📋 Detalhando {len(todos_ids)} anúncios em {total_lotes} lotes de {LOTE}...")
- 
-        for i in range(0, len(todos_ids), LOTE):
-            lote   = todos_ids[i:i + LOTE]
-            lote_n = i // LOTE + 1
- 
-            if lote_n % 10 == 1 or lote_n == total_lotes:
-                pct = round(lote_n / total_lotes * 100)
-                print(f"  [{pct:3d}%] Lote {lote_n}/{total_lotes} — {encontrados} detalhados...")
+        posicao: dict atualizado no lugar com {'status', 'scroll_id', 'concluidos'}
+        antes de cada página ser entregue; passando um dict já preenchido a
+        busca continua dali (scroll vencido recomeça o status do início).
 
-            # Progresso real enviado ao frontend: de 10% a 95%
-            pct_frontend = 10 + round((lote_n / total_lotes) * 85)
-            _prog(f'Detalhando anúncios... {encontrados} de ~{len(todos_ids)} ({lote_n}/{total_lotes} lotes)', pct_frontend)
- 
-            for tentativa in range(3):
-                resp = requests.get(
-                    f"{self.base_url}/items?ids={','.join(lote)}",
-                    headers=self._get_headers(),
-                    timeout=30
+        Página com erro (mesmo após as novas tentativas do limitador) levanta
+        ErroVarreduraScan; `posicao` continua apontando para ela.
+        """
+        posicao = posicao if posicao is not None else {}
+        concluidos = posicao.setdefault('concluidos', [])
+
+        for st in status_list:
+            if st in concluidos:
+                continue
+            scroll_id = posicao.get('scroll_id') if posicao.get('status') == st else None
+            retomado  = bool(scroll_id)
+            posicao.update({'status': st, 'scroll_id': scroll_id})
+            print(f"\n🔍 Buscando IDs — status '{st}' (scroll{', retomando' if retomado else ''})...")
+            pagina    = 1
+
+            while not (cancelar and cancelar.is_set()):
+                params = {'status': st, 'search_type': 'scan', 'limit': 100}
+                if scroll_id:
+                    params['scroll_id'] = scroll_id
+                else:
+                    params['offset'] = 0
+
+                resp = self._request(
+                    'GET',
+                    f"{self.base_url}/users/{user_id}/items/search",
+                    headers=headers, params=params, timeout=30
                 )
-                if resp.status_code == 200:
+
+                if resp.status_code != 200:
+                    if retomado:
+                        print(f"  ♻️  scroll_id salvo expirou (HTTP {resp.status_code}) — recomeçando '{st}'")
+                        scroll_id, retomado = None, False
+                        posicao['scroll_id'] = None
+                        continue
+                    print(f"  ❌ Erro HTTP {resp.status_code}: {resp.text[:200]}")
+                    raise ErroVarreduraScan(f"HTTP {resp.status_code} na página {pagina} do status '{st}'")
+                retomado = False
+
+                data_page  = resp.json()
+                ids_pagina = data_page.get('results', [])
+
+                if not ids_pagina:
+                    print(f"  ✅ Fim dos resultados para '{st}'")
+                    concluidos.append(st)
                     break
-                wait = 5 if resp.status_code == 429 else 2
-                print(f"  ⚠️  HTTP {resp.status_code} — aguardando {wait}s (tentativa {tentativa+1}/3)")
-                time.sleep(wait)
-            else:
-                print(f"  ❌ Lote {lote_n} falhou — pulando")
+
+                scroll_id = data_page.get('scroll_id')
+                posicao['scroll_id'] = scroll_id
+                if not scroll_id:
+                    concluidos.append(st)
+
+                print(f"  Página {pagina}: {len(ids_pagina)} IDs")
+                yield st, ids_pagina, data_page.get('paging', {}).get('total') or 0
+
+                if not scroll_id:
+                    print(f"  ✅ Sem scroll_id — fim da busca para '{st}'")
+                    break
+
+                pagina += 1
+
+    # ================================================================
+    # MULTI-GET CONCORRENTE (/items?ids=) — lotes de 20 em paralelo
+    # ================================================================
+
+    LOTE_MULTIGET = 20  # API do ML aceita no máximo 20 IDs por requisição no multi-get
+
+    def _buscar_lote_multiget(self, lote, atributos=None):
+        """
+        Busca um lote de até 20 IDs em /items?ids=.
+        `atributos` restringe os campos devolvidos (ex: 'id,shipping').
+        Retorna a lista de wrappers {code, body} ou None se o lote falhar.
+        429/5xx já são repetidos pelo limitador em _request.
+        """
+        params = {'ids': ','.join(lote)}
+        if atributos:
+            params['attributes'] = atributos
+
+        resp = self._request(
+            'GET',
+            '/items',
+            headers=self._get_headers(),
+            params=params,
+            timeout=30
+        )
+        if resp.status_code == 200:
+            return resp.json()
+        print(f"  ⚠️  HTTP {resp.status_code} no multi-get de {len(lote)} IDs")
+        return None
+
+    def _multiget_concorrente(self, ids, concorrencia=4, atributos=None, ao_concluir_lote=None):
+        """
+        Busca `ids` em lotes de 20 com até `concorrencia` lotes em voo.
+
+        Args:
+            ids: lista de MLBs
+            concorrencia: número de lotes buscados em paralelo
+            atributos: campos a retornar (parâmetro `attributes` do multi-get)
+            ao_concluir_lote: callback(indice_lote, wrappers, concluidos, total_lotes)
+                chamado na thread chamadora à medida que cada lote termina
+                (wrappers é None quando o lote falhou)
+
+        Returns:
+            lista com os wrappers de cada lote, na mesma ordem de `ids`
+        """
+        lotes = [ids[i:i + self.LOTE_MULTIGET] for i in range(0, len(ids), self.LOTE_MULTIGET)]
+        respostas = [None] * len(lotes)
+        if not lotes:
+            return respostas
+
+        with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(lotes)))) as executor:
+            futures = {
+                executor.submit(self._buscar_lote_multiget, lote, atributos): idx
+                for idx, lote in enumerate(lotes)
+            }
+            concluidos = 0
+            for future in as_completed(futures):
+                idx = futures[future]
+                try:
+                    respostas[idx] = future.result()
+                except Exception as e:
+                    print(f"  ❌ Lote {idx + 1} falhou: {str(e)}")
+                    respostas[idx] = None
+                concluidos += 1
+                if ao_concluir_lote:
+                    ao_concluir_lote(idx, respostas[idx], concluidos, len(lotes))
+
+        return respostas
+
+    def _ler_itens_em_lote(self, ids, concorrencia=4, atributos=None):
+        """
+        Lê `ids` pelo multi-get concorrente. IDs de lotes que falharam (HTTP,
+        timeout) ou que voltaram com 429/5xx são relidos um a um em /items/{id}.
+
+        Returns:
+            (itens, inexistentes): {id: body} dos lidos e o conjunto dos IDs
+            que o ML respondeu 404. IDs fora dos dois não puderam ser lidos
+            (falha temporária: vale repetir a operação).
+        """
+        itens, inexistentes, reler = {}, set(), []
+        lotes = [ids[i:i + self.LOTE_MULTIGET] for i in range(0, len(ids), self.LOTE_MULTIGET)]
+        for lote, wrappers in zip(lotes, self._multiget_concorrente(ids, concorrencia=concorrencia, atributos=atributos)):
+            if wrappers is None:
+                reler.extend(lote)
                 continue
- 
-            for item_wrapper in resp.json():
-                mlb_id = item_wrapper.get('id', 'DESCONHECIDO')
-                if item_wrapper.get('code') == 200 and 'body' in item_wrapper:
-                    item = item_wrapper['body']
- 
-                    if dt_de or dt_ate:
-                        try:
-                            item_date = datetime.fromisoformat(
-                                item.get('date_created', '').replace('Z', '+00:00')
-                            ).date()
-                            if dt_de  and item_date < dt_de:  continue
-                            if dt_ate and item_date > dt_ate: continue
-                        except Exception:
-                            pass
- 
-                    resultados.append(self._processar_anuncio_completo(item))
-                    encontrados += 1
-                else:
-                    resultados.append({'id': mlb_id, 'error': 'Não encontrado', 'status': 'error'})
-                    nao_encontrados += 1
- 
-            time.sleep(delay_entre_lotes)
- 
-        print(f"\n✅ {encontrados} detalhados | {nao_encontrados} com erro")
- 
-        return {
-            'sucesso': True,
-            'total_ids_coletados':  len(todos_ids),
-            'total_encontrado':     encontrados,
-            'total_nao_encontrado': nao_encontrados,
-            'resultados':           resultados,
-            'timestamp': __import__('datetime').datetime.now().isoformat()
-        }
- 
- 
+            for mlb_id, wrapper in zip(lote, wrappers):
+                body = wrapper.get('body') or {}
+                code = wrapper.get('code')
+                if code == 200 and body.get('id'):
+                    itens[body['id']] = body
+                elif code == 404:
+                    inexistentes.add(mlb_id)
+                elif code == 429 or (code or 0) >= 500:
+                    reler.append(mlb_id)
+
+        if reler:
+            print(f"  🔁 Relendo um a um {len(reler)} IDs de lotes que falharam")
+            params = {'attributes': atributos} if atributos else None
+
+            def _ler(mlb_id):
+                try:
+                    return self._request('GET', f'/items/{mlb_id}', usar_cache=False,
+                                         headers=self._get_headers(), params=params, timeout=15)
+                except Exception as e:
+                    print(f"  ❌ {mlb_id}: {str(e)}")
+                    return None
+
+            with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(reler)))) as executor:
+                for mlb_id, resp in zip(reler, executor.map(_ler, reler)):
+                    if resp is not None and resp.status_code == 200:
+                        body = resp.json()
+                        itens[body.get('id', mlb_id)] = body
+                    elif resp is not None and resp.status_code == 404:
+                        inexistentes.add(mlb_id)
+
+        return itens, inexistentes
+
+    def _detalhar_anuncios_completo(self, todos_ids, data_criacao_de, data_criacao_ate, delay_entre_lotes,
+                                    progresso_callback=None, concorrencia=4):
+        """
+        Detalha uma lista de IDs já conhecida via multi-get concorrente,
+        mantendo a ordem original dos IDs no resultado. O ritmo é controlado
+        pelo limitador de taxa; `delay_entre_lotes` é mantido apenas por
+        compatibilidade.
+        """
+        print(f"\n📋 Detalhando {len(todos_ids)} anúncios em lotes de {self.LOTE_MULTIGET} "
+              f"({concorrencia} em paralelo)...")
+
+        with ThreadPoolExecutor(max_workers=max(1, concorrencia)) as executor:
+            pipeline = _PipelineDetalhamento(
+                self, executor, data_criacao_de, data_criacao_ate,
+                progresso_callback=progresso_callback
+            )
+            pipeline.enfileirar(todos_ids)
+            pipeline.total_estimado = pipeline.total_ids
+            pipeline.fechar()
+            pipeline.coletar(bloquear=True)
+
+        return pipeline.resultado()
+
+    def _processar_wrappers_lote(self, wrappers, dt_de, dt_ate, contagem):
+        """Converte os wrappers de um lote do multi-get aplicando o filtro de data de criação"""
+        resultados = []
+        for item_wrapper in wrappers:
+            mlb_id = item_wrapper.get('id', 'DESCONHECIDO')
+            if item_wrapper.get('code') == 200 and 'body' in item_wrapper:
+                item = item_wrapper['body']
+
+                if dt_de or dt_ate:
+                    try:
+                        item_date = datetime.fromisoformat(
+                            item.get('date_created', '').replace('Z', '+00:00')
+                        ).date()
+                        if dt_de  and item_date < dt_de:  continue
+                        if dt_ate and item_date > dt_ate: continue
+                    except Exception:
+                        pass
+
+                resultados.append(self._processar_anuncio_completo(item))
+                contagem['encontrados'] += 1
+            else:
+                resultados.append({'id': mlb_id, 'error': 'Não encontrado', 'status': 'error'})
+                contagem['nao_encontrados'] += 1
+        return resultados
+
+
     def _processar_anuncio_completo(self, item):
         shipping   = item.get('shipping', {})
         sale_terms = item.get('sale_terms', [])
@@ -1372,12 +1917,9 @@ class MercadoLivreAPISecure:
         Busca todas as opções válidas para um atributo, incluindo "Não se aplica"
         """
         try:
-            headers = self._get_headers()
-            url = f"{self.base_url}/categories/{category_id}/attributes"
-            response = requests.get(url, headers=headers, timeout=15)
+            atributos_cat = self.obter_atributos_categoria(category_id)
             
-            if response.status_code == 200:
-                atributos_cat = response.json()
+            if atributos_cat is not None:
                 for attr in atributos_cat:
                     if attr.get('id') == atributo_id:
                         valores = []
@@ -1408,7 +1950,7 @@ class MercadoLivreAPISecure:
             headers = self._get_headers()
             url = f"https://api.mercadolibre.com/items/{mlb}"
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self._request('GET', url, headers=headers, timeout=15)
             
             if response.status_code != 200:
                 return {
@@ -1471,32 +2013,20 @@ class MercadoLivreAPISecure:
                 try:
                     headers = self._get_headers()
                     url = f"https://api.mercadolibre.com/items/{mlb}"
-                    response = requests.get(url, headers=headers, timeout=15)
+                    response = self._request('GET', url, headers=headers, timeout=15)
                     
                     if response.status_code == 200:
                         dados = response.json()
                         category_id = dados.get('category_id')
                         
                         if category_id:
-                            url_cat = f"https://api.mercadolibre.com/categories/{category_id}/attributes"
-                            response_cat = requests.get(url_cat, headers=headers, timeout=15)
-                            
-                            if response_cat.status_code == 200:
-                                atributos = response_cat.json()
-                                for attr in atributos:
-                                    if attr.get('id') == 'MODEL':
-                                        valores = []
-                                        for valor in attr.get('values', []):
-                                            valores.append({
-                                                'id': valor.get('id'),
-                                                'name': valor.get('name')
-                                            })
-                                        if valores:
-                                            return {
-                                                'sucesso': True,
-                                                'modelos_disponiveis': valores,
-                                                'category_id': category_id
-                                            }
+                            valores = self._valores_modelo_categoria(category_id)
+                            if valores:
+                                return {
+                                    'sucesso': True,
+                                    'modelos_disponiveis': valores,
+                                    'category_id': category_id
+                                }
                 except Exception as e:
                     print(f"Erro ao buscar modelos da categoria: {e}")
             
@@ -1524,7 +2054,7 @@ class MercadoLivreAPISecure:
             headers = self._get_headers()
             url = f"https://api.mercadolibre.com/items/{mlb}"
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self._request('GET', url, headers=headers, timeout=15)
             
             if response.status_code != 200:
                 return {
@@ -1565,7 +2095,7 @@ class MercadoLivreAPISecure:
             
             # Envia a atualização
             url_update = f"https://api.mercadolibre.com/items/{mlb}"
-            response_update = requests.put(url_update, headers=headers, json=payload, timeout=30)
+            response_update = self._request('PUT', url_update, headers=headers, json=payload, timeout=30)
             
             if response_update.status_code == 200:
                 return {
@@ -1588,38 +2118,138 @@ class MercadoLivreAPISecure:
                 'mlb': mlb
             }
 
-    def alterar_modelo_multiplos(self, mlbs, novo_modelo_nome):
-        """
-        Altera o modelo de múltiplos produtos em lote
+    def _valores_modelo_categoria(self, category_id):
+        """Valores pré-definidos do atributo MODEL na categoria (schema em cache)"""
+        for attr in self.obter_atributos_categoria(category_id) or []:
+            if attr.get('id') == 'MODEL':
+                return [{'id': v.get('id'), 'name': v.get('name')} for v in attr.get('values', [])]
+        return []
+
+    def alterar_modelo_multiplos(self, mlbs, novo_modelo_nome, concorrencia=4,
+                                 progresso_callback=None, cancelar=None):
         """
-        import time
-        resultados = []
-        sucessos = 0
-        erros = 0
-        
-        for mlb in mlbs:
-            resultado = self.alterar_modelo_produto(mlb, novo_modelo_nome)
-            resultados.append(resultado)
-            
-            if resultado.get('sucesso'):
-                sucessos += 1
-            else:
-                erros += 1
-            
-            time.sleep(1)
-        
-        return {
-            'sucesso': sucessos > 0,
-            'total': len(mlbs),
-            'sucessos': sucessos,
-            'erros': erros,
-            'resultados': resultados
-        }
+        Altera o modelo de múltiplos produtos em lote:
 
-    def _extrair_mensagem_erro(self, response):
-        """Extrai mensagem de erro da resposta da API"""
-        try:
-            error_data = response.json()
+        1. Lê categoria e atributos de todos via multi-get (20 por requisição);
+        2. Resolve o valor de MODEL uma vez por categoria (lista de valores
+           do schema em cache + match aproximado do nome pedido);
+        3. Ignora quem já tem o modelo pedido e envia os PUTs em paralelo.
+        """
+        def _prog(msg, pct):
+            if progresso_callback:
+                try:
+                    progresso_callback(msg, pct)
+                except Exception:
+                    pass
+
+        try:
+            mlbs = list(dict.fromkeys(m.strip().upper() for m in mlbs if m))
+            resultados = {}
+
+            # 1. Itens
+            _prog(f'Lendo {len(mlbs)} anúncios...', 2)
+            itens, inexistentes = self._ler_itens_em_lote(mlbs, concorrencia=concorrencia,
+                                                          atributos='id,title,category_id,attributes')
+
+            # 2. Valor de MODEL resolvido uma vez por categoria
+            valores_categoria = {}
+            for category_id in {item.get('category_id') for item in itens.values()}:
+                if cancelar and cancelar.is_set():
+                    break
+                valor_id, valor_nome = self._find_dropdown_value(
+                    self._valores_modelo_categoria(category_id) if category_id else [],
+                    None, novo_modelo_nome
+                )
+                valores_categoria[category_id] = (valor_id, valor_nome or novo_modelo_nome)
+            print(f"🏷️  MODEL resolvido para {len(valores_categoria)} categorias")
+
+            pendentes = []
+            for mlb in mlbs:
+                item = itens.get(mlb)
+                if item is None:
+                    erro = 'Item não encontrado' if mlb in inexistentes else ERRO_LEITURA_ITEM
+                    resultados[mlb] = {'sucesso': False, 'erro': erro, 'mlb': mlb}
+                    continue
+                valor_id, valor_nome = valores_categoria.get(item.get('category_id'), (None, novo_modelo_nome))
+                atual = next((a for a in item.get('attributes', []) if a.get('id') == 'MODEL'), None)
+                if atual and self._normalize_text(atual.get('value_name')) == self._normalize_text(valor_nome):
+                    resultados[mlb] = {
+                        'sucesso': True,
+                        'mlb': mlb,
+                        'modelo_novo': valor_nome,
+                        'mensagem': f'Modelo já era "{valor_nome}"',
+                        'ignorado': True
+                    }
+                else:
+                    pendentes.append(mlb)
+
+            # 3. Atualizações em paralelo
+            def _alterar(mlb):
+                if cancelar and cancelar.is_set():
+                    return {'sucesso': False, 'erro': 'Cancelado', 'mlb': mlb}
+
+                item = itens[mlb]
+                valor_id, valor_nome = valores_categoria.get(item.get('category_id'), (None, novo_modelo_nome))
+                novo = {'id': 'MODEL', 'name': 'Modelo', 'value_name': valor_nome, 'value_struct': None}
+                if valor_id:
+                    novo['value_id'] = valor_id
+
+                atributos = [a for a in item.get('attributes', []) if a.get('id') != 'MODEL'] + [novo]
+                response_update = self._request(
+                    'PUT',
+                    f"/items/{mlb}",
+                    headers=self._get_headers(),
+                    json={'attributes': atributos},
+                    timeout=30
+                )
+                if response_update.status_code == 200:
+                    return {
+                        'sucesso': True,
+                        'mlb': mlb,
+                        'modelo_novo': valor_nome,
+                        'mensagem': f'Modelo alterado para "{valor_nome}" com sucesso!'
+                    }
+                return {
+                    'sucesso': False,
+                    'erro': f'Erro ao atualizar: {response_update.status_code} - {response_update.text[:200]}',
+                    'mlb': mlb
+                }
+
+            if pendentes:
+                with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(pendentes)))) as executor:
+                    futures = {executor.submit(_alterar, mlb): mlb for mlb in pendentes}
+                    for concluidos, future in enumerate(as_completed(futures), 1):
+                        mlb = futures[future]
+                        try:
+                            resultados[mlb] = future.result()
+                        except Exception as e:
+                            resultados[mlb] = {'sucesso': False, 'erro': str(e), 'mlb': mlb}
+                        _prog(f"Alterando {concluidos} de {len(pendentes)}",
+                              5 + round(concluidos / len(pendentes) * 93))
+
+            lista = [resultados[m] for m in mlbs]
+            ignorados = sum(1 for r in lista if r.get('ignorado'))
+            sucessos  = sum(1 for r in lista if r.get('sucesso') and not r.get('ignorado'))
+            erros     = len(lista) - sucessos - ignorados
+
+            print(f"📊 Modelo: {sucessos} alterados, {ignorados} já corretos, {erros} erros")
+            return {
+                'sucesso': sucessos > 0 or ignorados > 0,
+                'total': len(mlbs),
+                'sucessos': sucessos,
+                'ignorados': ignorados,
+                'erros': erros,
+                'resultados': lista
+            }
+
+        except Exception as e:
+            print(f"❌ Erro na alteração de modelo em lote: {str(e)}")
+            return {'sucesso': False, 'erro': str(e)}
+
+    def _extrair_mensagem_erro(self, response):
+        """Extrai mensagem de erro da resposta da API"""
+        try:
+            error_data = response.json()
             return error_data.get('message', error_data.get('error', str(error_data)))
         except:
             return response.text[:200] if response.text else f'Erro HTTP {response.status_code}'
@@ -1634,7 +2264,8 @@ class MercadoLivreAPISecure:
             print("=" * 60)
 
             # 1. Busca dados do item
-            response_item = requests.get(
+            response_item = self._request(
+                'GET',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 timeout=10
@@ -1678,14 +2309,16 @@ class MercadoLivreAPISecure:
             print(f"📦 Modo de envio atual: {modo_atual}")
             
             # 5. Verifica preferências do usuário
-            response_user = requests.get(
+            response_user = self._request(
+                'GET',
                 f"{self.base_url}/users/me",
                 headers=headers,
                 timeout=10
             )
             user_id = response_user.json()['id']
             
-            response_prefs = requests.get(
+            response_prefs = self._request(
+                'GET',
                 f"{self.base_url}/users/{user_id}/shipping_preferences",
                 headers=headers,
                 timeout=10
@@ -1698,7 +2331,8 @@ class MercadoLivreAPISecure:
                 print(f"\n👤 ME2 habilitado na conta: {'✅ SIM' if me2_habilitado else '❌ NÃO'}")
             
             # 6. Verifica se categoria suporta ME2
-            response_cat = requests.get(
+            response_cat = self._request(
+                'GET',
                 f"{self.base_url}/categories/{category_id}/shipping_preferences",
                 headers=headers,
                 timeout=10
@@ -1769,7 +2403,8 @@ class MercadoLivreAPISecure:
             print("=" * 60)
             
             # 1. Busca dados do anúncio (apenas para informação)
-            response = requests.get(
+            response = self._request(
+                'GET',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 timeout=10
@@ -1795,7 +2430,8 @@ class MercadoLivreAPISecure:
             print(f"   Payload: {json.dumps(update_payload, indent=2)}")
             
             # 3. Faz a requisição PUT com payload mínimo
-            response_put = requests.put(
+            response_put = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=update_payload,
@@ -1808,7 +2444,8 @@ class MercadoLivreAPISecure:
                 # 4. Verifica a mudança
                 import time
                 time.sleep(2)
-                response_check = requests.get(
+                response_check = self._request(
+                    'GET',
                     f"{self.base_url}/items/{mlb_id}",
                     headers=headers,
                     timeout=10
@@ -1882,7 +2519,8 @@ class MercadoLivreAPISecure:
             print(f"📤 Enviando payload alternativo:")
             print(json.dumps(update_payload, indent=2))
             
-            response = requests.put(
+            response = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=update_payload,
@@ -1918,7 +2556,8 @@ class MercadoLivreAPISecure:
             print("=" * 60)
             
             # 1. Busca o item atual
-            response = requests.get(
+            response = self._request(
+                'GET',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 timeout=10
@@ -1945,7 +2584,8 @@ class MercadoLivreAPISecure:
             
             print(f"   Payload: {json.dumps(payload1, indent=2)}")
             
-            response1 = requests.put(
+            response1 = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=payload1,
@@ -1975,7 +2615,8 @@ class MercadoLivreAPISecure:
             
             print(f"   Payload: {json.dumps(payload2, indent=2)}")
             
-            response2 = requests.put(
+            response2 = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=payload2,
@@ -2006,7 +2647,8 @@ class MercadoLivreAPISecure:
             
             print(f"   Payload: {json.dumps(payload3, indent=2)}")
             
-            response3 = requests.put(
+            response3 = self._request(
+                'PUT',
                 f"{self.base_url}/items/{mlb_id}",
                 headers=headers,
                 json=payload3,
@@ -2032,76 +2674,144 @@ class MercadoLivreAPISecure:
             print(f"❌ Erro no debug: {str(e)}")
             return None
     
-    def alterar_multiplos_para_me2(self, lista_mlbs):
+    def alterar_multiplos_para_me2(self, lista_mlbs, progresso_callback=None, cancelar=None,
+                                   concorrencia=None, tentativas=None, confirmar=True):
         """
-        Altera múltiplos anúncios para ME2
-        Versão otimizada baseada no debug
+        Altera múltiplos anúncios para ME2 em pipeline:
+
+        1. Lê o modo de envio atual de todos via multi-get (20 por requisição);
+        2. Ignora quem já está em ME2 sem nenhuma requisição extra;
+        3. Envia o PUT com payload mínimo em paralelo (`concorrencia` workers),
+           repetindo até `tentativas` vezes em conflito (409) ou falha de rede;
+        4. Confirma o modo final dos migrados com um novo multi-get.
+
+        progresso_callback(msg, pct) acompanha o andamento; cancelar é um
+        threading.Event que impede o início de novas migrações.
         """
+        concorrencia = concorrencia or Config.ML_ME2_CONCORRENCIA
+        tentativas   = tentativas or Config.ML_ME2_TENTATIVAS
+
+        def _prog(msg, pct):
+            if progresso_callback:
+                try:
+                    progresso_callback(msg, pct)
+                except Exception:
+                    pass
+
         try:
-            resultados = []
-            sucessos = 0
-            falhas = 0
-            ignorados = 0
+            mlbs = list(dict.fromkeys(m.strip().upper() for m in lista_mlbs if m))
+            resultados = {}
             
             print(f"\n🚀 INICIANDO MIGRAÇÃO EM MASSA PARA ME2")
-            print(f"Total de MLBs: {len(lista_mlbs)}")
+            print(f"Total de MLBs: {len(mlbs)} ({concorrencia} em paralelo)")
             print("=" * 60)
-            
-            for i, mlb_id in enumerate(lista_mlbs, 1):
-                print(f"\n📌 [{i}/{len(lista_mlbs)}] Processando MLB: {mlb_id}")
-                
-                # Verifica se já está em ME2
-                try:
-                    headers = self._get_headers()
-                    response = requests.get(
-                        f"{self.base_url}/items/{mlb_id}",
-                        headers=headers,
-                        timeout=10
-                    )
-                    
-                    if response.status_code == 200:
-                        modo_atual = response.json().get('shipping', {}).get('mode')
-                        if modo_atual == 'me2':
-                            print(f"   ⏭️ Já está em ME2, ignorando")
-                            resultados.append({
-                                'mlb': mlb_id,
-                                'sucesso': True,
-                                'mensagem': 'Já estava em ME2',
-                                'ignorado': True
-                            })
-                            ignorados += 1
-                            continue
-                except:
-                    pass
-                
-                # Tenta migrar com payload mínimo
-                resultado = self.alterar_para_me2(mlb_id)
-                
-                if resultado.get('sucesso'):
-                    sucessos += 1
-                    print(f"   ✅ Migrado com sucesso!")
+
+            # 1. Modo de envio atual de todos os anúncios
+            _prog(f'Lendo modo de envio de {len(mlbs)} anúncios...', 2)
+            itens, inexistentes = self._ler_itens_em_lote(mlbs, concorrencia=concorrencia, atributos='id,shipping')
+            modos = {mlb: (item.get('shipping') or {}).get('mode') for mlb, item in itens.items()}
+
+            # 2. Separa quem já está em ME2 ou não foi encontrado
+            pendentes = []
+            for mlb_id in mlbs:
+                if mlb_id not in modos:
+                    erro = 'Item não encontrado' if mlb_id in inexistentes else ERRO_LEITURA_ITEM
+                    resultados[mlb_id] = {'sucesso': False, 'erro': erro, 'mlb': mlb_id}
+                elif modos[mlb_id] == 'me2':
+                    resultados[mlb_id] = {
+                        'mlb': mlb_id,
+                        'sucesso': True,
+                        'mensagem': 'Já estava em ME2',
+                        'ignorado': True
+                    }
                 else:
-                    falhas += 1
-                    print(f"   ❌ Falha: {resultado.get('erro', 'Erro desconhecido')}")
-                
-                resultados.append(resultado)
-                
-                # Delay para não sobrecarregar a API
-                import time
-                time.sleep(1)
+                    pendentes.append(mlb_id)
+
+            print(f"⏭️  {len(mlbs) - len(pendentes)} sem migração necessária | 📤 {len(pendentes)} a migrar")
+
+            # 3. Migrações em paralelo
+            def _migrar(mlb_id):
+                if cancelar and cancelar.is_set():
+                    return {'sucesso': False, 'erro': 'Cancelado', 'mlb': mlb_id}
+
+                modo_anterior = modos.get(mlb_id)
+                erro = None
+                for tentativa in range(tentativas):
+                    try:
+                        response_put = self._request(
+                            'PUT',
+                            f"/items/{mlb_id}",
+                            headers=self._get_headers(),
+                            json={"shipping": {"mode": "me2"}},
+                            timeout=30
+                        )
+                    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                        erro = str(e)
+                    else:
+                        if response_put.status_code == 200:
+                            return {
+                                'sucesso': True,
+                                'mensagem': f'Anúncio {mlb_id} migrado para ME2',
+                                'modo_anterior': modo_anterior,
+                                'mlb': mlb_id
+                            }
+                        try:
+                            error_data = response_put.json()
+                            erro = error_data.get('message', str(error_data))
+                        except ValueError:
+                            erro = f'HTTP {response_put.status_code}'
+                        if response_put.status_code != 409:
+                            break
+
+                    if tentativa < tentativas - 1:
+                        time.sleep(espera_backoff(tentativa + 1))
+
+                return {'sucesso': False, 'erro': erro, 'mlb': mlb_id, 'modo_anterior': modo_anterior}
+
+            if pendentes:
+                with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(pendentes)))) as executor:
+                    futures = {executor.submit(_migrar, mlb_id): mlb_id for mlb_id in pendentes}
+                    for concluidos, future in enumerate(as_completed(futures), 1):
+                        mlb_id = futures[future]
+                        try:
+                            resultados[mlb_id] = future.result()
+                        except Exception as e:
+                            resultados[mlb_id] = {'sucesso': False, 'erro': str(e), 'mlb': mlb_id}
+
+                        if resultados[mlb_id].get('sucesso'):
+                            print(f"   ✅ {mlb_id} migrado")
+                        else:
+                            print(f"   ❌ {mlb_id}: {resultados[mlb_id].get('erro', 'Erro desconhecido')}")
+                        _prog(f"Migrando {concluidos} de {len(pendentes)}",
+                              5 + round(concluidos / len(pendentes) * 85))
+
+            # 4. Confirmação em lote do modo final
+            migrados = [m for m in pendentes if resultados[m].get('sucesso')]
+            if confirmar and migrados:
+                _prog(f'Confirmando {len(migrados)} migrações...', 92)
+                time.sleep(2)  # o ML leva alguns instantes para refletir o novo modo
+                confirmados, _ = self._ler_itens_em_lote(migrados, concorrencia=concorrencia, atributos='id,shipping')
+                for mlb_id, item in confirmados.items():
+                    if mlb_id in resultados:
+                        resultados[mlb_id]['modo_atual'] = (item.get('shipping') or {}).get('mode')
+
+            lista = [resultados[m] for m in mlbs]
+            ignorados = sum(1 for r in lista if r.get('ignorado'))
+            sucessos  = sum(1 for r in lista if r.get('sucesso') and not r.get('ignorado'))
+            falhas    = len(lista) - sucessos - ignorados
             
             # Resumo final
             print("\n" + "=" * 60)
             print("📊 RESUMO DA MIGRAÇÃO:")
-            print(f"   Total processados: {len(lista_mlbs)}")
+            print(f"   Total processados: {len(mlbs)}")
             print(f"   ✅ Migrados com sucesso: {sucessos}")
             print(f"   ⏭️  Já estavam em ME2: {ignorados}")
             print(f"   ❌ Falhas: {falhas}")
             
             return {
                 'sucesso': sucessos > 0 or ignorados > 0,
-                'resultados': resultados,
-                'total': len(lista_mlbs),
+                'resultados': lista,
+                'total': len(mlbs),
                 'sucessos': sucessos,
                 'ignorados': ignorados,
                 'falhas': falhas
@@ -2110,10 +2820,188 @@ class MercadoLivreAPISecure:
         except Exception as e:
             print(f"❌ Erro na migração em massa: {str(e)}")
             return {'sucesso': False, 'erro': str(e)}
-        
+
+    def excluir_multiplos_definitivo(self, lista_mlbs, concorrencia=None, tentativas=None,
+                                     progresso_callback=None, cancelar=None):
+        """
+        Exclusão definitiva em massa, aplicando cada etapa a grupos de anúncios.
+
+        1. Lê status/sub_status de todos via multi-get (20 por requisição);
+        2. Agrupa pelo estado atual: 404 ou já deletado não geram requisição,
+           under_review vai direto para a exclusão, active pausa antes;
+        3. Executa cada etapa (pausar → fechar → deleted: true) em paralelo
+           sobre o grupo inteiro; quem conclui uma etapa segue para a próxima.
+           Anúncio pausado que recusa o fechamento tenta de novo com
+           {"status": "closed", "deleted": false}, como na exclusão individual.
+
+        Returns:
+            dict com 'resultados' por MLB (etapa em que parou e erro, se houver)
+        """
+        concorrencia = concorrencia or Config.ML_EXCLUSAO_CONCORRENCIA
+        tentativas   = tentativas or Config.ML_EXCLUSAO_TENTATIVAS
+
+        def _prog(msg, pct):
+            if progresso_callback:
+                try:
+                    progresso_callback(msg, pct)
+                except Exception:
+                    pass
+
+        def _put(mlb_id, payload):
+            """PUT com retentativa em conflito (409) ou falha de rede. Retorna (ok, status_code, erro)."""
+            erro, status_code = None, None
+            for tentativa in range(tentativas):
+                try:
+                    resp = self._request(
+                        'PUT',
+                        f"/items/{mlb_id}",
+                        headers=self._get_headers(),
+                        json=payload,
+                        timeout=30
+                    )
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                    erro = str(e)
+                else:
+                    status_code = resp.status_code
+                    if resp.status_code == 200:
+                        return True, 200, None
+                    erro = self._extrair_mensagem_erro(resp)
+                    if resp.status_code != 409:
+                        break
+                if tentativa < tentativas - 1:
+                    time.sleep(espera_backoff(tentativa + 1))
+            return False, status_code, erro
+
+        def _pausar(mlb_id):
+            return _put(mlb_id, {"status": "paused"})
+
+        def _fechar(mlb_id):
+            ok, status_code, erro = _put(mlb_id, {"status": "closed"})
+            if not ok and erro and 'already closed' in erro.lower():
+                return True, status_code, None
+            pausado = estados.get(mlb_id, (None,))[0] == 'paused' or 'pausar' in resultados[mlb_id]['etapas']
+            if not ok and pausado:
+                print(f"   🔄 {mlb_id}: tentando fechar com abordagem alternativa (pausado)")
+                ok, status_code, erro = _put(mlb_id, {"status": "closed", "deleted": False})
+            return ok, status_code, erro
+
+        def _excluir(mlb_id):
+            ok, status_code, erro = _put(mlb_id, {"deleted": True})
+            if not ok and status_code == 400:
+                ok, status_code, erro = _put(mlb_id, {"deleted": True, "status": "closed"})
+            return ok, status_code, erro
+
+        def _executar_etapa(nome, func, grupo, pct_inicio, pct_fim):
+            """Aplica `func` ao grupo em paralelo; devolve os MLBs que concluíram a etapa"""
+            concluidos_ok = []
+            if not grupo:
+                return concluidos_ok
+            print(f"📋 Etapa '{nome}': {len(grupo)} anúncios")
+            with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(grupo)))) as executor:
+                futures = {}
+                for mlb_id in grupo:
+                    if cancelar and cancelar.is_set():
+                        resultados[mlb_id].update({'sucesso': False, 'erro': 'Cancelado', 'etapa': nome})
+                        continue
+                    futures[executor.submit(func, mlb_id)] = mlb_id
+
+                for concluidos, future in enumerate(as_completed(futures), 1):
+                    mlb_id = futures[future]
+                    try:
+                        ok, status_code, erro = future.result()
+                    except Exception as e:
+                        ok, status_code, erro = False, None, str(e)
+
+                    if ok:
+                        resultados[mlb_id]['etapas'].append(nome)
+                        concluidos_ok.append(mlb_id)
+                    else:
+                        resultados[mlb_id].update({
+                            'sucesso': False,
+                            'erro': f'Erro ao {nome} anúncio: {erro}',
+                            'etapa': nome,
+                            'status_code': status_code
+                        })
+                        print(f"   ❌ {mlb_id} ({nome}): {erro}")
+                    _prog(f"{nome.capitalize()}: {concluidos} de {len(futures)}",
+                          pct_inicio + round(concluidos / len(futures) * (pct_fim - pct_inicio)))
+            return concluidos_ok
+
+        try:
+            mlbs = list(dict.fromkeys(m.strip().upper() for m in lista_mlbs if m))
+            resultados = {}
+
+            print(f"\n🗑️  INICIANDO EXCLUSÃO DEFINITIVA EM MASSA")
+            print(f"Total de MLBs: {len(mlbs)} ({concorrencia} em paralelo)")
+            print("=" * 60)
+
+            # 1. Estado atual de todos os anúncios
+            _prog(f'Lendo status de {len(mlbs)} anúncios...', 2)
+            itens, inexistentes = self._ler_itens_em_lote(mlbs, concorrencia=concorrencia,
+                                                          atributos='id,status,sub_status')
+            estados = {mlb_id: ('inexistente', []) for mlb_id in inexistentes}
+            for mlb_id, item in itens.items():
+                estados[mlb_id] = (item.get('status', 'unknown'), item.get('sub_status') or [])
+
+            # 2. Agrupamento por estado
+            pausar, fechar, excluir = [], [], []
+            for mlb_id in mlbs:
+                status, sub_status = estados.get(mlb_id, (None, []))
+                resultados[mlb_id] = {'mlb': mlb_id, 'sucesso': True, 'status': status, 'etapas': []}
+
+                if status is None:
+                    resultados[mlb_id].update({'sucesso': False, 'erro': ERRO_LEITURA_ITEM})
+                elif status == 'inexistente':
+                    resultados[mlb_id].update({'mensagem': f'MLB {mlb_id} já não existe no sistema', 'ignorado': True})
+                elif 'deleted' in sub_status:
+                    resultados[mlb_id].update({'mensagem': f'MLB {mlb_id} já estava excluído', 'ignorado': True})
+                elif status == 'active':
+                    pausar.append(mlb_id)
+                elif status in ('closed', 'under_review'):
+                    excluir.append(mlb_id)
+                else:
+                    fechar.append(mlb_id)
+
+            print(f"⏸️  {len(pausar)} a pausar | 🔒 {len(fechar)} a fechar | 🗑️  {len(excluir)} a excluir direto")
+
+            # 3. Etapas em grupo; uma única espera entre etapas no lugar das pausas por item
+            fechar += _executar_etapa('pausar', _pausar, pausar, 5, 30)
+            if fechar and pausar:
+                time.sleep(0.5)
+            excluir += _executar_etapa('fechar', _fechar, fechar, 30, 60)
+            if excluir and fechar:
+                time.sleep(1)
+            for mlb_id in _executar_etapa('excluir', _excluir, excluir, 60, 98):
+                resultados[mlb_id]['mensagem'] = f'MLB {mlb_id} excluído permanentemente do Mercado Livre.'
+
+            lista = [resultados[m] for m in mlbs]
+            ignorados = sum(1 for r in lista if r.get('ignorado'))
+            sucessos  = sum(1 for r in lista if r.get('sucesso') and not r.get('ignorado'))
+            falhas    = len(lista) - sucessos - ignorados
+
+            print("\n" + "=" * 60)
+            print("📊 RESUMO DA EXCLUSÃO:")
+            print(f"   Total processados: {len(mlbs)}")
+            print(f"   ✅ Excluídos: {sucessos}")
+            print(f"   ⏭️  Já inexistentes/excluídos: {ignorados}")
+            print(f"   ❌ Falhas: {falhas}")
+
+            return {
+                'sucesso': sucessos > 0 or ignorados > 0,
+                'resultados': lista,
+                'total': len(mlbs),
+                'sucessos': sucessos,
+                'ignorados': ignorados,
+                'falhas': falhas
+            }
+
+        except Exception as e:
+            print(f"❌ Erro na exclusão em massa: {str(e)}")
+            return {'sucesso': False, 'erro': str(e)}
+
     def _get_headers(self):
         """Retorna headers com token atualizado"""
-        token = ml_token_manager.get_valid_token()
+        token = ml_token_manager.get_valid_token(self.account_id)
         return {
             'Authorization': f'Bearer {token}',
             'Content-Type': 'application/json'
@@ -2143,7 +3031,8 @@ class MercadoLivreAPISecure:
             # receber atributos marcados como N/A (value_id="-1") que o ML
             # omite por padrão na resposta normal do item.
             url_item = f"{self.base_url}/items/{mlb}"
-            response_item = requests.get(
+            response_item = self._request(
+                'GET',
                 url_item,
                 headers=headers,
                 params={"include_internal_attributes": "true"},
@@ -2160,17 +3049,15 @@ class MercadoLivreAPISecure:
             item = response_item.json()
             category_id = item.get('category_id')
 
-            url_cat = f"{self.base_url}/categories/{category_id}/attributes"
-            resp_cat = requests.get(url_cat, headers=headers, timeout=15)
+            cat_attrs = self.obter_atributos_categoria(category_id)
 
-            if resp_cat.status_code != 200:
+            if cat_attrs is None:
                 return {
                     'sucesso': False,
-                    'erro': f'Erro categoria atributos: {resp_cat.status_code}',
+                    'erro': f'Erro categoria atributos: schema de {category_id} indisponível',
                     'mlb': mlb
                 }
 
-            cat_attrs = resp_cat.json()
             item_attrs = {a['id']: a for a in item.get('attributes', [])}
 
             atributos = []
@@ -2330,7 +3217,7 @@ class MercadoLivreAPISecure:
             descricao_texto = None
             try:
                 url_desc = f"{self.base_url}/items/{mlb}/description"
-                resp_desc = requests.get(url_desc, headers=headers, timeout=10)
+                resp_desc = self._request('GET', url_desc, headers=headers, timeout=10)
                 if resp_desc.status_code == 200:
                     desc_json = resp_desc.json()
                     descricao_texto = desc_json.get('plain_text') or desc_json.get('text')
@@ -2422,7 +3309,7 @@ class MercadoLivreAPISecure:
 
             # Endpoint correto: /item/{mlb}/performance (sem 's' em item)
             url = f"https://api.mercadolibre.com/item/{mlb}/performance"
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self._request('GET', url, headers=headers, timeout=15)
 
             print(f"📊 Performance endpoint: {response.status_code} para {mlb}")
 
@@ -2431,59 +3318,259 @@ class MercadoLivreAPISecure:
                     print(f"⚠️ Performance endpoint retornou {response.status_code}: {response.text[:200]}")
                 return None
 
-            dados = response.json()
+            qualidade = self._interpretar_performance(response.json())
+            if qualidade:
+                print(f"✅ Qualidade oficial: score={qualidade['pontuacao']} nivel={qualidade['nivel']}")
+            return qualidade
+
+        except Exception as e:
+            print(f"Erro qualidade /performance: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            score        = dados.get('score')         # 0-100
-            level_wording = dados.get('level_wording') # 'Básica', 'Satisfatória', 'Profissional'
-            level         = dados.get('level')         # 'Bad', 'Good', 'Professional'
+    def _interpretar_performance(self, dados):
+        """Converte a resposta de /item/{mlb}/performance no dict de qualidade (None sem score)"""
+        score        = dados.get('score')         # 0-100
+        level_wording = dados.get('level_wording') # 'Básica', 'Satisfatória', 'Profissional'
+        level         = dados.get('level')         # 'Bad', 'Good', 'Professional'
 
-            if score is None:
-                print(f"⚠️ score não encontrado na resposta /performance: {dados}")
-                return None
+        if score is None:
+            print(f"⚠️ score não encontrado na resposta /performance: {dados}")
+            return None
 
-            # Extrai dicas e atributos pendentes dos buckets
-            dicas       = []
-            missing_ids = []
-            buckets     = dados.get('buckets', [])
-            for bucket in buckets:
-                for variable in bucket.get('variables', []):
-                    if variable.get('status') == 'PENDING':
-                        for rule in variable.get('rules', []):
-                            if rule.get('status') == 'PENDING':
-                                wordings = rule.get('wordings', {})
-                                label = wordings.get('label') or wordings.get('title', '')
-                                if label:
-                                    dicas.append(label)
-                        var_key = variable.get('key', '')
-                        if var_key:
-                            missing_ids.append(var_key)
-
-            # Normaliza o nível para pt-BR caso venha em inglês
-            nivel_map = {
-                'Bad':          'Básica',
-                'Medium':       'Satisfatória',
-                'Good':         'Profissional',
-                'Professional': 'Profissional',
-                'Standard':     'Satisfatória',
-                'Basic':        'Básica',
-            }
-            nivel = level_wording or nivel_map.get(level, 'Básica')
+        # Extrai dicas e atributos pendentes dos buckets
+        dicas       = []
+        missing_ids = []
+        pendencias  = {}
+        buckets     = dados.get('buckets', [])
+        for bucket in buckets:
+            nome_bucket = bucket.get('title') or bucket.get('key') or 'Outros'
+            for variable in bucket.get('variables', []):
+                if variable.get('status') == 'PENDING':
+                    for rule in variable.get('rules', []):
+                        if rule.get('status') == 'PENDING':
+                            wordings = rule.get('wordings', {})
+                            label = wordings.get('label') or wordings.get('title', '')
+                            if label:
+                                dicas.append(label)
+                    var_key = variable.get('key', '')
+                    if var_key:
+                        missing_ids.append(var_key)
+                        pendencias.setdefault(nome_bucket, []).append(var_key)
+
+        # Normaliza o nível para pt-BR caso venha em inglês
+        nivel_map = {
+            'Bad':          'Básica',
+            'Medium':       'Satisfatória',
+            'Good':         'Profissional',
+            'Professional': 'Profissional',
+            'Standard':     'Satisfatória',
+            'Basic':        'Básica',
+        }
+        nivel = level_wording or nivel_map.get(level, 'Básica')
+
+        return {
+            'pontuacao':   round(float(score), 1),
+            'nivel':       nivel,
+            'dicas':       dicas[:10],   # limita a 10 dicas
+            'missing_ids': missing_ids,
+            'pendencias':  pendencias,   # {bucket: [variáveis pendentes]}
+            'origem':      'oficial'
+        }
+
+    def _qualidade_com_cache(self, mlb):
+        """Qualidade oficial via cache TTL; (qualidade, veio_do_cache)"""
+        em_cache = cache_qualidade.obter(mlb)
+        if em_cache is not None:
+            return em_cache, True
+
+        response = self._request('GET', f"/item/{mlb}/performance", headers=self._get_headers(), timeout=15)
+        if response.status_code == 200:
+            qualidade = self._interpretar_performance(response.json())
+        elif response.status_code == 404:
+            qualidade = None
+        else:
+            raise Exception(f"HTTP {response.status_code} em /performance")
+
+        # 404 também é guardado (False) para não repetir a consulta dentro do TTL
+        cache_qualidade.guardar(mlb, qualidade or False)
+        return qualidade or False, False
+
+    def gerar_relatorio_qualidade(self, mlbs, concorrencia=6, ordenar_por='pontuacao', decrescente=False,
+                                  progresso_callback=None, cancelar=None):
+        """
+        Relatório de qualidade para muitos anúncios.
+
+        Dados básicos vêm do multi-get (20 por requisição); a qualidade vem de
+        /item/{id}/performance em paralelo, reaproveitando o cache TTL
+        (ML_QUALIDADE_CACHE_TTL).
+
+        Args:
+            mlbs: lista de MLBs
+            concorrencia: consultas de performance simultâneas
+            ordenar_por: campo da linha usado para ordenar (ORDENACOES_QUALIDADE:
+                'pontuacao', 'total_pendencias', 'titulo', 'nivel', 'status')
+            decrescente: ordem decrescente
+
+        Returns:
+            dict com 'linhas' (uma por MLB) e 'resumo' (média, níveis,
+            pendências mais comuns)
+        """
+        if ordenar_por not in ORDENACOES_QUALIDADE:
+            return {'sucesso': False, 'erro': f'ordenar_por inválido: {ordenar_por}',
+                    'opcoes': list(ORDENACOES_QUALIDADE)}
+
+        def _prog(msg, pct):
+            if progresso_callback:
+                try:
+                    progresso_callback(msg, pct)
+                except Exception:
+                    pass
+
+        try:
+            mlbs = list(dict.fromkeys(m.strip().upper() for m in mlbs if m))
+            print(f"\n📊 Relatório de qualidade: {len(mlbs)} anúncios ({concorrencia} em paralelo)")
+            _prog(f'Lendo dados de {len(mlbs)} anúncios...', 2)
+
+            itens, inexistentes = self._ler_itens_em_lote(
+                mlbs, concorrencia=concorrencia,
+                atributos='id,title,status,category_id,permalink,thumbnail'
+            )
+
+            linhas = {}
+            do_cache = 0
+
+            def _linha(mlb):
+                item = itens.get(mlb, {})
+                base = {
+                    'mlb':       mlb,
+                    'titulo':    item.get('title'),
+                    'status':    item.get('status'),
+                    'categoria': item.get('category_id'),
+                    'permalink': item.get('permalink'),
+                    'thumbnail': item.get('thumbnail'),
+                }
+                if not item and mlb in inexistentes:
+                    return {**base, 'pontuacao': None, 'nivel': None, 'origem': 'nao_encontrado',
+                            'pendencias': {}, 'total_pendencias': 0, 'dicas': []}, False
+                if not item:
+                    return {**base, 'pontuacao': None, 'nivel': None, 'origem': 'erro', 'erro': ERRO_LEITURA_ITEM,
+                            'pendencias': {}, 'total_pendencias': 0, 'dicas': []}, False
+                if cancelar and cancelar.is_set():
+                    return {**base, 'pontuacao': None, 'nivel': None, 'origem': 'cancelado',
+                            'pendencias': {}, 'total_pendencias': 0, 'dicas': []}, False
+
+                qualidade, cache_hit = self._qualidade_com_cache(mlb)
+                if not qualidade:
+                    return {**base, 'pontuacao': None, 'nivel': None, 'origem': 'indisponivel',
+                            'pendencias': {}, 'total_pendencias': 0, 'dicas': []}, cache_hit
+                return {
+                    **base,
+                    'pontuacao':        qualidade['pontuacao'],
+                    'nivel':            qualidade['nivel'],
+                    'origem':           qualidade['origem'],
+                    'pendencias':       qualidade.get('pendencias', {}),
+                    'total_pendencias': len(qualidade.get('missing_ids', [])),
+                    'dicas':            qualidade.get('dicas', []),
+                }, cache_hit
+
+            if mlbs:
+                with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(mlbs)))) as executor:
+                    futures = {executor.submit(_linha, mlb): mlb for mlb in mlbs}
+                    for concluidos, future in enumerate(as_completed(futures), 1):
+                        mlb = futures[future]
+                        try:
+                            linhas[mlb], cache_hit = future.result()
+                            do_cache += int(cache_hit)
+                        except Exception as e:
+                            linhas[mlb] = {'mlb': mlb, 'pontuacao': None, 'nivel': None, 'origem': 'erro',
+                                           'erro': str(e), 'pendencias': {}, 'total_pendencias': 0, 'dicas': []}
+                        if concluidos % 20 == 0 or concluidos == len(mlbs):
+                            _prog(f'Consultando qualidade... {concluidos} de {len(mlbs)}',
+                                  5 + round(concluidos / len(mlbs) * 90))
 
-            print(f"✅ Qualidade oficial: score={score} nivel={nivel}")
+            lista = [linhas[m] for m in mlbs]
+
+            # Sem score vai sempre para o fim, independente da direção
+            com_valor = [l for l in lista if l.get(ordenar_por) is not None]
+            sem_valor = [l for l in lista if l.get(ordenar_por) is None]
+            com_valor.sort(key=lambda l: l[ordenar_por], reverse=decrescente)
+            lista = com_valor + sem_valor
+
+            # Resumo da conta
+            pontuados = [l['pontuacao'] for l in lista if l['pontuacao'] is not None]
+            niveis, variaveis, buckets = {}, {}, {}
+            for l in lista:
+                if l['nivel']:
+                    niveis[l['nivel']] = niveis.get(l['nivel'], 0) + 1
+                for bucket, vars_pendentes in l['pendencias'].items():
+                    buckets[bucket] = buckets.get(bucket, 0) + 1
+                    for var in vars_pendentes:
+                        variaveis[var] = variaveis.get(var, 0) + 1
+
+            print(f"✅ Relatório de qualidade pronto ({do_cache} do cache)")
 
             return {
-                'pontuacao':   round(float(score), 1),
-                'nivel':       nivel,
-                'dicas':       dicas[:10],   # limita a 10 dicas
-                'missing_ids': missing_ids,
-                'origem':      'oficial'
+                'sucesso': True,
+                'total': len(lista),
+                'linhas': lista,
+                'resumo': {
+                    'media_pontuacao': round(sum(pontuados) / len(pontuados), 1) if pontuados else None,
+                    'com_pontuacao':   len(pontuados),
+                    'sem_pontuacao':   len(lista) - len(pontuados),
+                    'por_nivel':       niveis,
+                    'pendencias_por_bucket': dict(sorted(buckets.items(), key=lambda kv: -kv[1])),
+                    'variaveis_mais_pendentes': dict(sorted(variaveis.items(), key=lambda kv: -kv[1])[:20]),
+                    'consultas_em_cache': do_cache,
+                },
+                'timestamp': datetime.now().isoformat()
             }
 
         except Exception as e:
-            print(f"Erro qualidade /performance: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+            print(f"❌ Erro no relatório de qualidade: {str(e)}")
+            return {'sucesso': False, 'erro': str(e)}
+
+    def resumo_conta(self):
+        """Dados básicos da conta do token: usuário, reputação e anúncios por status"""
+        headers = self._get_headers()
+        resp_me = self._request('GET', '/users/me', headers=headers, timeout=10)
+        if resp_me.status_code != 200:
+            return {'sucesso': False, 'autenticada': False, 'erro': f'Token inválido (status: {resp_me.status_code})'}
+
+        usuario = resp_me.json()
+        anuncios = {}
+        for st in ('active', 'paused', 'closed'):
+            resp = self._request(
+                'GET', f"/users/{usuario['id']}/items/search",
+                headers=headers, params={'status': st, 'limit': 0}, timeout=15
+            )
+            if resp.status_code == 200:
+                anuncios[st] = resp.json().get('paging', {}).get('total', 0)
+
+        reputacao = usuario.get('seller_reputation') or {}
+        return {
+            'sucesso': True,
+            'autenticada': True,
+            'user_id': usuario.get('id'),
+            'nickname': usuario.get('nickname'),
+            'nivel_reputacao': reputacao.get('level_id'),
+            'power_seller': reputacao.get('power_seller_status'),
+            'vendas_concluidas': (reputacao.get('transactions') or {}).get('completed', 0),
+            'anuncios': anuncios,
+        }
+
+    def listar_ids_conta(self, status='active', cancelar=None):
+        """Todos os MLBs da conta no(s) status informado(s) via scan (sem detalhar)"""
+        headers = self._get_headers()
+        resp_me = self._request('GET', '/users/me', headers=headers, timeout=10)
+        if resp_me.status_code != 200:
+            raise Exception('Erro ao obter dados do usuário')
+        status_list = ['active', 'paused', 'closed'] if status == 'all' else [status]
+        ids = []
+        for _, ids_pagina, _ in self._iterar_paginas_scan(resp_me.json()['id'], status_list, headers, cancelar):
+            ids.extend(ids_pagina)
+        return list(dict.fromkeys(ids))
 
 
     def _nivel_por_score(self, score):
@@ -2536,7 +3623,7 @@ class MercadoLivreAPISecure:
             headers = self._get_headers()
             url = f"{self.base_url}/items/{mlb}"
     
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self._request('GET', url, headers=headers, timeout=15)
     
             if response.status_code != 200:
                 return {
@@ -2549,43 +3636,21 @@ class MercadoLivreAPISecure:
             atributos_existentes = dados.get('attributes', [])
             category_id = dados.get('category_id')
     
-            url_cat = f"{self.base_url}/categories/{category_id}/attributes"
-            resp_cat = requests.get(url_cat, headers=headers, timeout=15)
+            cat_attrs = self.obter_atributos_categoria(category_id)
     
-            if resp_cat.status_code != 200:
+            if cat_attrs is None:
                 return {
                     'sucesso': False,
-                    'erro': f'Erro categoria: {resp_cat.status_code}',
+                    'erro': f'Erro categoria: schema de {category_id} indisponível',
                     'mlb': mlb
                 }
     
-            cat_attrs = resp_cat.json()
             cat_map = {a['id']: a for a in cat_attrs}
-    
-            for attr_id, attr_data in atributos_dict.items():
-    
-                cat_attr = cat_map.get(attr_id, {})
-    
-                # ─── AQUI está a mudança: usa o novo método no lugar do bloco antigo ───
-                novo = self._montar_payload_atributo(attr_id, attr_data, cat_attr)
-    
-                if novo is None:        # nada a enviar para esse atributo
-                    continue
-                # ─────────────────────────────────────────────────────────────────────
-    
-                encontrado = False
-                for i, a in enumerate(atributos_existentes):
-                    if a.get('id') == attr_id:
-                        atributos_existentes[i] = novo
-                        encontrado = True
-                        break
-    
-                if not encontrado:
-                    atributos_existentes.append(novo)
+            atributos_existentes = self._aplicar_atributos(atributos_existentes, atributos_dict, cat_map)
     
             payload = {'attributes': atributos_existentes}
     
-            response_update = requests.put(url, headers=headers, json=payload, timeout=30)
+            response_update = self._request('PUT', url, headers=headers, json=payload, timeout=30)
     
             if response_update.status_code == 200:
                 return {
@@ -2608,9 +3673,145 @@ class MercadoLivreAPISecure:
             }
     
     
-    # ============================================================
-    # Adicione este método auxiliar logo abaixo do anterior
-    # ============================================================
+    def _aplicar_atributos(self, atributos_existentes, atributos_dict, cat_map):
+        """Mescla as alterações pedidas na lista de atributos atual do anúncio"""
+        for attr_id, attr_data in atributos_dict.items():
+
+            cat_attr = cat_map.get(attr_id, {})
+            novo = self._montar_payload_atributo(attr_id, attr_data, cat_attr)
+
+            if novo is None:        # nada a enviar para esse atributo
+                continue
+
+            for i, a in enumerate(atributos_existentes):
+                if a.get('id') == attr_id:
+                    atributos_existentes[i] = novo
+                    break
+            else:
+                atributos_existentes.append(novo)
+
+        return atributos_existentes
+
+    def alterar_atributos_em_massa(self, edicoes, concorrencia=4, progresso_callback=None, cancelar=None):
+        """
+        Altera atributos de vários anúncios de uma vez.
+
+        1. Lê os anúncios via multi-get (só id, category_id e attributes);
+        2. Agrupa por categoria e carrega cada schema uma única vez;
+        3. Envia os PUTs em paralelo (limitados por `concorrencia` e pelo
+           limitador de taxa compartilhado).
+
+        Args:
+            edicoes: lista de (mlb, atributos_dict) ou de {'mlb': ..., 'atributos': {...}}
+                     (atributos_dict no mesmo formato de alterar_multiplos_atributos)
+            concorrencia: PUTs simultâneos
+            progresso_callback: callback(msg, pct)
+            cancelar: threading.Event que interrompe antes dos PUTs restantes
+
+        Returns:
+            dict com sucesso, totais e 'resultados' na ordem de entrada
+        """
+        def _prog(msg, pct):
+            if progresso_callback:
+                try:
+                    progresso_callback(msg, pct)
+                except Exception:
+                    pass
+
+        try:
+            # Normaliza a entrada e junta edições repetidas do mesmo MLB
+            pedidos = {}
+            for edicao in edicoes:
+                if isinstance(edicao, dict):
+                    mlb, atributos = edicao.get('mlb'), edicao.get('atributos') or {}
+                else:
+                    mlb, atributos = edicao
+                if not mlb:
+                    continue
+                pedidos.setdefault(mlb.strip().upper(), {}).update(atributos)
+
+            mlbs = list(pedidos)
+            resultados = {}
+            print(f"\n🧩 Alteração de atributos em massa: {len(mlbs)} anúncios ({concorrencia} em paralelo)")
+            _prog(f'Lendo {len(mlbs)} anúncios...', 5)
+
+            # 1. Leitura em lote
+            itens, inexistentes = self._ler_itens_em_lote(mlbs, concorrencia=concorrencia,
+                                                          atributos='id,category_id,attributes')
+            for mlb in mlbs:
+                if mlb not in itens:
+                    erro = 'Item não encontrado' if mlb in inexistentes else ERRO_LEITURA_ITEM
+                    resultados[mlb] = {'sucesso': False, 'erro': erro, 'mlb': mlb}
+
+            # 2. Um schema por categoria
+            categorias = {}
+            for item in itens.values():
+                categorias.setdefault(item.get('category_id'), []).append(item['id'])
+            _prog(f'{len(itens)} anúncios em {len(categorias)} categorias. Carregando schemas...', 15)
+
+            schemas = {}
+            for category_id, mlbs_categoria in categorias.items():
+                cat_attrs = self.obter_atributos_categoria(category_id)
+                if cat_attrs is None:
+                    for mlb in mlbs_categoria:
+                        resultados[mlb] = {
+                            'sucesso': False,
+                            'erro': f'Erro categoria: schema de {category_id} indisponível',
+                            'mlb': mlb
+                        }
+                    continue
+                schemas[category_id] = {a['id']: a for a in cat_attrs}
+
+            # 3. PUTs em paralelo
+            def _enviar(mlb):
+                if cancelar and cancelar.is_set():
+                    return {'sucesso': False, 'erro': 'Cancelado', 'mlb': mlb}
+                item = itens[mlb]
+                atributos = self._aplicar_atributos(
+                    list(item.get('attributes', [])), pedidos[mlb], schemas[item.get('category_id')]
+                )
+                resp = self._request(
+                    'PUT',
+                    f"/items/{mlb}",
+                    headers=self._get_headers(),
+                    json={'attributes': atributos},
+                    timeout=30
+                )
+                if resp.status_code == 200:
+                    return {'sucesso': True, 'mlb': mlb, 'mensagem': 'Atributos atualizados com sucesso'}
+                return {'sucesso': False, 'erro': resp.text, 'mlb': mlb, 'status_code': resp.status_code}
+
+            envios = [mlb for mlb in mlbs if mlb in itens and itens[mlb].get('category_id') in schemas]
+            if envios:
+                with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(envios)))) as executor:
+                    futures = {executor.submit(_enviar, mlb): mlb for mlb in envios}
+                    for concluidos, future in enumerate(as_completed(futures), 1):
+                        mlb = futures[future]
+                        try:
+                            resultados[mlb] = future.result()
+                        except Exception as e:
+                            resultados[mlb] = {'sucesso': False, 'erro': str(e), 'mlb': mlb}
+                        _prog(f'Atualizando atributos... {concluidos} de {len(envios)}',
+                              15 + round(concluidos / len(envios) * 80))
+
+            lista = [resultados[mlb] for mlb in mlbs]
+            sucessos = sum(1 for r in lista if r.get('sucesso'))
+            print(f"✅ Atributos: {sucessos} de {len(lista)} anúncios atualizados")
+
+            return {
+                'sucesso': sucessos > 0,
+                'total': len(lista),
+                'sucessos': sucessos,
+                'erros': len(lista) - sucessos,
+                'categorias': len(schemas),
+                'resultados': lista,
+                'timestamp': datetime.now().isoformat()
+            }
+
+        except Exception as e:
+            print(f"❌ Erro na alteração de atributos em massa: {str(e)}")
+            return {'sucesso': False, 'erro': str(e)}
+
     
     def _montar_payload_atributo(self, attr_id, attr_data, cat_attr):
         """
@@ -2686,12 +3887,9 @@ class MercadoLivreAPISecure:
 
     def _buscar_nome_atributo(self, atributo_id, category_id):
         try:
-            headers = self._get_headers()
-            url = f"{self.base_url}/categories/{category_id}/attributes"
-            response = requests.get(url, headers=headers, timeout=15)
+            atributos = self.obter_atributos_categoria(category_id)
 
-            if response.status_code == 200:
-                atributos = response.json()
+            if atributos is not None:
                 for attr in atributos:
                     if attr.get('id') == atributo_id:
                         return attr.get('name')
@@ -2813,5 +4011,203 @@ class MercadoLivreAPISecure:
         return None, None
      
    
+class _PipelineDetalhamento:
+    """
+    Fila de detalhamento alimentada aos poucos (produtor/consumidor).
+
+    O produtor chama enfileirar() a cada página de IDs; cada 20 IDs novos
+    viram um lote enviado ao executor na hora. coletar() processa, na
+    thread do produtor, os lotes que já terminaram — assim os callbacks
+    e a montagem dos resultados nunca rodam em paralelo.
+    resultado() devolve os itens na ordem em que os IDs foram enfileirados;
+    com item_callback os itens são entregues um a um e não acumulados.
+    """
+
+    def __init__(self, api, executor, data_criacao_de=None, data_criacao_ate=None,
+                 limite_total=None, progresso_callback=None, item_callback=None, checkpoint=None,
+                 cancelar=None):
+        self.api = api
+        self.executor = executor
+        self.dt_de  = datetime.strptime(data_criacao_de,  '%Y-%m-%d').date() if data_criacao_de  else None
+        self.dt_ate = datetime.strptime(data_criacao_ate, '%Y-%m-%d').date() if data_criacao_ate else None
+        self.limite_total = limite_total
+        self.progresso_callback = progresso_callback
+        self.item_callback = item_callback
+        self.checkpoint = checkpoint
+        self.cancelar = cancelar
+
+        self.total_estimado = 0
+        self._vistos = set()
+        self._pendentes = []
+        self._futures = {}
+        self._por_lote = {}
+        self._ids_lote = {}
+        self._lotes_enviados = 0
+        self._lotes_concluidos = 0
+        self.lotes_falhos = 0
+        self.contagem = {'encontrados': 0, 'nao_encontrados': 0}
+
+    @property
+    def total_ids(self):
+        return len(self._vistos)
+
+    @property
+    def limite_atingido(self):
+        return bool(self.limite_total) and self.total_ids >= self.limite_total
+
+    @property
+    def cancelado(self):
+        return bool(self.cancelar and self.cancelar.is_set())
+
+    def enfileirar(self, ids):
+        """Adiciona IDs (sem repetir) e dispara cada lote completo de 20"""
+        for mlb_id in ids:
+            if self.limite_atingido:
+                break
+            if mlb_id in self._vistos:
+                continue
+            self._vistos.add(mlb_id)
+            self._pendentes.append(mlb_id)
+            if len(self._pendentes) >= self.api.LOTE_MULTIGET:
+                self._enviar_lote()
+
+    def retomar(self, lotes_salvos):
+        """Reaproveita lotes já detalhados de um checkpoint (sem requisições)"""
+        for lote in lotes_salvos:
+            itens = lote.get('itens', [])
+            self._vistos.update(lote.get('ids', []))
+            for item in itens:
+                self.contagem['nao_encontrados' if item.get('status') == 'error' else 'encontrados'] += 1
+            if self.item_callback:
+                for item in itens:
+                    self.item_callback(item)
+                itens = []
+            self._por_lote[self._lotes_enviados] = itens
+            self._lotes_enviados += 1
+            self._lotes_concluidos += 1
+
+    def fechar(self):
+        """Envia o último lote incompleto"""
+        if self._pendentes:
+            self._enviar_lote()
+
+    def descartar_pendentes(self):
+        """Cancela os lotes que ainda não começaram (varredura interrompida)"""
+        self._pendentes = []
+        for future in list(self._futures):
+            if future.cancel():
+                self._ids_lote.pop(self._futures.pop(future), None)
+
+    def _enviar_lote(self):
+        lote, self._pendentes = self._pendentes, []
+        if self.cancelado:
+            return  # os IDs seguem no checkpoint e são detalhados na retomada
+        future = self.executor.submit(self.api._buscar_lote_multiget, lote)
+        self._futures[future] = self._lotes_enviados
+        self._ids_lote[self._lotes_enviados] = lote
+        self._lotes_enviados += 1
+
+    def coletar(self, bloquear=False):
+        """
+        Processa os lotes já concluídos; com bloquear=True espera todos. Com
+        o cancelamento setado, os lotes que ainda não começaram são descartados
+        entre um lote e outro e só os que já estão em voo são esperados.
+        """
+        while True:
+            if self.cancelado:
+                self.descartar_pendentes()
+            for future in [f for f in list(self._futures) if f.done()]:
+                self._processar_lote(future)
+            if not bloquear or not self._futures:
+                return
+            wait(list(self._futures), timeout=1.0, return_when=FIRST_COMPLETED)
+
+    def _processar_lote(self, future):
+        idx = self._futures.pop(future)
+        try:
+            wrappers = future.result()
+        except Exception as e:
+            print(f"  ❌ Lote {idx + 1} falhou: {str(e)}")
+            wrappers = None
+
+        ids_lote = self._ids_lote.pop(idx, [])
+        if wrappers is None:
+            print(f"  ❌ Lote {idx + 1} falhou — pulando")
+            self._por_lote[idx] = []
+            self.lotes_falhos += 1
+        else:
+            itens = self.api._processar_wrappers_lote(
+                wrappers, self.dt_de, self.dt_ate, self.contagem
+            )
+            if self.checkpoint:
+                self.checkpoint.registrar_lote(ids_lote, itens)
+            if self.item_callback:
+                for item in itens:
+                    self.item_callback(item)
+                itens = []
+            self._por_lote[idx] = itens
+        self._lotes_concluidos += 1
+        self._informar_progresso()
+
+    def _informar_progresso(self):
+        total = max(self.total_estimado, self.total_ids, 1)
+        processados = min(self._lotes_concluidos * self.api.LOTE_MULTIGET, total)
+
+        if self._lotes_concluidos % 10 == 1:
+            print(f"  [{round(processados / total * 100):3d}%] {self._lotes_concluidos} lotes — "
+                  f"{self.contagem['encontrados']} detalhados...")
+
+        if self.progresso_callback:
+            # Progresso real enviado ao frontend: de 10% a 95%
+            pct = 10 + round((processados / total) * 85)
+            try:
+                self.progresso_callback(
+                    f"Detalhando anúncios... {self.contagem['encontrados']} de ~{total} "
+                    f"({self._lotes_concluidos}/{self._lotes_enviados} lotes)", pct
+                )
+            except Exception:
+                pass
+
+    def resultado(self):
+        resultados = [r for idx in sorted(self._por_lote) for r in self._por_lote[idx]]
+
+        print(f"\n✅ {self.contagem['encontrados']} detalhados | {self.contagem['nao_encontrados']} com erro")
+
+        return {
+            'sucesso': True,
+            'total_ids_coletados':  self.total_ids,
+            'total_encontrado':     self.contagem['encontrados'],
+            'total_nao_encontrado': self.contagem['nao_encontrados'],
+            'resultados':           resultados,
+            'timestamp': datetime.now().isoformat()
+        }
+
+
 # Instância global
-ml_api_secure = MercadoLivreAPISecure()
\ No newline at end of file
+ml_api_secure = MercadoLivreAPISecure()
+
+_clientes_conta = {}
+_clientes_lock = threading.Lock()
+
+
+def cliente_ml(account_id=None):
+    """
+    Cliente preso a uma conta do token manager, com limitador de taxa
+    próprio (cada conta tem sua cota no ML) e a mesma sessão HTTP da
+    instância global. Sem account_id devolve ml_api_secure (conta atual).
+    """
+    if not account_id:
+        return ml_api_secure
+    with _clientes_lock:
+        cliente = _clientes_conta.get(account_id)
+        if cliente is None:
+            cliente = MercadoLivreAPISecure(
+                account_id=account_id,
+                session=ml_api_secure.session,
+                limitador=LimitadorTaxaAdaptativo(
+                    rps=Config.ML_RATE_LIMIT_RPS,
+                    rps_minimo=Config.ML_RATE_LIMIT_RPS_MIN
+                )
+            )
+            _clientes_conta[account_id] = cliente
+        return cliente
\ No newline at end of file
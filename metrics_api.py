@@ -1,56 +1,55 @@
 """
 API de Métricas para Dashboard - Versão SEM flask_caching
-Usa cache simples em memória
+As fontes (ML, AnyMarket, Intelipost, sistema) são pré-carregadas por um
+agendador em segundo plano e guardadas no cache compartilhado entre
+workers (utils/cache_compartilhado); as rotas só leem do cache.
+
+O agendador sobe na primeira requisição atendida por cada processo
+(METRICS_PREFETCH_ATIVO=true), então funciona com ou sem gunicorn
+--preload: cada worker tem a sua thread e o aluguel no cache garante uma
+única atualização por fonte e intervalo entre eles. Para desligar a
+pré-carga (as rotas voltam a calcular na falta do cache), use
+METRICS_PREFETCH_ATIVO=false.
 """
 from flask import Blueprint, jsonify, current_app
+from flask_login import login_required, current_user
 from datetime import datetime, timedelta
 import requests
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
 import logging
-from functools import wraps
+import os
+import threading
 import time
 import traceback
+from config import Config
+from utils.cache_compartilhado import criar_backend
 
 # Configuração
 metrics_bp = Blueprint('metrics_api_bp', __name__)
 logger = logging.getLogger(__name__)
 
-# Cache simples em memória (dicionário)
-_cache = {}
-_cache_timestamps = {}
-
-def cache_metrics(timeout=300):
-    """Decorator para cache de métricas (implementação manual sem flask_caching)"""
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            # Gera uma chave única para o cache
-            cache_key = f"metrics_{f.__name__}_{str(args)}_{str(kwargs)}"
-            
-            # Verifica se tem cache válido
-            if cache_key in _cache and cache_key in _cache_timestamps:
-                age = time.time() - _cache_timestamps[cache_key]
-                if age < timeout:
-                    print(f"✅ Usando cache para {f.__name__} (idade: {age:.1f}s)")
-                    return jsonify(_cache[cache_key])
-            
-            print(f"🔄 Executando {f.__name__} (sem cache)")
-            
-            # Executa a função original
-            result = f(*args, **kwargs)
-            
-            # Se for uma resposta Flask, extrai os dados para cache
-            if hasattr(result, 'json'):
-                # Pega os dados do json
-                data = result.json
-                # Guarda no cache
-                _cache[cache_key] = data
-                _cache_timestamps[cache_key] = time.time()
-                return result
-            
-            return result
-        return decorated_function
-    return decorator
+# Cache compartilhado entre os workers (SQLite; CACHE_BACKEND=memoria volta ao cache por processo),
+# limitado por quantidade e por bytes com remoção LRU
+_cache = criar_backend(
+    'metricas',
+    max_entradas=Config.METRICS_CACHE_MAX_ENTRADAS,
+    max_bytes=Config.METRICS_CACHE_MAX_BYTES
+)
+
+# Stale-while-revalidate: as fontes ficam no cache por intervalo + MAX_STALE;
+# passado o intervalo, o valor antigo ainda é servido enquanto UMA atualização
+# roda em segundo plano.
+MAX_STALE = 900
+LOCK_TIMEOUT = 60     # validade do lock de recálculo (worker que morre no meio libera sozinho)
+ESPERA_MISS = 20      # segundos que um miss espera o recálculo de outro worker
+
+_locks_locais = {}
+_locks_locais_lock = threading.Lock()
+
+
+def _lock_local(cache_key):
+    with _locks_locais_lock:
+        return _locks_locais.setdefault(cache_key, threading.Lock())
 
 # =============================================
 # FUNÇÕES DE MÉTRICAS DO MERCADO LIVRE
@@ -86,47 +85,21 @@ def get_ml_metrics():
         headers = {'Authorization': f'Bearer {token}'}
         base_url = "https://api.mercadolibre.com"
         
-        # Data de 7 dias atrás
-        data_inicio = (datetime.now() - timedelta(days=7)).isoformat()
-        print(f"📅 Data início: {data_inicio}")
-        
-        # 1. Buscar vendas dos últimos 7 dias
-        print("📊 Buscando vendas ML...")
-        response = requests.get(
-            f"{base_url}/orders/search",
-            headers=headers,
-            params={
-                'seller': 'me',
-                'order.date_created.from': data_inicio,
-                'limit': 100
-            },
-            timeout=15
-        )
-        
-        print(f"📡 ML Orders Status: {response.status_code}")
-        
-        if response.status_code != 200:
-            print(f"❌ ML: Erro {response.status_code} - {response.text[:200]}")
+        # 1. Vendas dos últimos 7 dias: busca só os pedidos novos e soma pelo agregado diário
+        from utils.ml_vendas import atualizar_vendas, resumo_vendas
+        print("📊 Atualizando vendas ML...")
+        atualizacao = atualizar_vendas()
+        if not atualizacao.get('sucesso'):
+            print(f"❌ ML: {atualizacao.get('erro')}")
             return {
                 'status': 'error',
-                'error': f'Erro API: {response.status_code}',
+                'error': atualizacao.get('erro'),
                 'vendas_7d': 0,
                 'pedidos_7d': 0
             }
         
-        pedidos = response.json().get('results', [])
-        print(f"✅ ML: {len(pedidos)} pedidos encontrados")
-        
-        # Calcular métricas
-        total_vendas = 0
-        for p in pedidos:
-            try:
-                total_vendas += float(p.get('total_amount', p.get('total', 0)))
-            except:
-                pass
-                
-        total_pedidos = len(pedidos)
-        ticket_medio = total_vendas / total_pedidos if total_pedidos > 0 else 0
+        vendas = resumo_vendas(atualizacao['seller_id'], dias=7)
+        print(f"✅ ML: {vendas['pedidos']} pedidos em 7 dias ({atualizacao['novos_pedidos']} novos)")
         
         # 2. Buscar anúncios ativos
         print("📦 Buscando anúncios ativos...")
@@ -144,9 +117,11 @@ def get_ml_metrics():
         
         resultado = {
             'status': 'online',
-            'vendas_7d': round(total_vendas, 2),
-            'pedidos_7d': total_pedidos,
-            'ticket_medio': round(ticket_medio, 2),
+            'vendas_7d': vendas['vendas'],
+            'pedidos_7d': vendas['pedidos'],
+            'ticket_medio': vendas['ticket_medio'],
+            'vendas_por_dia': vendas['por_dia'],
+            'vendas_completas': atualizacao.get('completo', True),
             'anuncios_ativos': anuncios_ativos,
             'ultima_atualizacao': datetime.now().isoformat()
         }
@@ -442,44 +417,264 @@ def get_system_metrics():
             'timestamp': datetime.now().isoformat()
         }
 
+# =============================================
+# PRÉ-CARGA AGENDADA DAS FONTES
+# =============================================
+
+# Cada fonte é atualizada em segundo plano no seu próprio intervalo e gravada
+# no cache compartilhado; o dashboard só lê o cache. Entre vários workers, um
+# "aluguel" no cache (add atômico) garante uma atualização por fonte/intervalo.
+FONTES = {
+    'mercadolivre': (get_ml_metrics, Config.METRICS_INTERVALO_ML),
+    'anymarket': (get_anymarket_metrics, Config.METRICS_INTERVALO_ANYMARKET),
+    'intelipost': (get_intelipost_metrics, Config.METRICS_INTERVALO_INTELIPOST),
+    'sistema': (get_system_metrics, Config.METRICS_INTERVALO_SISTEMA),
+}
+
+
+def _atualizar_fonte(nome):
+    funcao, intervalo = FONTES[nome]
+    inicio = time.time()
+    dados = funcao()
+    _cache.set(f"fonte:{nome}", {'dados': dados, 'salvo_em': time.time()}, intervalo + MAX_STALE)
+    print(f"📥 Métricas '{nome}' pré-carregadas em {time.time() - inicio:.1f}s")
+    return dados
+
+
+def _revalidar_em_segundo_plano(app, nome):
+    """Só quem consegue o lock (entre todos os workers) recalcula"""
+    if not _cache.add(f"lock:fonte:{nome}", os.getpid(), LOCK_TIMEOUT):
+        return
+
+    def _executar():
+        try:
+            with app.app_context():
+                print(f"🔄 Atualizando '{nome}' em segundo plano")
+                _atualizar_fonte(nome)
+        except Exception as e:
+            print(f"❌ Falha ao atualizar '{nome}' em segundo plano: {e}")
+        finally:
+            _cache.delete(f"lock:fonte:{nome}")
+
+    threading.Thread(target=_executar, daemon=True, name=f'swr-{nome}').start()
+
+
+def _servir_registro(nome, registro):
+    """Devolve o valor do cache; vencido o intervalo, dispara a atualização"""
+    idade = time.time() - registro['salvo_em']
+    if idade > FONTES[nome][1]:
+        _revalidar_em_segundo_plano(current_app._get_current_object(), nome)
+    return registro['dados'], idade
+
+
+def _calcular_a_frio(nome):
+    """
+    Sem cache: uma thread por processo e um processo por vez calculam; os
+    demais esperam até ESPERA_MISS segundos pelo valor. Devolve None se o
+    outro worker ainda não terminou.
+    """
+    with _lock_local(f"fonte:{nome}"):
+        registro = _cache.get(f"fonte:{nome}")
+        if registro is not None:
+            return registro['dados'], time.time() - registro['salvo_em']
+
+        if not _cache.add(f"lock:fonte:{nome}", os.getpid(), LOCK_TIMEOUT):
+            limite = time.time() + ESPERA_MISS
+            while time.time() < limite:
+                time.sleep(0.2)
+                registro = _cache.get(f"fonte:{nome}")
+                if registro is not None:
+                    return registro['dados'], time.time() - registro['salvo_em']
+            return None
+
+        print(f"🔄 Calculando '{nome}' (sem cache)")
+        try:
+            return _atualizar_fonte(nome), 0.0
+        finally:
+            _cache.delete(f"lock:fonte:{nome}")
+
+
+def _ler_fonte(nome):
+    """Dados e idade da fonte (stale-while-revalidate); None enquanto outro worker calcula"""
+    registro = _cache.get(f"fonte:{nome}")
+    if registro is not None:
+        return _servir_registro(nome, registro)
+    return _calcular_a_frio(nome)
+
+
+def _fonte_carregando():
+    return {'status': 'loading', 'error': 'Fonte ainda sendo calculada'}
+
+
+def _responder_fonte(nome):
+    lido = _ler_fonte(nome)
+    return jsonify(lido[0] if lido is not None else _fonte_carregando())
+
+
+class AgendadorMetricas:
+
+    def __init__(self, app, fontes=None):
+        self.app = app
+        self.fontes = fontes or list(FONTES)
+        self._proxima = {nome: 0.0 for nome in self.fontes}
+        self._executor = ThreadPoolExecutor(max_workers=len(self.fontes), thread_name_prefix='metricas')
+        self._em_andamento = set()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name='agendador-metricas')
+            self._thread.start()
+            print(f"⏰ Agendador de métricas iniciado: {', '.join(self.fontes)}")
+
+    def parar(self):
+        self._parar.set()
+        self._executor.shutdown(wait=False)
+
+    def _loop(self):
+        while not self._parar.wait(1.0):
+            agora = time.time()
+            for nome in self.fontes:
+                if agora < self._proxima[nome]:
+                    continue
+                intervalo = FONTES[nome][1]
+                self._proxima[nome] = agora + intervalo
+                with self._lock:
+                    if nome in self._em_andamento:
+                        continue
+                # Outro worker já atualizou esta fonte neste intervalo
+                if not _cache.add(f"agendador:{nome}", os.getpid(), max(1, int(intervalo * 0.9))):
+                    continue
+                with self._lock:
+                    self._em_andamento.add(nome)
+                self._executor.submit(self._executar, nome)
+
+    def _executar(self, nome):
+        # Mesmo lock das leituras: não recalcula o que um miss ou uma revalidação já está calculando
+        tem_lock = _cache.add(f"lock:fonte:{nome}", os.getpid(), LOCK_TIMEOUT)
+        try:
+            if tem_lock:
+                with self.app.app_context():
+                    _atualizar_fonte(nome)
+        except Exception as e:
+            print(f"❌ Falha na pré-carga de '{nome}': {e}")
+        finally:
+            if tem_lock:
+                _cache.delete(f"lock:fonte:{nome}")
+            with self._lock:
+                self._em_andamento.discard(nome)
+
+
+_agendador = None
+_agendador_pid = None
+_agendador_lock = threading.Lock()
+
+
+def iniciar_agendador_metricas(app):
+    """Inicia (uma vez por processo) a pré-carga das fontes do dashboard"""
+    global _agendador, _agendador_pid
+    with _agendador_lock:
+        # Depois de um fork (gunicorn --preload) a thread do processo pai não existe no filho
+        if _agendador is None or _agendador_pid != os.getpid():
+            _agendador = AgendadorMetricas(app)
+            _agendador_pid = os.getpid()
+            _agendador.iniciar()
+    return _agendador
+
+
+@metrics_bp.before_app_request
+def _iniciar_agendador_na_primeira_requisicao():
+    # Só processos que atendem requisições (workers) pré-carregam; scripts,
+    # migrações e o executor de jobs que importam o app não iniciam a thread.
+    if Config.METRICS_PREFETCH_ATIVO and _agendador_pid != os.getpid():
+        iniciar_agendador_metricas(current_app._get_current_object())
+
+
 # =============================================
 # ROTAS DA API
 # =============================================
 
+@metrics_bp.route('/api/metrics/cache/estatisticas')
+@login_required
+def metrics_cache_estatisticas():
+    """Tamanho, taxa de acerto e remoções do cache de métricas (somente Master)"""
+    if not current_user.is_master():
+        return jsonify({'sucesso': False, 'erro': 'Acesso restrito ao Master'}), 403
+    vencidos = _cache.purgar_vencidos()
+    return jsonify({
+        'sucesso': True,
+        'cache': _cache.estatisticas(),
+        'vencidos_removidos_agora': vencidos,
+        'max_stale_segundos': MAX_STALE,
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+@metrics_bp.route('/api/metrics/cache/limpar', methods=['POST'])
+@login_required
+def metrics_cache_limpar():
+    """Esvazia o cache de métricas (somente Master)"""
+    if not current_user.is_master():
+        return jsonify({'sucesso': False, 'erro': 'Acesso restrito ao Master'}), 403
+    _cache.clear()
+    return jsonify({'sucesso': True, 'cache': _cache.estatisticas()})
+
+
 @metrics_bp.route('/api/metrics/dashboard')
-@cache_metrics(timeout=300)  # Cache de 5 minutos
 def dashboard_metrics():
-    """Endpoint principal do dashboard - busca todas as métricas"""
-    print("\n" + "="*50)
-    print("📊 REQUISIÇÃO RECEBIDA: /api/metrics/dashboard")
-    print("="*50)
-    
+    """Endpoint principal do dashboard - lê as métricas pré-carregadas no cache"""
     try:
-        # Busca todas as métricas em paralelo
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = {
-                'mercadolivre': executor.submit(get_ml_metrics),
-                'anymarket': executor.submit(get_anymarket_metrics),
-                'intelipost': executor.submit(get_intelipost_metrics),
-                'sistema': executor.submit(get_system_metrics)
-            }
-            
-            resultados = {}
-            for nome, future in futures.items():
-                try:
-                    resultados[nome] = future.result(timeout=15)
-                    print(f"✅ {nome}: OK")
-                except Exception as e:
-                    print(f"❌ {nome}: Erro - {str(e)}")
-                    resultados[nome] = {'status': 'error', 'error': str(e)}
+        resultados = {}
+        idades = {}
+        faltando = []
+        for nome in FONTES:
+            registro = _cache.get(f"fonte:{nome}")
+            if registro is not None:
+                resultados[nome], idade = _servir_registro(nome, registro)
+                idades[nome] = round(idade, 1)
+            else:
+                faltando.append(nome)
+
+        # Início a frio (agendador ainda não rodou): calcula as fontes faltantes em paralelo
+        if faltando:
+            app = current_app._get_current_object()
+
+            def _ler_com_contexto(nome):
+                with app.app_context():
+                    return _calcular_a_frio(nome)
+
+            # Sem `with`: a saída do bloco esperaria todas as fontes e anularia o timeout.
+            # Quem passar do prazo continua rodando e grava no cache para a próxima leitura.
+            executor = ThreadPoolExecutor(max_workers=len(faltando))
+            try:
+                futures = {nome: executor.submit(_ler_com_contexto, nome) for nome in faltando}
+                wait(futures.values(), timeout=15)
+                for nome, future in futures.items():
+                    if not future.done():
+                        print(f"⏳ {nome}: ainda calculando")
+                        resultados[nome] = _fonte_carregando()
+                        continue
+                    try:
+                        lido = future.result()
+                        if lido is None:
+                            resultados[nome] = _fonte_carregando()
+                            continue
+                        resultados[nome], idade = lido
+                        idades[nome] = round(idade, 1)
+                    except Exception as e:
+                        print(f"❌ {nome}: Erro - {str(e)}")
+                        resultados[nome] = {'status': 'error', 'error': str(e)}
+            finally:
+                executor.shutdown(wait=False)
         
         response = {
             'sucesso': True,
             'dados': resultados,
+            'idade_segundos': idades,
             'timestamp': datetime.now().isoformat()
         }
-        
-        print("✅ Dashboard respondido com sucesso!")
         return jsonify(response)
         
     except Exception as e:
@@ -491,25 +686,21 @@ def dashboard_metrics():
         }), 500
 
 @metrics_bp.route('/api/metrics/mercadolivre')
-@cache_metrics(timeout=300)
 def metrics_mercadolivre():
     """Métricas específicas do Mercado Livre"""
-    return jsonify(get_ml_metrics())
+    return _responder_fonte('mercadolivre')
 
 @metrics_bp.route('/api/metrics/anymarket')
-@cache_metrics(timeout=300)
 def metrics_anymarket():
     """Métricas específicas do AnyMarket"""
-    return jsonify(get_anymarket_metrics())
+    return _responder_fonte('anymarket')
 
 @metrics_bp.route('/api/metrics/intelipost')
-@cache_metrics(timeout=300)
 def metrics_intelipost():
     """Métricas específicas da Intelipost"""
-    return jsonify(get_intelipost_metrics())
+    return _responder_fonte('intelipost')
 
 @metrics_bp.route('/api/metrics/sistema')
-@cache_metrics(timeout=60)  # Cache de 1 minuto
 def metrics_sistema():
     """Métricas do sistema"""
-    return jsonify(get_system_metrics())
\ No newline at end of file
+    return _responder_fonte('sistema')
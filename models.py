@@ -300,6 +300,241 @@ class MLWebhookEvent(db.Model):
         return f'<MLWebhookEvent {self.topic} - {self.resource}>'
 
 
+class MLAnuncioEspelho(db.Model):
+    """
+    Espelho local dos anúncios do Mercado Livre já detalhados.
+    `dados` guarda o dict de _processar_anuncio_completo; `last_updated`
+    é o carimbo do ML usado pela sincronização incremental para decidir
+    quais anúncios precisam ser buscados de novo.
+    """
+    __tablename__ = 'ml_anuncios_espelho'
+
+    id             = db.Column(db.Integer, primary_key=True)
+    mlb            = db.Column(db.String(30), unique=True, nullable=False, index=True)
+    seller_id      = db.Column(db.String(50), index=True)         # conta ML dona do anúncio
+    status         = db.Column(db.String(30), index=True)         # active, paused, closed…
+    category_id    = db.Column(db.String(30), index=True)
+    meu_sku        = db.Column(db.String(100), index=True)        # seller_custom_field
+    date_created   = db.Column(db.DateTime, index=True)           # horário local do ML (sem fuso)
+    last_updated   = db.Column(db.String(40))                     # ISO exatamente como o ML devolve
+    dados          = db.Column(db.Text)                           # JSON do anúncio processado
+    sincronizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def get_data(self) -> dict:
+        """Desserializa o anúncio armazenado. Retorna dict vazio em caso de erro."""
+        try:
+            return json.loads(self.dados or '{}')
+        except Exception:
+            return {}
+
+    def set_data(self, anuncio: dict):
+        """Atualiza as colunas indexadas e o JSON a partir do dict processado."""
+        self.status       = anuncio.get('status')
+        self.category_id  = anuncio.get('category_id')
+        self.meu_sku      = anuncio.get('meu_sku') or None
+        self.last_updated = anuncio.get('last_updated')
+        try:
+            self.date_created = datetime.fromisoformat(
+                (anuncio.get('date_created') or '').replace('Z', '+00:00')
+            ).replace(tzinfo=None)
+        except ValueError:
+            self.date_created = None
+        self.dados = json.dumps(anuncio, ensure_ascii=False)
+
+    def to_dict(self):
+        return {
+            'mlb':             self.mlb,
+            'seller_id':       self.seller_id,
+            'status':          self.status,
+            'category_id':     self.category_id,
+            'meu_sku':         self.meu_sku,
+            'last_updated':    self.last_updated,
+            'sincronizado_em': self.sincronizado_em.isoformat() if self.sincronizado_em else None,
+        }
+
+    def __repr__(self):
+        return f'<MLAnuncioEspelho {self.mlb} - {self.status}>'
+
+
+class JobBackground(db.Model):
+    """
+    Operação longa executada fora da requisição (utils/jobs.py).
+    O progresso é gravado aqui para que qualquer worker do gunicorn
+    consiga responder ao polling/stream do cliente.
+    """
+    __tablename__ = 'jobs_background'
+
+    id              = db.Column(db.String(36), primary_key=True)      # uuid4
+    tipo            = db.Column(db.String(50), nullable=False, index=True)
+    status          = db.Column(db.String(20), default='pendente', index=True)  # pendente, executando, concluido, erro, cancelado
+    progresso       = db.Column(db.Integer, default=0)                # 0-100
+    mensagem        = db.Column(db.String(255))                      # última mensagem de progresso
+    parametros      = db.Column(db.Text)                             # JSON de entrada
+    resultado       = db.Column(db.Text, nullable=True)              # JSON de saída
+    erro            = db.Column(db.Text, nullable=True)
+    cancelar        = db.Column(db.Boolean, default=False)           # cancelamento solicitado
+    usuario_id      = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True, index=True)
+    criado_em       = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    iniciado_em     = db.Column(db.DateTime, nullable=True)
+    finalizado_em   = db.Column(db.DateTime, nullable=True)
+    atualizado_em   = db.Column(db.DateTime, default=datetime.utcnow)  # último sinal de vida do worker
+
+    FINALIZADOS = ('concluido', 'erro', 'cancelado')
+
+    def get_parametros(self) -> dict:
+        try:
+            return json.loads(self.parametros or '{}')
+        except Exception:
+            return {}
+
+    def get_resultado(self):
+        try:
+            return json.loads(self.resultado) if self.resultado else None
+        except Exception:
+            return None
+
+    @property
+    def finalizado(self):
+        return self.status in self.FINALIZADOS
+
+    def to_dict(self):
+        return {
+            'id':            self.id,
+            'tipo':          self.tipo,
+            'status':        self.status,
+            'progresso':     self.progresso,
+            'mensagem':      self.mensagem,
+            'erro':          self.erro,
+            'cancelar':      self.cancelar,
+            'usuario_id':    self.usuario_id,
+            'criado_em':     self.criado_em.isoformat() if self.criado_em else None,
+            'iniciado_em':   self.iniciado_em.isoformat() if self.iniciado_em else None,
+            'finalizado_em': self.finalizado_em.isoformat() if self.finalizado_em else None,
+        }
+
+    def __repr__(self):
+        return f'<JobBackground {self.tipo} {self.id} - {self.status}>'
+
+
+class MLQualidadeSnapshot(db.Model):
+    """
+    Foto da qualidade de um anúncio em um momento (gravada pelos relatórios
+    em massa). Os dashboards leem daqui em vez de consultar o ML.
+    """
+    __tablename__ = 'ml_qualidade_snapshots'
+    __table_args__ = (
+        db.Index('ix_ml_qualidade_mlb_capturado', 'mlb', 'capturado_em'),
+    )
+
+    id               = db.Column(db.Integer, primary_key=True)
+    mlb              = db.Column(db.String(30), nullable=False)
+    pontuacao        = db.Column(db.Float, index=True)              # 0-100
+    nivel            = db.Column(db.String(30))                     # Básica, Satisfatória, Profissional…
+    origem           = db.Column(db.String(20))                     # oficial | calculado
+    total_pendencias = db.Column(db.Integer, default=0)
+    pendencias       = db.Column(db.Text)                           # JSON {bucket: [variáveis]}
+    titulo           = db.Column(db.String(255))
+    categoria        = db.Column(db.String(30))
+    capturado_em     = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def get_pendencias(self) -> dict:
+        try:
+            return json.loads(self.pendencias or '{}')
+        except Exception:
+            return {}
+
+    def to_dict(self):
+        return {
+            'mlb':              self.mlb,
+            'pontuacao':        self.pontuacao,
+            'nivel':            self.nivel,
+            'origem':           self.origem,
+            'total_pendencias': self.total_pendencias,
+            'pendencias':       self.get_pendencias(),
+            'titulo':           self.titulo,
+            'categoria':        self.categoria,
+            'capturado_em':     self.capturado_em.isoformat() if self.capturado_em else None,
+        }
+
+    def __repr__(self):
+        return f'<MLQualidadeSnapshot {self.mlb} {self.pontuacao}>'
+
+
+class MLVendasDia(db.Model):
+    """
+    Vendas do Mercado Livre agregadas por dia (utils/ml_vendas).
+    O dashboard soma estas linhas em vez de baixar os pedidos da semana.
+    """
+    __tablename__ = 'ml_vendas_dia'
+    __table_args__ = (db.UniqueConstraint('seller_id', 'dia', name='unique_seller_dia'),)
+
+    id            = db.Column(db.Integer, primary_key=True)
+    seller_id     = db.Column(db.String(50), nullable=False, index=True)
+    dia           = db.Column(db.Date, nullable=False, index=True)      # data do pedido em Config.ML_VENDAS_FUSO
+    pedidos       = db.Column(db.Integer, default=0)
+    total         = db.Column(db.Float, default=0.0)                     # soma de total_amount
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'seller_id':     self.seller_id,
+            'dia':           self.dia.isoformat() if self.dia else None,
+            'pedidos':       self.pedidos,
+            'total':         round(self.total or 0, 2),
+            'atualizado_em': self.atualizado_em.isoformat() if self.atualizado_em else None,
+        }
+
+    def __repr__(self):
+        return f'<MLVendasDia {self.seller_id} {self.dia} {self.pedidos}>'
+
+
+class MLVendasPedido(db.Model):
+    """
+    Quanto cada pedido soma hoje em ml_vendas_dia (utils/ml_vendas). Quando
+    o status muda (cancelamento, por exemplo) só a diferença é aplicada ao dia.
+    """
+    __tablename__ = 'ml_vendas_pedido'
+    __table_args__ = (db.UniqueConstraint('seller_id', 'order_id', name='unique_seller_pedido'),)
+
+    id            = db.Column(db.Integer, primary_key=True)
+    seller_id     = db.Column(db.String(50), nullable=False, index=True)
+    order_id      = db.Column(db.String(30), nullable=False)
+    dia           = db.Column(db.Date, nullable=False)                  # mesmo dia de ml_vendas_dia
+    status        = db.Column(db.String(30))
+    conta         = db.Column(db.Boolean, default=False)                # entra em `pedidos` do dia
+    total         = db.Column(db.Float, default=0.0)                    # valor somado ao dia (0 se não conta)
+    atualizado_em = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MLVendasPedido {self.seller_id} {self.order_id} {self.status}>'
+
+
+class MLVendasMarca(db.Model):
+    """
+    Marcas d'água da agregação de vendas de cada conta: data_created do
+    último pedido já somado em ml_vendas_dia e os IDs com essa mesma data
+    (a próxima busca começa nela e ignora esses IDs), e até quando as
+    mudanças de status dos pedidos já somados foram revisadas.
+    """
+    __tablename__ = 'ml_vendas_marca'
+
+    id              = db.Column(db.Integer, primary_key=True)
+    seller_id       = db.Column(db.String(50), unique=True, nullable=False)
+    ultimo_pedido_em = db.Column(db.String(40))                     # ISO exatamente como o ML devolve
+    ids_no_limite   = db.Column(db.Text)                            # JSON [order_id, ...]
+    revisado_ate    = db.Column(db.String(40))                      # início da última revisão completa (ISO)
+    atualizado_em   = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def get_ids_no_limite(self) -> set:
+        try:
+            return set(json.loads(self.ids_no_limite or '[]'))
+        except Exception:
+            return set()
+
+    def __repr__(self):
+        return f'<MLVendasMarca {self.seller_id} {self.ultimo_pedido_em}>'
+
+
 # ============================================
 # FUNÇÕES AUXILIARES PARA INICIALIZAÇÃO
 # ============================================
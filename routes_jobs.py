@@ -0,0 +1,148 @@
+"""
+routes_jobs.py
+Rotas de API para os jobs em background (utils/jobs.py).
+
+Registre no app.py:
+    from routes_jobs import jobs_bp
+    app.register_blueprint(jobs_bp)
+
+Fluxo do cliente:
+    POST /api/jobs                    {"tipo": "ml_buscar_todos", "parametros": {...}}
+    GET  /api/jobs/<id>               status/progresso (polling)
+    GET  /api/jobs/<id>/stream        status/progresso via server-sent events
+    GET  /api/jobs/<id>/resultado     resultado final
+    POST /api/jobs/<id>/cancelar
+"""
+
+import json
+import time
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from flask_login import login_required, current_user
+
+from models import JobBackground
+from utils.jobs import TIPOS_JOB, submeter_job, obter_job, cancelar_job
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# HELPERS
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _job_do_usuario(job_id):
+    """Job visível para o usuário logado (Master vê todos, inclusive os sem dono) ou None"""
+    job = obter_job(job_id)
+    if job is None:
+        return None
+    if job.usuario_id != current_user.id and not current_user.is_master():
+        return None
+    return job
+
+
+def _nao_encontrado():
+    return jsonify({'sucesso': False, 'erro': 'Job não encontrado'}), 404
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# ROTAS
+# ──────────────────────────────────────────────────────────────────────────────
+
+@jobs_bp.route('/api/jobs', methods=['POST'])
+@login_required
+def api_submeter_job():
+    data = request.get_json(silent=True) or {}
+    tipo = data.get('tipo')
+
+    if tipo not in TIPOS_JOB:
+        return jsonify({
+            'sucesso': False,
+            'erro': f'Tipo de job inválido: {tipo}',
+            'tipos_disponiveis': sorted(TIPOS_JOB)
+        }), 400
+
+    if tipo.startswith('ml_'):
+        from token_manager_secure import ml_token_manager
+        if not ml_token_manager.is_authenticated():
+            return jsonify({'sucesso': False, 'erro': 'Não autenticado no Mercado Livre'}), 401
+
+    try:
+        job = submeter_job(tipo, data.get('parametros') or {}, usuario_id=current_user.id)
+        return jsonify({'sucesso': True, 'job': job.to_dict()}), 202
+    except Exception as e:
+        return jsonify({'sucesso': False, 'erro': str(e)}), 500
+
+
+@jobs_bp.route('/api/jobs')
+@login_required
+def api_listar_jobs():
+    query = JobBackground.query
+    if not current_user.is_master():
+        query = query.filter_by(usuario_id=current_user.id)
+    if request.args.get('tipo'):
+        query = query.filter_by(tipo=request.args['tipo'])
+
+    limite = min(request.args.get('limite', 50, type=int), 200)
+    jobs = query.order_by(JobBackground.criado_em.desc()).limit(limite).all()
+    return jsonify({'sucesso': True, 'jobs': [j.to_dict() for j in jobs]})
+
+
+@jobs_bp.route('/api/jobs/<job_id>')
+@login_required
+def api_status_job(job_id):
+    job = _job_do_usuario(job_id)
+    if job is None:
+        return _nao_encontrado()
+    return jsonify({'sucesso': True, 'job': job.to_dict()})
+
+
+@jobs_bp.route('/api/jobs/<job_id>/resultado')
+@login_required
+def api_resultado_job(job_id):
+    job = _job_do_usuario(job_id)
+    if job is None:
+        return _nao_encontrado()
+    if not job.finalizado:
+        return jsonify({'sucesso': False, 'erro': 'Job ainda em execução', 'job': job.to_dict()}), 409
+    return jsonify({'sucesso': True, 'job': job.to_dict(), 'resultado': job.get_resultado()})
+
+
+@jobs_bp.route('/api/jobs/<job_id>/cancelar', methods=['POST'])
+@login_required
+def api_cancelar_job(job_id):
+    if _job_do_usuario(job_id) is None:
+        return _nao_encontrado()
+    job = cancelar_job(job_id)
+    return jsonify({'sucesso': True, 'job': job.to_dict()})
+
+
+@jobs_bp.route('/api/jobs/<job_id>/stream')
+@login_required
+def api_stream_job(job_id):
+    """Envia o status a cada mudança (server-sent events) até o job terminar"""
+    job = _job_do_usuario(job_id)
+    if job is None:
+        return _nao_encontrado()
+
+    from models import db
+
+    def _gerar():
+        ultimo = None
+        while True:
+            db.session.expire_all()
+            atual = JobBackground.query.get(job_id)
+            if atual is None:
+                break
+            dados = atual.to_dict()
+            if dados != ultimo:
+                evento = 'fim' if atual.finalizado else 'progresso'
+                yield f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+                ultimo = dados
+            if atual.finalizado:
+                break
+            time.sleep(1)
+
+    resposta = Response(stream_with_context(_gerar()), mimetype='text/event-stream')
+    resposta.headers['Cache-Control'] = 'no-cache'
+    resposta.headers['X-Accel-Buffering'] = 'no'
+    return resposta
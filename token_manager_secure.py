@@ -2,13 +2,22 @@
 import os
 import json
 import time
+import threading
 import requests
 from datetime import datetime
 
 # ======================================================
 # NOVA IMPORT: Usando token manager do banco de dados
 # ======================================================
-from utils.token_manager_db import salvar_token, obter_token, remover_token
+from utils.token_manager_db import salvar_token, obter_token, remover_token, bloquear_token, ler_token_atual
+
+# Renova o access_token quando faltar menos que isso para expirar
+MARGEM_RENOVACAO_SEGUNDOS = 300
+
+# Validade da reserva de renovação gravada no banco (cobre o POST /oauth/token de até 30s)
+PRAZO_RESERVA_RENOVACAO = 45
+
+CAMPOS_TOKEN = ('access_token', 'refresh_token', 'expires_in', 'updated_at')
 
 class MercadoLivreTokenManager:
     def __init__(self):
@@ -16,6 +25,11 @@ class MercadoLivreTokenManager:
         self.accounts = {}
         self.client_id = None
         self.client_secret = None
+        # Cache em memória: account_id -> {'access_token', 'expira_em'}
+        self._token_cache = {}
+        self._cache_lock = threading.Lock()
+        # Renovações em voo: account_id -> {'evento', 'resultado'}
+        self._renovacoes_em_andamento = {}
         self.load_accounts()
     
     def load_accounts(self):
@@ -453,53 +467,273 @@ class MercadoLivreTokenManager:
     # =========================================
     
     def get_valid_token(self, account_id=None):
-        """Obtém token válido para uso"""
+        """
+        Obtém token válido para uso.
+
+        Confia no expires_in/updated_at salvos em vez de consultar /users/me a
+        cada chamada: o token fica em cache até faltar MARGEM_RENOVACAO_SEGUNDOS
+        para expirar, quando é renovado proativamente. Um 401 real da API é
+        tratado por renovar_apos_401().
+        """
         try:
             if not account_id:
                 account_id = self.current_account_id
-            
+
             if not account_id or account_id not in self.accounts:
                 print("❌ Conta não encontrada")
                 return None
-            
+
             account = self.accounts[account_id]
             access_token = account.get('access_token')
-            
+
             if not access_token:
                 print(f"❌ Conta '{account.get('account_name')}' não tem token")
                 return None
-            
-            # Testa se o token funciona
-            if self.testar_token_api(access_token):
+
+            agora = time.time()
+
+            # 1. Cache em memória
+            with self._cache_lock:
+                cache = self._token_cache.get(account_id)
+            if cache and cache['access_token'] == access_token and agora < cache['expira_em'] - MARGEM_RENOVACAO_SEGUNDOS:
                 return access_token
-            
-            # Tenta renovar
+
+            # 2. Expiração calculada a partir dos dados salvos
+            expira_em = self._calcular_expiracao(account)
+            if expira_em is None:
+                # Sem data de emissão conhecida: valida uma única vez na API
+                if self.testar_token_api(access_token):
+                    expira_em = agora + int(account.get('expires_in') or 21600)
+                    self._guardar_token_cache(account_id, access_token, expira_em)
+                    return access_token
+            elif agora < expira_em - MARGEM_RENOVACAO_SEGUNDOS:
+                self._guardar_token_cache(account_id, access_token, expira_em)
+                return access_token
+
+            # 3. Expirado ou perto de expirar: renova
             refresh_token = account.get('refresh_token')
             if refresh_token:
                 new_token = self.refresh_token(account_id, refresh_token)
                 if new_token:
                     return new_token
-            
+
+            # Renovação falhou mas o token ainda não venceu: usa até o fim
+            if expira_em and agora < expira_em:
+                return access_token
+
             return None
-            
+
         except Exception as e:
             print(f"❌ Erro ao obter token: {str(e)}")
             return None
+
+    def renovar_apos_401(self, account_id=None, token_rejeitado=None):
+        """
+        Chamado quando a API devolve 401 para um token que parecia válido.
+        Descarta o cache e renova — a menos que outro fluxo já tenha trocado
+        o token da conta, caso em que apenas devolve o token atual.
+        """
+        try:
+            if not account_id:
+                account_id = self.current_account_id
+
+            account = self.accounts.get(account_id)
+            if not account:
+                return None
+
+            self.invalidar_token_cache(account_id)
+
+            token_atual = account.get('access_token')
+            if token_rejeitado and token_atual and token_atual != token_rejeitado:
+                return self.get_valid_token(account_id)
+
+            refresh_token = account.get('refresh_token')
+            if not refresh_token:
+                return None
+
+            print(f"🔄 Token rejeitado (401) para '{account.get('account_name')}', renovando...")
+            return self.refresh_token(account_id, refresh_token)
+
+        except Exception as e:
+            print(f"❌ Erro ao renovar após 401: {str(e)}")
+            return None
+
+    def invalidar_token_cache(self, account_id=None):
+        """Remove o token da conta (ou de todas) do cache em memória"""
+        with self._cache_lock:
+            if account_id:
+                self._token_cache.pop(account_id, None)
+            else:
+                self._token_cache.clear()
+
+    def _guardar_token_cache(self, account_id, access_token, expira_em):
+        with self._cache_lock:
+            self._token_cache[account_id] = {
+                'access_token': access_token,
+                'expira_em': expira_em
+            }
+
+    def _calcular_expiracao(self, account):
+        """Epoch em que o access_token expira (updated_at/created_at + expires_in), ou None"""
+        emitido_em = account.get('updated_at') or account.get('created_at')
+        if not emitido_em:
+            return None
+        try:
+            emitido_ts = datetime.fromisoformat(emitido_em).timestamp()
+        except (TypeError, ValueError):
+            return None
+        return emitido_ts + int(account.get('expires_in') or 21600)
     
     def refresh_token(self, account_id, refresh_token):
-        """Renova token"""
+        """
+        Renova token — uma única renovação em voo por conta.
+
+        A primeira thread que chega vira a "líder" e executa a renovação;
+        as demais esperam o resultado dela em vez de disparar o próprio
+        POST /oauth/token (o ML invalida o refresh_token usado, então
+        renovações paralelas derrubariam umas às outras).
+        """
+        with self._cache_lock:
+            voo = self._renovacoes_em_andamento.get(account_id)
+            lider = voo is None
+            if lider:
+                voo = {'evento': threading.Event(), 'resultado': None}
+                self._renovacoes_em_andamento[account_id] = voo
+
+        if not lider:
+            print(f"⏳ Aguardando renovação em andamento para: {account_id}")
+            voo['evento'].wait(timeout=60)
+            return voo['resultado']
+
+        try:
+            voo['resultado'] = self._renovar_com_lock(account_id, refresh_token)
+        finally:
+            with self._cache_lock:
+                self._renovacoes_em_andamento.pop(account_id, None)
+            voo['evento'].set()
+
+        return voo['resultado']
+
+    def _renovar_com_lock(self, account_id, refresh_token):
+        """
+        Renova coordenando com os outros workers do gunicorn pela linha
+        'mercadolivre' em token_configs, sem segurar o lock durante o HTTP:
+          1. lock curto: adota o token se outro worker já renovou; senão
+             grava uma reserva ('renovando_ate') nesta conta;
+          2. POST /oauth/token fora da transação;
+          3. lock curto: grava só os campos desta conta e libera a reserva.
+        Quem encontra a reserva de outro worker espera o token novo aparecer
+        no banco; se a reserva vencer sem resultado, renova por conta própria.
+        """
+        if account_id not in self.accounts:
+            return None
+
+        account = self.accounts[account_id]
+
+        try:
+            reserva = self._reservar_renovacao(account_id, refresh_token)
+        except Exception as e:
+            # Banco indisponível: segue sem coordenação entre workers
+            print(f"⚠️  Lock de renovação indisponível ({str(e)}), renovando sem lock")
+            reserva = 'propria'
+
+        if reserva == 'adotado':
+            return account['access_token']
+        if reserva == 'outro_worker':
+            token = self._aguardar_renovacao_externa(account_id, refresh_token)
+            if token:
+                return token
+            print(f"⚠️  Reserva de renovação vencida para: {account.get('account_name')}, renovando aqui")
+
+        token_data = self._solicitar_renovacao(account, refresh_token)
+        if not token_data:
+            self._gravar_conta_renovada(account_id, apenas_liberar=True)
+            return None
+
+        self._aplicar_token_renovado(account_id, token_data, refresh_token)
+        self._gravar_conta_renovada(account_id)
+        print(f"✅ Token renovado para: {account.get('account_name')}")
+        return account['access_token']
+
+    def _adotar_token_do_banco(self, account_id, conta_db, refresh_token):
+        """Se outro worker já trocou o refresh_token e o access_token novo é válido, passa a usá-lo"""
+        if not (conta_db.get('access_token') and conta_db.get('refresh_token')
+                and conta_db.get('refresh_token') != refresh_token):
+            return False
+        expira_em = self._calcular_expiracao(conta_db)
+        if not expira_em or time.time() >= expira_em - MARGEM_RENOVACAO_SEGUNDOS:
+            return False
+        account = self.accounts[account_id]
+        for campo in CAMPOS_TOKEN:
+            account[campo] = conta_db.get(campo)
+        self._guardar_token_cache(account_id, account['access_token'], expira_em)
+        print(f"✅ Token já renovado por outro worker: {account.get('account_name')}")
+        return True
+
+    def _reservar_renovacao(self, account_id, refresh_token):
+        """
+        Lock curto na linha do serviço.
+        Returns: 'adotado' | 'outro_worker' (reserva ativa de outro) | 'propria'
+        """
+        with bloquear_token('mercadolivre') as estado:
+            conta_db = (estado['data'].get('accounts') or {}).get(account_id)
+            if conta_db is None:
+                return 'propria'
+            if self._adotar_token_do_banco(account_id, conta_db, refresh_token):
+                return 'adotado'
+            if (conta_db.get('renovando_ate') or 0) > time.time():
+                return 'outro_worker'
+            conta_db['renovando_ate'] = time.time() + PRAZO_RESERVA_RENOVACAO
+            estado['alterado'] = True
+            return 'propria'
+
+    def _aguardar_renovacao_externa(self, account_id, refresh_token):
+        """Espera (sem lock) o token renovado por outro worker aparecer no banco"""
+        print(f"⏳ Outro worker está renovando: {self.accounts[account_id].get('account_name')}")
+        limite = time.time() + PRAZO_RESERVA_RENOVACAO
+        while time.time() < limite:
+            time.sleep(1)
+            dados = ler_token_atual('mercadolivre') or {}
+            conta_db = (dados.get('accounts') or {}).get(account_id) or {}
+            if self._adotar_token_do_banco(account_id, conta_db, refresh_token):
+                return self.accounts[account_id]['access_token']
+            if (conta_db.get('renovando_ate') or 0) <= time.time():
+                break
+        return None
+
+    def _gravar_conta_renovada(self, account_id, apenas_liberar=False):
+        """
+        Lock curto: grava só os campos de token desta conta sobre o estado
+        atual do banco (sem sobrescrever as demais) e libera a reserva.
+        """
+        account = self.accounts[account_id]
+        try:
+            with bloquear_token('mercadolivre') as estado:
+                accounts_db = estado['data'].setdefault('accounts', {})
+                if apenas_liberar:
+                    conta_db = accounts_db.get(account_id)
+                    if conta_db is None or conta_db.pop('renovando_ate', None) is None:
+                        return
+                else:
+                    conta_db = accounts_db.setdefault(account_id, dict(account))
+                    for campo in CAMPOS_TOKEN:
+                        conta_db[campo] = account.get(campo)
+                    conta_db.pop('renovando_ate', None)
+                    estado['data']['updated_at'] = datetime.now().isoformat()
+                estado['alterado'] = True
+        except Exception as e:
+            print(f"⚠️  Não foi possível gravar a renovação no banco ({str(e)})")
+
+    def _solicitar_renovacao(self, account, refresh_token):
+        """POST /oauth/token com grant_type=refresh_token. Retorna o JSON ou None."""
         try:
-            if account_id not in self.accounts:
-                return None
-            
-            account = self.accounts[account_id]
             app_id = account.get('app_id')
             secret_key = account.get('secret_key')
-            
+
             if not app_id or not secret_key:
                 print("❌ App ID ou Secret Key não configurado")
                 return None
-            
+
             response = requests.post(
                 'https://api.mercadolibre.com/oauth/token',
                 data={
@@ -510,25 +744,29 @@ class MercadoLivreTokenManager:
                 },
                 timeout=30
             )
-            
+
             if response.status_code == 200:
-                token_data = response.json()
-                account['access_token'] = token_data.get('access_token')
-                account['refresh_token'] = token_data.get('refresh_token', refresh_token)
-                account['expires_in'] = token_data.get('expires_in', 21600)
-                account['updated_at'] = datetime.now().isoformat()
-                
-                self.save_to_database()
-                print(f"✅ Token renovado para: {account.get('account_name')}")
-                return token_data['access_token']
-            else:
-                print(f"❌ Erro ao renovar: {response.status_code}")
-                return None
-                
+                return response.json()
+
+            print(f"❌ Erro ao renovar: {response.status_code}")
+            return None
+
         except Exception as e:
             print(f"❌ Erro na renovação: {str(e)}")
             return None
-    
+
+    def _aplicar_token_renovado(self, account_id, token_data, refresh_token_anterior):
+        account = self.accounts[account_id]
+        account['access_token'] = token_data.get('access_token')
+        account['refresh_token'] = token_data.get('refresh_token', refresh_token_anterior)
+        account['expires_in'] = token_data.get('expires_in', 21600)
+        account['updated_at'] = datetime.now().isoformat()
+        self._guardar_token_cache(
+            account_id,
+            account['access_token'],
+            time.time() + int(account['expires_in'] or 21600)
+        )
+
     def testar_token_api(self, token):
         """Testa se o token funciona"""
         try:
@@ -0,0 +1,386 @@
+# utils/cache_compartilhado.py
+"""
+Cache compartilhado entre os workers do gunicorn (mesmo host, sem serviço externo).
+
+Os valores ficam em um arquivo SQLite (modo WAL) em instance/cache, então
+o que um worker calcula os outros já encontram pronto. Cada entrada tem
+validade própria; acima de `max_entradas` ou `max_bytes` (por namespace)
+as menos acessadas são removidas.
+
+Usado por duas camadas:
+  - metrics_api, fontes pré-carregadas do dashboard (criar_backend('metricas'));
+  - flask_caching do app.py (CACHE_TYPE = 'utils.cache_compartilhado.CacheSQLiteFlask').
+
+Com Config.CACHE_BACKEND = 'memoria' volta ao cache por processo (CacheMemoria).
+Erros do SQLite nunca derrubam a requisição: viram miss/no-op.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from flask_caching.backends.base import BaseCache
+
+from config import Config
+from utils.ttl_cache import CacheTTL, medir_tamanho
+
+INTERVALO_LIMPEZA = 100  # gravações entre verificações de tamanho
+INTERVALO_ACESSO = 60    # segundos: acessado_em (ordem da LRU) só é regravado se mais velho que isso
+
+
+class CacheSQLite:
+
+    def __init__(self, arquivo, namespace='geral', max_entradas=5000, default_timeout=300, max_bytes=None):
+        self.arquivo = Path(arquivo)
+        self.namespace = namespace
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.default_timeout = default_timeout
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._gravacoes = 0
+        self._bytes_gravados = 0
+        # Contadores deste processo (cada worker tem os seus)
+        self._stats = {'hits': 0, 'misses': 0, 'removidos_lru': 0, 'expirados': 0, 'erros': 0}
+
+        # Só testa o arquivo: sem permissão de escrita o app sobe e o cache vira miss/no-op
+        try:
+            self._conexao()
+        except sqlite3.Error as e:
+            self._stats['erros'] += 1
+            print(f"⚠️  Cache compartilhado ({self.namespace}) indisponível em {self.arquivo}: {e}")
+
+    # ------------------------------------------------------------------
+    # Conexão (uma por thread e por processo: conexões não sobrevivem ao fork)
+    # ------------------------------------------------------------------
+
+    def _conexao(self):
+        registro = getattr(self._local, 'registro', None)
+        if registro is None or registro[0] != os.getpid():
+            try:
+                self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                raise sqlite3.OperationalError(str(e))
+            con = sqlite3.connect(str(self.arquivo), timeout=5, isolation_level=None,
+                                  check_same_thread=False)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    chave       TEXT PRIMARY KEY,
+                    valor       BLOB NOT NULL,
+                    expira_em   REAL,
+                    acessado_em REAL NOT NULL,
+                    tamanho     INTEGER NOT NULL
+                )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS ix_cache_acessado ON cache (acessado_em)")
+            registro = (os.getpid(), con)
+            self._local.registro = registro
+        return registro[1]
+
+    def _escrever_opcional(self, sql, parametros=()):
+        """Escrita de manutenção durante uma leitura: com o banco ocupado é só pulada"""
+        try:
+            self._executar(sql, parametros)
+        except sqlite3.Error:
+            pass
+
+    def _executar(self, sql, parametros=()):
+        return self._conexao().execute(sql, parametros)
+
+    def _chave(self, chave):
+        return f"{self.namespace}:{chave}"
+
+    # Chaves do namespace por faixa ('ns:' <= chave < 'ns;'): sem LIKE, em que
+    # o '_' dos nomes (ml_item, ...) seria curinga e pegaria outros namespaces
+    _NO_NAMESPACE = "chave >= ? AND chave < ?"
+
+    def _faixa(self):
+        return (f"{self.namespace}:", f"{self.namespace};")
+
+    def _expiracao(self, timeout):
+        timeout = self.default_timeout if timeout is None else timeout
+        return None if not timeout else time.time() + timeout
+
+    def _contar(self, nome, quantidade=1):
+        with self._lock:
+            self._stats[nome] += quantidade
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def get(self, chave, padrao=None):
+        """
+        Leitura sem lock de escrita na maioria das vezes: acessado_em só é
+        regravado a cada INTERVALO_ACESSO segundos por chave, e essas
+        escritas (assim como a remoção de vencidos) são puladas se o banco
+        estiver ocupado, sem transformar o hit em miss.
+        """
+        try:
+            linha = self._executar(
+                "SELECT valor, expira_em, acessado_em FROM cache WHERE chave = ?", (self._chave(chave),)
+            ).fetchone()
+            agora = time.time()
+            if linha is None or (linha[1] is not None and linha[1] < agora):
+                if linha is not None:
+                    self._escrever_opcional("DELETE FROM cache WHERE chave = ?", (self._chave(chave),))
+                    self._contar('expirados')
+                self._contar('misses')
+                return padrao
+            if agora - linha[2] > INTERVALO_ACESSO:
+                self._escrever_opcional(
+                    "UPDATE cache SET acessado_em = ? WHERE chave = ?", (agora, self._chave(chave))
+                )
+            self._contar('hits')
+            return pickle.loads(linha[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            self._contar('erros')
+            print(f"⚠️  Cache compartilhado ({self.namespace}): falha na leitura: {e}")
+            return padrao
+
+    def set(self, chave, valor, timeout=None):
+        try:
+            dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            self._executar(
+                "INSERT OR REPLACE INTO cache (chave, valor, expira_em, acessado_em, tamanho) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self._chave(chave), dados, self._expiracao(timeout), time.time(), len(dados))
+            )
+        except (sqlite3.Error, pickle.PicklingError, TypeError) as e:
+            self._contar('erros')
+            print(f"⚠️  Cache compartilhado ({self.namespace}): falha na gravação: {e}")
+            return False
+
+        with self._lock:
+            self._gravacoes += 1
+            self._bytes_gravados += len(dados)
+            limpar = self._gravacoes % INTERVALO_LIMPEZA == 0 or (
+                self.max_bytes and self._bytes_gravados >= self.max_bytes // 10
+            )
+            if limpar:
+                self._bytes_gravados = 0
+        if limpar:
+            self.limpar_excedente()
+        return True
+
+    def add(self, chave, valor, timeout=None):
+        """Grava só se a chave não existir (ou estiver vencida). Atômico entre processos."""
+        try:
+            dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            con = self._conexao()
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                con.execute(
+                    "DELETE FROM cache WHERE chave = ? AND expira_em IS NOT NULL AND expira_em < ?",
+                    (self._chave(chave), time.time())
+                )
+                cursor = con.execute(
+                    "INSERT OR IGNORE INTO cache (chave, valor, expira_em, acessado_em, tamanho) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (self._chave(chave), dados, self._expiracao(timeout), time.time(), len(dados))
+                )
+                con.execute("COMMIT")
+            except sqlite3.Error:
+                con.execute("ROLLBACK")
+                raise
+            return cursor.rowcount == 1
+        except (sqlite3.Error, pickle.PicklingError, TypeError) as e:
+            self._contar('erros')
+            print(f"⚠️  Cache compartilhado ({self.namespace}): falha no add: {e}")
+            return False
+
+    def delete(self, chave):
+        try:
+            return self._executar("DELETE FROM cache WHERE chave = ?", (self._chave(chave),)).rowcount > 0
+        except sqlite3.Error:
+            self._contar('erros')
+            return False
+
+    def has(self, chave):
+        try:
+            linha = self._executar(
+                "SELECT expira_em FROM cache WHERE chave = ?", (self._chave(chave),)
+            ).fetchone()
+            return linha is not None and (linha[0] is None or linha[0] >= time.time())
+        except sqlite3.Error:
+            self._contar('erros')
+            return False
+
+    def clear(self):
+        """Apaga só as chaves deste namespace"""
+        try:
+            self._executar(f"DELETE FROM cache WHERE {self._NO_NAMESPACE}", self._faixa())
+            return True
+        except sqlite3.Error:
+            self._contar('erros')
+            return False
+
+    def purgar_vencidos(self):
+        """Remove as entradas vencidas do namespace"""
+        try:
+            vencidos = self._executar(
+                f"DELETE FROM cache WHERE {self._NO_NAMESPACE} AND expira_em IS NOT NULL AND expira_em < ?",
+                (*self._faixa(), time.time())
+            ).rowcount
+            if vencidos:
+                self._contar('expirados', vencidos)
+            return vencidos
+        except sqlite3.Error as e:
+            self._contar('erros')
+            print(f"⚠️  Cache compartilhado: falha ao purgar vencidos: {e}")
+            return 0
+
+    def limpar_excedente(self):
+        """Remove vencidos e, acima de max_entradas/max_bytes, os menos acessados (LRU)"""
+        self.purgar_vencidos()
+        try:
+            total, tamanho = self._executar(
+                f"SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache WHERE {self._NO_NAMESPACE}", self._faixa()
+            ).fetchone()
+            if total <= self.max_entradas and (not self.max_bytes or tamanho <= self.max_bytes):
+                return
+
+            # Percorre do menos acessado para o mais acessado até caber nos dois limites
+            remover = []
+            for chave, tam in self._executar(
+                f"SELECT chave, tamanho FROM cache WHERE {self._NO_NAMESPACE} ORDER BY acessado_em", self._faixa()
+            ):
+                if total <= self.max_entradas and (not self.max_bytes or tamanho <= self.max_bytes):
+                    break
+                remover.append(chave)
+                total -= 1
+                tamanho -= tam
+            if remover:
+                self._executar(
+                    f"DELETE FROM cache WHERE chave IN ({','.join('?' * len(remover))})", remover
+                )
+                self._contar('removidos_lru', len(remover))
+        except sqlite3.Error as e:
+            self._contar('erros')
+            print(f"⚠️  Cache compartilhado: falha na limpeza: {e}")
+
+    def estatisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+        consultas = stats['hits'] + stats['misses']
+        try:
+            entradas, tamanho = self._executar(
+                f"SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache WHERE {self._NO_NAMESPACE}",
+                self._faixa()
+            ).fetchone()
+        except sqlite3.Error:
+            entradas, tamanho = None, None
+        return {
+            **stats,
+            'backend': 'sqlite',
+            'namespace': self.namespace,
+            'processo': os.getpid(),
+            'entradas': entradas,
+            'bytes': tamanho,
+            'max_entradas': self.max_entradas,
+            'max_bytes': self.max_bytes,
+            'taxa_acerto': round(stats['hits'] / consultas * 100, 1) if consultas else 0.0,
+        }
+
+
+class CacheMemoria(CacheTTL):
+    """Mesma interface do CacheSQLite, por processo (CACHE_BACKEND = 'memoria')"""
+
+    def __init__(self, namespace='geral', max_entradas=5000, default_timeout=300, max_bytes=None):
+        super().__init__(ttl=default_timeout, max_entradas=max_entradas, max_bytes=max_bytes)
+        self.namespace = namespace
+
+    def get(self, chave, padrao=None):
+        return self.obter(chave, padrao)
+
+    @staticmethod
+    def _ttl(timeout):
+        # timeout 0 = sem validade (como no flask_caching)
+        return timeout if timeout else (None if timeout is None else 10 ** 9)
+
+    def set(self, chave, valor, timeout=None):
+        self.guardar(chave, valor, ttl=self._ttl(timeout))
+        return True
+
+    def add(self, chave, valor, timeout=None):
+        """Consulta e gravação na mesma seção crítica: só uma thread recebe True"""
+        tamanho = medir_tamanho(valor) if self.max_bytes else 0
+        with self._lock:
+            registro = self._dados.get(chave)
+            if registro is not None and registro[0] >= time.monotonic():
+                return False
+            self._inserir(chave, valor, self._ttl(timeout), tamanho)
+            return True
+
+    def delete(self, chave):
+        self.remover(chave)
+        return True
+
+    def has(self, chave):
+        # Direto no dict: não conta como hit/miss nas estatísticas
+        with self._lock:
+            registro = self._dados.get(chave)
+            return registro is not None and registro[0] >= time.monotonic()
+
+    def clear(self):
+        self.limpar()
+        return True
+
+    def estatisticas(self):
+        return {**super().estatisticas(), 'backend': 'memoria', 'namespace': self.namespace,
+                'processo': os.getpid()}
+
+
+def criar_backend(namespace, max_entradas=None, default_timeout=300, max_bytes=None):
+    """Backend configurado em Config.CACHE_BACKEND ('sqlite' | 'memoria')"""
+    max_entradas = max_entradas or Config.CACHE_COMPARTILHADO_MAX_ENTRADAS
+    if Config.CACHE_BACKEND == 'sqlite':
+        return CacheSQLite(Config.CACHE_COMPARTILHADO_ARQUIVO, namespace=namespace,
+                           max_entradas=max_entradas, default_timeout=default_timeout,
+                           max_bytes=max_bytes)
+    return CacheMemoria(namespace=namespace, max_entradas=max_entradas,
+                        default_timeout=default_timeout, max_bytes=max_bytes)
+
+
+class CacheSQLiteFlask(BaseCache):
+    """Backend do flask_caching sobre o CacheSQLite (CACHE_TYPE com o caminho desta classe)"""
+
+    def __init__(self, arquivo, namespace='flask', max_entradas=5000, default_timeout=300):
+        super().__init__(default_timeout=default_timeout)
+        self._cache = CacheSQLite(arquivo, namespace=namespace, max_entradas=max_entradas,
+                                  default_timeout=default_timeout)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        return cls(
+            config.get('CACHE_SQLITE_ARQUIVO', Config.CACHE_COMPARTILHADO_ARQUIVO),
+            namespace=config.get('CACHE_KEY_PREFIX') or 'flask',
+            max_entradas=config.get('CACHE_THRESHOLD') or Config.CACHE_COMPARTILHADO_MAX_ENTRADAS,
+            default_timeout=config.get('CACHE_DEFAULT_TIMEOUT', 300)
+        )
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, timeout=None):
+        return self._cache.set(key, value, self._normalize_timeout(timeout))
+
+    def add(self, key, value, timeout=None):
+        return self._cache.add(key, value, self._normalize_timeout(timeout))
+
+    def delete(self, key):
+        return self._cache.delete(key)
+
+    def has(self, key):
+        return self._cache.has(key)
+
+    def clear(self):
+        return self._cache.clear()
+
+    def estatisticas(self):
+        return self._cache.estatisticas()
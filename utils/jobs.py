@@ -0,0 +1,372 @@
+# utils/jobs.py
+"""
+Executor de jobs em background para operações longas do Mercado Livre.
+
+O job é gravado na tabela jobs_background e executado em um pool de
+threads do próprio processo, fora da requisição. O progresso recebido
+pelo `progresso_callback` das operações é persistido no banco, então
+qualquer worker consegue responder ao polling/stream do cliente; o
+cancelamento também passa pelo banco (flag `cancelar`).
+
+Cada processo mantém uma thread de batimento que renova `atualizado_em`
+dos seus jobs pendentes/executando e lê a flag `cancelar` deles (sem
+depender de a operação reportar progresso); só job sem batimento (dono
+morto) é recolhido por recuperar_jobs_interrompidos.
+
+Novos tipos são registrados com @tipo_job('nome'); a função recebe
+(parametros, progresso_callback, cancelar) e devolve um dict serializável.
+"""
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from config import Config
+
+TIPOS_JOB = {}
+
+_executor = None
+_executor_lock = threading.Lock()
+_eventos_cancelamento = {}  # job_id -> threading.Event (jobs deste processo)
+_batimento = None
+
+INTERVALO_GRAVACAO = 1.0      # segundos entre gravações de progresso
+INTERVALO_CANCELAMENTO = 2.0  # segundos entre consultas da flag de cancelamento
+INTERVALO_BATIMENTO = 30.0    # segundos entre renovações de atualizado_em dos jobs do processo
+
+
+def tipo_job(nome):
+    """Registra uma função como tipo de job"""
+    def decorator(func):
+        TIPOS_JOB[nome] = func
+        return func
+    return decorator
+
+
+def _get_models():
+    from models import db, JobBackground
+    return db, JobBackground
+
+
+def _obter_executor(app):
+    global _executor, _batimento
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.JOBS_MAX_WORKERS,
+                thread_name_prefix='job'
+            )
+        if _batimento is None:
+            _batimento = threading.Thread(target=_loop_batimento, args=(app,), daemon=True, name='job-batimento')
+            _batimento.start()
+        return _executor
+
+
+def _loop_batimento(app):
+    """
+    Sinal de vida dos jobs deste processo (na fila ou executando) e leitura
+    da flag de cancelamento, ambos independentes do progresso
+    """
+    ultimo_batimento = time.time()
+    while True:
+        time.sleep(INTERVALO_CANCELAMENTO)
+        ids = list(_eventos_cancelamento)
+        if not ids:
+            continue
+        try:
+            with app.app_context():
+                db, JobBackground = _get_models()
+                # Cancelamento pedido em outro worker chega aqui mesmo se a
+                # operação passar minutos sem chamar o progresso_callback
+                for (job_id,) in JobBackground.query.with_entities(JobBackground.id).filter(
+                    JobBackground.id.in_(ids), JobBackground.cancelar.is_(True)
+                ):
+                    evento = _eventos_cancelamento.get(job_id)
+                    if evento:
+                        evento.set()
+
+                if time.time() - ultimo_batimento >= INTERVALO_BATIMENTO:
+                    ultimo_batimento = time.time()
+                    JobBackground.query.filter(
+                        JobBackground.id.in_(ids),
+                        JobBackground.status.in_(['pendente', 'executando'])
+                    ).update({'atualizado_em': datetime.utcnow()}, synchronize_session=False)
+                db.session.commit()
+        except Exception as e:
+            print(f"⚠️  Falha no batimento dos jobs: {e}")
+
+
+# ============================================
+# API PÚBLICA
+# ============================================
+
+def submeter_job(tipo, parametros=None, usuario_id=None):
+    """
+    Cria o registro do job e agenda a execução.
+
+    Returns:
+        JobBackground recém-criado (status 'pendente')
+    """
+    if tipo not in TIPOS_JOB:
+        raise ValueError(f"Tipo de job desconhecido: {tipo}")
+
+    db, JobBackground = _get_models()
+    job = JobBackground(
+        id=str(uuid.uuid4()),
+        tipo=tipo,
+        status='pendente',
+        progresso=0,
+        mensagem='Aguardando execução',
+        parametros=json.dumps(parametros or {}, ensure_ascii=False),
+        usuario_id=usuario_id
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    _eventos_cancelamento[job.id] = threading.Event()
+
+    from flask import current_app
+    app = current_app._get_current_object()
+    _obter_executor(app).submit(_executar, app, job.id)
+
+    print(f"📥 Job {tipo} agendado: {job.id}")
+    return job
+
+
+def obter_job(job_id):
+    _, JobBackground = _get_models()
+    return JobBackground.query.get(job_id)
+
+
+def cancelar_job(job_id):
+    """Solicita o cancelamento. Retorna o job ou None se não existir."""
+    db, JobBackground = _get_models()
+    job = JobBackground.query.get(job_id)
+    if job is None:
+        return None
+    if job.finalizado:
+        return job
+
+    job.cancelar = True
+    if job.status == 'pendente':
+        job.status = 'cancelado'
+        job.mensagem = 'Cancelado antes de iniciar'
+        job.finalizado_em = datetime.utcnow()
+    db.session.commit()
+
+    evento = _eventos_cancelamento.get(job_id)
+    if evento:
+        evento.set()
+    return job
+
+
+def recuperar_jobs_interrompidos(minutos_sem_sinal=5):
+    """
+    Marca como erro os jobs 'executando'/'pendente' sem batimento há mais
+    de `minutos_sem_sinal` (o processo dono morreu). Jobs de outros workers
+    vivos têm atualizado_em renovado a cada INTERVALO_BATIMENTO, inclusive
+    os que ainda esperam na fila. Chamar no startup.
+    """
+    db, JobBackground = _get_models()
+    limite = datetime.utcnow() - timedelta(minutes=minutos_sem_sinal)
+    orfaos = JobBackground.query.filter(
+        JobBackground.status.in_(['pendente', 'executando']),
+        JobBackground.atualizado_em < limite
+    ).all()
+    for job in orfaos:
+        job.status = 'erro'
+        job.erro = 'Execução interrompida (reinício do servidor)'
+        job.finalizado_em = datetime.utcnow()
+    if orfaos:
+        db.session.commit()
+        print(f"⚠️  {len(orfaos)} job(s) interrompido(s) marcados como erro")
+    return len(orfaos)
+
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+
+def _executar(app, job_id):
+    with app.app_context():
+        db, JobBackground = _get_models()
+        cancelar = _eventos_cancelamento.setdefault(job_id, threading.Event())
+
+        job = JobBackground.query.get(job_id)
+        if job is None or job.status != 'pendente':
+            _eventos_cancelamento.pop(job_id, None)
+            return
+
+        job.status = 'executando'
+        job.iniciado_em = datetime.utcnow()
+        job.atualizado_em = job.iniciado_em
+        job.mensagem = 'Iniciando...'
+        db.session.commit()
+
+        estado = {'ultima_gravacao': 0.0, 'ultima_consulta': time.time()}
+
+        def progresso_callback(mensagem, pct=None):
+            try:
+                agora = time.time()
+                if agora - estado['ultima_consulta'] >= INTERVALO_CANCELAMENTO:
+                    estado['ultima_consulta'] = agora
+                    db.session.refresh(job)
+                    if job.cancelar:
+                        cancelar.set()
+                if agora - estado['ultima_gravacao'] < INTERVALO_GRAVACAO:
+                    return
+                estado['ultima_gravacao'] = agora
+                job.mensagem = str(mensagem)[:255]
+                if pct is not None:
+                    job.progresso = max(0, min(int(pct), 100))
+                job.atualizado_em = datetime.utcnow()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"⚠️  Falha ao gravar progresso do job {job_id}: {e}")
+
+        try:
+            print(f"▶️  Job {job.tipo} iniciado: {job_id}")
+            resultado = TIPOS_JOB[job.tipo](job.get_parametros(), progresso_callback, cancelar)
+
+            job = JobBackground.query.get(job_id)
+            job.resultado = json.dumps(resultado, ensure_ascii=False, default=str)
+            if cancelar.is_set() or job.cancelar:
+                job.status = 'cancelado'
+                job.mensagem = 'Cancelado pelo usuário'
+            else:
+                job.status = 'concluido'
+                job.progresso = 100
+                job.mensagem = 'Concluído'
+            print(f"✅ Job {job.tipo} {job.status}: {job_id}")
+
+        except Exception as e:
+            db.session.rollback()
+            job = JobBackground.query.get(job_id)
+            job.status = 'erro'
+            job.erro = str(e)
+            print(f"❌ Job {job.tipo} falhou: {e}")
+
+        finally:
+            job.finalizado_em = datetime.utcnow()
+            job.atualizado_em = job.finalizado_em
+            db.session.commit()
+            _eventos_cancelamento.pop(job_id, None)
+
+
+# ============================================
+# TIPOS DE JOB DO MERCADO LIVRE
+# ============================================
+
+def _ml_api():
+    from mercadolivre_api_secure import ml_api_secure
+    return ml_api_secure
+
+
+@tipo_job('ml_buscar_todos')
+def _job_buscar_todos(parametros, progresso_callback, cancelar):
+    limite = parametros.get('limite')
+    return _ml_api().buscar_todos_anuncios(
+        status=parametros.get('status', 'active'),
+        data_criacao_de=parametros.get('data_de'),
+        data_criacao_ate=parametros.get('data_ate'),
+        limite_total=int(limite) if limite else None,
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 4), 8)),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar,
+        checkpoint_id=parametros.get('checkpoint_id')
+    )
+
+
+@tipo_job('ml_alterar_me2')
+def _job_alterar_me2(parametros, progresso_callback, cancelar):
+    return _ml_api().alterar_multiplos_para_me2(
+        parametros.get('mlbs', []),
+        concorrencia=parametros.get('concorrencia'),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+
+
+@tipo_job('ml_excluir_definitivo')
+def _job_excluir_definitivo(parametros, progresso_callback, cancelar):
+    return _ml_api().excluir_multiplos_definitivo(
+        parametros.get('mlbs', []),
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 4), 8)),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+
+
+@tipo_job('ml_alterar_modelo')
+def _job_alterar_modelo(parametros, progresso_callback, cancelar):
+    return _ml_api().alterar_modelo_multiplos(
+        parametros.get('mlbs', []),
+        parametros.get('modelo_nome'),
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 4), 8)),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+
+
+@tipo_job('ml_manufacturing')
+def _job_manufacturing(parametros, progresso_callback, cancelar):
+    return _ml_api().atualizar_multiplos_manufacturing(
+        parametros.get('atualizacoes', []),
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 4), 8)),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+
+
+@tipo_job('ml_atributos_lote')
+def _job_atributos_lote(parametros, progresso_callback, cancelar):
+    return _ml_api().alterar_atributos_em_massa(
+        parametros.get('edicoes', []),
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 4), 8)),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+
+
+@tipo_job('ml_relatorio_qualidade')
+def _job_relatorio_qualidade(parametros, progresso_callback, cancelar):
+    api = _ml_api()
+    mlbs = parametros.get('mlbs') or api.listar_ids_conta(parametros.get('status', 'active'), cancelar=cancelar)
+    resultado = api.gerar_relatorio_qualidade(
+        mlbs,
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 6), 12)),
+        ordenar_por=parametros.get('ordenar_por', 'pontuacao'),
+        decrescente=bool(parametros.get('decrescente')),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+    if parametros.get('gravar_historico', True) and resultado.get('sucesso') and not cancelar.is_set():
+        from utils.ml_qualidade_historico import gravar_snapshots
+        resultado['snapshots_gravados'] = gravar_snapshots(resultado['linhas'])
+    return resultado
+
+
+@tipo_job('ml_multicontas')
+def _job_multicontas(parametros, progresso_callback, cancelar):
+    from utils.ml_multicontas import executar_em_contas
+    return executar_em_contas(
+        parametros.get('operacao'),
+        parametros=parametros.get('parametros') or {},
+        contas=parametros.get('contas') or None,
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+
+
+@tipo_job('ml_sincronizar_espelho')
+def _job_sincronizar_espelho(parametros, progresso_callback, cancelar):
+    from utils.ml_espelho import sincronizar_espelho
+    return sincronizar_espelho(
+        status=parametros.get('status', 'all'),
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 4), 8)),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
@@ -0,0 +1,180 @@
+# utils/ml_categoria_cache.py
+"""
+Cache dos schemas de categoria do Mercado Livre (/categories/{id}/attributes).
+
+Os schemas mudam raramente e a maioria dos anúncios se concentra em
+poucas categorias, então cada schema fica:
+  - em memória (LRU limitado por quantidade de categorias);
+  - em disco (um JSON por categoria), sobrevivendo a reinícios e
+    compartilhado entre os workers do gunicorn;
+  - válido por `ttl` segundos; depois disso o cliente revalida com
+    If-None-Match usando o ETag guardado (304 só renova a validade).
+
+A busca HTTP fica no cliente (MercadoLivreAPISecure.obter_atributos_categoria);
+este módulo cuida apenas do armazenamento e dos contadores. Leituras e
+gravações em disco acontecem fora do lock global, que só protege a LRU
+em memória e os contadores.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class CacheCategorias:
+
+    def __init__(self, ttl=86400, max_entradas=300, diretorio=None):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.diretorio = Path(diretorio) if diretorio else None
+
+        self._memoria = OrderedDict()   # category_id -> entrada
+        self._lock = threading.Lock()
+        self._locks_categoria = {}
+        self._stats = {
+            'hits_memoria': 0,
+            'hits_disco': 0,
+            'misses': 0,
+            'expirados': 0,
+            'revalidados_304': 0,
+            'baixados': 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Disco
+    # ------------------------------------------------------------------
+
+    def _arquivo(self, category_id):
+        nome = re.sub(r'[^A-Za-z0-9_-]', '_', str(category_id))
+        return self.diretorio / f"{nome}.json"
+
+    def _ler_disco(self, category_id):
+        if not self.diretorio:
+            return None
+        try:
+            with open(self._arquivo(category_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _gravar_disco(self, category_id, entrada):
+        if not self.diretorio:
+            return
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            destino = self._arquivo(category_id)
+            temporario = destino.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(entrada, f, ensure_ascii=False)
+            os.replace(temporario, destino)
+        except OSError as e:
+            print(f"⚠️  Não foi possível gravar cache da categoria {category_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Memória (LRU)
+    # ------------------------------------------------------------------
+
+    def _guardar_memoria(self, category_id, entrada):
+        self._memoria[category_id] = entrada
+        self._memoria.move_to_end(category_id)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def lock_categoria(self, category_id):
+        """Lock por categoria: só uma thread baixa/revalida o mesmo schema"""
+        with self._lock:
+            return self._locks_categoria.setdefault(category_id, threading.Lock())
+
+    def obter(self, category_id, contar=True):
+        """
+        Retorna {'atributos', 'etag', 'salvo_em', 'fresco'} ou None.
+        Entradas vencidas também são devolvidas (fresco=False) para que o
+        cliente possa revalidar com ETag ou usá-las se a API falhar.
+        contar=False não altera os contadores (nova consulta da mesma busca).
+        """
+        with self._lock:
+            entrada = self._memoria.get(category_id)
+            if entrada is not None:
+                self._memoria.move_to_end(category_id)
+        origem = 'hits_memoria'
+
+        if entrada is None:
+            entrada = self._ler_disco(category_id)
+            origem = 'hits_disco'
+
+        with self._lock:
+            if entrada is not None and origem == 'hits_disco':
+                # Outra thread pode ter guardado uma cópia mais nova enquanto líamos o disco
+                atual = self._memoria.get(category_id)
+                if atual is not None and atual.get('salvo_em', 0) >= entrada.get('salvo_em', 0):
+                    entrada = atual
+                else:
+                    self._guardar_memoria(category_id, entrada)
+
+            if entrada is None:
+                if contar:
+                    self._stats['misses'] += 1
+                return None
+
+            fresco = time.time() - entrada.get('salvo_em', 0) < self.ttl
+            if contar:
+                self._stats[origem if fresco else 'expirados'] += 1
+            return {**entrada, 'fresco': fresco}
+
+    def guardar(self, category_id, atributos, etag=None):
+        entrada = {
+            'category_id': category_id,
+            'atributos': atributos,
+            'etag': etag,
+            'salvo_em': time.time(),
+        }
+        with self._lock:
+            self._stats['baixados'] += 1
+            self._guardar_memoria(category_id, entrada)
+        self._gravar_disco(category_id, entrada)
+
+    def revalidar(self, category_id):
+        """Resposta 304: o schema não mudou, só renova a validade"""
+        with self._lock:
+            entrada = self._memoria.get(category_id)
+        if entrada is None:
+            entrada = self._ler_disco(category_id)
+        if entrada is None:
+            return
+        entrada = {**entrada, 'salvo_em': time.time()}
+        with self._lock:
+            self._stats['revalidados_304'] += 1
+            self._guardar_memoria(category_id, entrada)
+        self._gravar_disco(category_id, entrada)
+
+    def invalidar(self, category_id=None):
+        """Remove uma categoria (ou todas) da memória e do disco"""
+        with self._lock:
+            ids = [category_id] if category_id else list(self._memoria)
+            for cid in ids:
+                self._memoria.pop(cid, None)
+        if self.diretorio and self.diretorio.exists():
+            arquivos = [self._arquivo(category_id)] if category_id else list(self.diretorio.glob('*.json'))
+            for arquivo in arquivos:
+                try:
+                    arquivo.unlink()
+                except OSError:
+                    pass
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = sum(self._stats[k] for k in ('hits_memoria', 'hits_disco', 'misses', 'expirados'))
+            hits = self._stats['hits_memoria'] + self._stats['hits_disco']
+            return {
+                **self._stats,
+                'categorias_em_memoria': len(self._memoria),
+                'taxa_acerto': round(hits / consultas * 100, 1) if consultas else 0.0,
+                'ttl_segundos': self.ttl,
+            }
@@ -0,0 +1,180 @@
+# utils/ml_checkpoint.py
+"""
+Checkpoints em disco das varreduras completas da conta (buscar_todos_anuncios).
+
+Cada varredura retomável ganha uma pasta com:
+  - estado.json    parâmetros da varredura, contadores e última posição
+                   (pequeno; é o único arquivo lido pela listagem);
+  - paginas.jsonl  uma linha por página do scroll: IDs recebidos e a
+                   posição (status atual, scroll_id, status concluídos);
+  - lotes.jsonl    uma linha por lote do multi-get concluído: IDs e itens.
+
+Os arquivos .jsonl são só de acréscimo, então uma queda no meio da
+gravação perde no máximo a última linha (ignorada na leitura). Ao retomar,
+os lotes já detalhados são reaproveitados, os IDs coletados e ainda não
+detalhados voltam para a fila e o scroll continua de onde parou.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from config import Config
+
+
+def _ler_jsonl(arquivo):
+    linhas = []
+    try:
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    linhas.append(json.loads(linha))
+                except ValueError:
+                    pass  # última linha incompleta (queda durante a gravação)
+    except OSError:
+        pass
+    return linhas
+
+
+class CheckpointVarredura:
+
+    def __init__(self, checkpoint_id, diretorio=None):
+        self.id = re.sub(r'[^A-Za-z0-9_-]', '_', str(checkpoint_id))
+        self.pasta = Path(diretorio or Config.ML_SCAN_CHECKPOINT_DIR) / self.id
+        self._lock = threading.Lock()
+        self._estado = None
+
+    @staticmethod
+    def novo_id():
+        return uuid.uuid4().hex[:16]
+
+    def existe(self):
+        return (self.pasta / 'estado.json').exists()
+
+    def _gravar_estado(self):
+        """Regrava estado.json de forma atômica (chamar com self._lock ou antes das threads)"""
+        destino = self.pasta / 'estado.json'
+        temporario = destino.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(self._estado, f, ensure_ascii=False, default=str)
+            os.replace(temporario, destino)
+        except OSError as e:
+            print(f"⚠️  Checkpoint {self.id}: não foi possível gravar estado.json: {e}")
+
+    def iniciar(self, parametros):
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self._estado = {
+            'parametros': parametros, 'criado_em': time.time(),
+            'ids_coletados': 0, 'lotes_concluidos': 0, 'posicao': {},
+        }
+        self._gravar_estado()
+
+    def resumo(self):
+        """Só o estado.json (parâmetros, contadores e posição), sem ler os .jsonl"""
+        try:
+            with open(self.pasta / 'estado.json', 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def carregar(self):
+        """
+        Returns:
+            {'parametros', 'ids', 'posicao', 'lotes'} ou None se não existir
+        """
+        try:
+            with open(self.pasta / 'estado.json', 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        ids, posicao = [], {}
+        for pagina in _ler_jsonl(self.pasta / 'paginas.jsonl'):
+            ids.extend(pagina.get('ids', []))
+            posicao = pagina.get('posicao') or posicao
+
+        ids = list(dict.fromkeys(ids))
+        lotes = _ler_jsonl(self.pasta / 'lotes.jsonl')
+
+        # Contadores recalculados a partir dos arquivos (a retomada continua a partir deles)
+        with self._lock:
+            self._estado = {**estado, 'ids_coletados': len(ids), 'lotes_concluidos': len(lotes), 'posicao': posicao}
+            self._gravar_estado()
+
+        return {
+            'parametros': estado.get('parametros', {}),
+            'ids': ids,
+            'posicao': posicao,
+            'lotes': lotes,
+        }
+
+    def _acrescentar(self, nome, registro):
+        with self._lock:
+            try:
+                with open(self.pasta / nome, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+            except OSError as e:
+                print(f"⚠️  Checkpoint {self.id}: não foi possível gravar {nome}: {e}")
+
+    def _contar(self, campo, quantidade, posicao=None):
+        with self._lock:
+            if self._estado is None:
+                return
+            self._estado[campo] = self._estado.get(campo, 0) + quantidade
+            if posicao is not None:
+                self._estado['posicao'] = dict(posicao)
+            self._gravar_estado()
+
+    def registrar_pagina(self, ids, posicao):
+        self._acrescentar('paginas.jsonl', {'ids': ids, 'posicao': posicao})
+        self._contar('ids_coletados', len(ids), posicao)
+
+    def registrar_lote(self, ids, itens):
+        self._acrescentar('lotes.jsonl', {'ids': ids, 'itens': itens})
+        self._contar('lotes_concluidos', 1)
+
+    def concluir(self):
+        """Varredura terminou: o checkpoint não é mais necessário"""
+        shutil.rmtree(self.pasta, ignore_errors=True)
+
+
+def listar_checkpoints(diretorio=None, validade=None, user_id=None):
+    """
+    Checkpoints existentes (mais recentes primeiro), lendo só o estado.json
+    de cada um. Os que não são atualizados há mais de `validade` segundos
+    são apagados. Com user_id, só os da conta ML informada.
+    """
+    base = Path(diretorio or Config.ML_SCAN_CHECKPOINT_DIR)
+    validade = Config.ML_SCAN_CHECKPOINT_TTL if validade is None else validade
+    if not base.exists():
+        return []
+
+    checkpoints = []
+    for pasta in base.iterdir():
+        if not pasta.is_dir():
+            continue
+        atualizado_em = max((a.stat().st_mtime for a in pasta.iterdir()), default=pasta.stat().st_mtime)
+        checkpoint = CheckpointVarredura(pasta.name, base)
+        if time.time() - atualizado_em > validade:
+            checkpoint.concluir()
+            continue
+        estado = checkpoint.resumo()
+        if estado is None:
+            continue
+        parametros = estado.get('parametros', {})
+        if user_id is not None and str(parametros.get('user_id')) != str(user_id):
+            continue
+        checkpoints.append({
+            'checkpoint_id': pasta.name,
+            'parametros': parametros,
+            'ids_coletados': estado.get('ids_coletados', 0),
+            'lotes_concluidos': estado.get('lotes_concluidos', 0),
+            'posicao': estado.get('posicao', {}),
+            'atualizado_em': atualizado_em,
+        })
+    return sorted(checkpoints, key=lambda c: c['atualizado_em'], reverse=True)
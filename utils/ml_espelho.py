@@ -0,0 +1,233 @@
+# utils/ml_espelho.py
+"""
+Espelho local dos anúncios do Mercado Livre (tabela ml_anuncios_espelho).
+
+sincronizar_espelho() percorre o scan da conta e, a cada página, pede ao
+multi-get apenas `id,last_updated`. Só os anúncios novos ou com
+last_updated diferente do espelho são detalhados por completo e
+regravados; o resto não gera tráfego além desse carimbo.
+
+consultar_espelho() responde relatórios direto do banco, no mesmo formato
+de retorno de buscar_todos_anuncios.
+"""
+import time
+from datetime import datetime
+
+from models import db, MLAnuncioEspelho
+
+STATUS_SCAN = ['active', 'paused', 'closed']
+
+
+def _api_padrao():
+    # Importação tardia: mercadolivre_api_secure cria a instância global no import
+    from mercadolivre_api_secure import ml_api_secure
+    return ml_api_secure
+
+
+def _carimbos(api, ids, concorrencia):
+    """{mlb: last_updated} via multi-get reduzido (sem o corpo do anúncio)"""
+    carimbos = {}
+    for wrappers in api._multiget_concorrente(ids, concorrencia=concorrencia, atributos='id,last_updated'):
+        for wrapper in wrappers or []:
+            body = wrapper.get('body') or {}
+            if wrapper.get('code') == 200 and body.get('id'):
+                carimbos[body['id']] = body.get('last_updated')
+    return carimbos
+
+
+def _gravar(api, ids, existentes, seller_id, concorrencia, contagem):
+    """
+    Detalha `ids` por completo e grava no espelho.
+    Retorna os MLBs que o ML não devolveu mais (removidos da conta).
+    """
+    ausentes = []
+    for wrappers in api._multiget_concorrente(ids, concorrencia=concorrencia):
+        if wrappers is None:
+            contagem['erros'] += 1
+            continue
+        for wrapper in wrappers:
+            mlb_id = wrapper.get('id')
+            if wrapper.get('code') != 200 or 'body' not in wrapper:
+                if wrapper.get('code') == 404:
+                    ausentes.append(mlb_id)
+                else:
+                    contagem['erros'] += 1
+                continue
+
+            anuncio = api._processar_anuncio_completo(wrapper['body'])
+            registro = existentes.get(anuncio['id'])
+            if registro is None:
+                registro = MLAnuncioEspelho(mlb=anuncio['id'])
+                db.session.add(registro)
+                contagem['novos'] += 1
+            else:
+                contagem['atualizados'] += 1
+            registro.seller_id = seller_id
+            registro.set_data(anuncio)
+    return ausentes
+
+
+def sincronizar_espelho(status='all', concorrencia=4, progresso_callback=None, cancelar=None, api=None):
+    """
+    Sincroniza o espelho com a conta ML de forma incremental.
+
+    Args:
+        status: 'active' | 'paused' | 'closed' | 'all'
+        concorrencia: lotes do multi-get em paralelo
+        progresso_callback: callback(msg, pct)
+        cancelar: threading.Event que interrompe a sincronização
+        api: cliente MercadoLivreAPISecure (padrão: instância global)
+
+    Returns:
+        dict com sucesso, novos, atualizados, inalterados, removidos, erros
+    """
+    from mercadolivre_api_secure import ErroVarreduraScan
+
+    api = api or _api_padrao()
+    inicio = time.time()
+
+    def _prog(msg, pct):
+        if progresso_callback:
+            try:
+                progresso_callback(msg, pct)
+            except Exception:
+                pass
+
+    try:
+        headers = api._get_headers()
+        resp_me = api._request('GET', '/users/me', headers=headers, timeout=10)
+        if resp_me.status_code != 200:
+            return {'sucesso': False, 'erro': 'Erro ao obter dados do usuário'}
+        seller_id = str(resp_me.json()['id'])
+
+        status_list = STATUS_SCAN if status == 'all' else [status]
+        contagem = {'novos': 0, 'atualizados': 0, 'inalterados': 0, 'removidos': 0, 'erros': 0}
+        vistos = set()
+        total_anteriores, status_anterior, total_estimado = 0, None, 0
+
+        print(f"\n🪞 Sincronizando espelho — seller {seller_id}, status {status_list}")
+        _prog('Comparando anúncios com o espelho local...', 3)
+
+        posicao = {}
+        try:
+            for st, ids_pagina, total_status in api._iterar_paginas_scan(
+                    seller_id, status_list, headers, cancelar, posicao=posicao):
+                if st != status_anterior:
+                    total_anteriores, status_anterior = len(vistos), st
+                total_estimado = total_anteriores + total_status
+
+                ids_pagina = [mlb for mlb in ids_pagina if mlb not in vistos]
+                vistos.update(ids_pagina)
+                if not ids_pagina:
+                    continue
+
+                carimbos = _carimbos(api, ids_pagina, concorrencia)
+                existentes = {
+                    e.mlb: e for e in MLAnuncioEspelho.query.filter(MLAnuncioEspelho.mlb.in_(ids_pagina)).all()
+                }
+                alterados = [
+                    mlb for mlb in ids_pagina
+                    if mlb not in existentes
+                    or carimbos.get(mlb) is None
+                    or existentes[mlb].last_updated != carimbos[mlb]
+                ]
+                contagem['inalterados'] += len(ids_pagina) - len(alterados)
+
+                if alterados:
+                    _gravar(api, alterados, existentes, seller_id, concorrencia, contagem)
+                db.session.commit()
+
+                pct = 5 + round(len(vistos) / max(total_estimado, len(vistos), 1) * 85)
+                _prog(f"Sincronizando... {len(vistos)} de ~{total_estimado} "
+                      f"({contagem['novos'] + contagem['atualizados']} baixados)", pct)
+        except ErroVarreduraScan as e:
+            # Páginas já processadas ficam gravadas; sem o scan completo não dá
+            # para saber quem saiu do filtro, então a revisão dos "sumidos" é pulada.
+            print(f"❌ Varredura do espelho interrompida: {e}")
+            return {'sucesso': False, 'erro': f'Varredura interrompida: {e}', 'total_ids': len(vistos), **contagem}
+
+        if cancelar and cancelar.is_set():
+            print("⏹ Sincronização cancelada")
+            return {'sucesso': False, 'erro': 'Sincronização cancelada', **contagem}
+
+        pendentes = [st for st in status_list if st not in posicao.get('concluidos', [])]
+        if pendentes:
+            return {'sucesso': False, 'erro': f'Varredura incompleta para: {", ".join(pendentes)}',
+                    'total_ids': len(vistos), **contagem}
+
+        # Anúncios do espelho que sumiram do scan mudaram de status ou
+        # foram excluídos: busca de novo para atualizar ou remover.
+        sumidos = [
+            mlb for (mlb,) in db.session.query(MLAnuncioEspelho.mlb)
+            .filter(MLAnuncioEspelho.seller_id == seller_id, MLAnuncioEspelho.status.in_(status_list))
+            .all()
+            if mlb not in vistos
+        ]
+        if sumidos:
+            _prog(f'Revisando {len(sumidos)} anúncios que saíram do filtro...', 92)
+            for i in range(0, len(sumidos), 500):
+                bloco = sumidos[i:i + 500]
+                existentes = {
+                    e.mlb: e for e in MLAnuncioEspelho.query.filter(MLAnuncioEspelho.mlb.in_(bloco)).all()
+                }
+                ausentes = _gravar(api, bloco, existentes, seller_id, concorrencia, contagem)
+                if ausentes:
+                    contagem['removidos'] += MLAnuncioEspelho.query.filter(
+                        MLAnuncioEspelho.mlb.in_(ausentes)
+                    ).delete(synchronize_session=False)
+                db.session.commit()
+
+        duracao = round(time.time() - inicio, 1)
+        print(f"✅ Espelho sincronizado em {duracao}s — {contagem}")
+        _prog('Espelho sincronizado', 95)
+
+        return {
+            'sucesso': True,
+            'seller_id': seller_id,
+            'total_ids': len(vistos),
+            **contagem,
+            'duracao_s': duracao,
+            'timestamp': datetime.now().isoformat()
+        }
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Erro ao sincronizar espelho: {e}")
+        return {'sucesso': False, 'erro': str(e)}
+
+
+def consultar_espelho(status='active', data_criacao_de=None, data_criacao_ate=None,
+                      limite_total=None, seller_id=None):
+    """
+    Consulta o espelho local com os mesmos filtros de buscar_todos_anuncios.
+    Datas em 'YYYY-MM-DD'; status 'all' não filtra.
+    """
+    query = MLAnuncioEspelho.query
+    if seller_id:
+        query = query.filter(MLAnuncioEspelho.seller_id == str(seller_id))
+    if status and status != 'all':
+        query = query.filter(MLAnuncioEspelho.status == status)
+    if data_criacao_de:
+        query = query.filter(MLAnuncioEspelho.date_created >= datetime.strptime(data_criacao_de, '%Y-%m-%d'))
+    if data_criacao_ate:
+        ate = datetime.strptime(data_criacao_ate, '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+        query = query.filter(MLAnuncioEspelho.date_created <= ate)
+
+    ultima_sync = query.with_entities(db.func.max(MLAnuncioEspelho.sincronizado_em)).scalar()
+
+    query = query.order_by(MLAnuncioEspelho.id)
+    if limite_total:
+        query = query.limit(limite_total)
+
+    resultados = [registro.get_data() for registro in query.all()]
+
+    return {
+        'sucesso': True,
+        'fonte': 'espelho',
+        'sincronizado_em': ultima_sync.isoformat() if ultima_sync else None,
+        'total_ids_coletados':  len(resultados),
+        'total_encontrado':     len(resultados),
+        'total_nao_encontrado': 0,
+        'resultados':           resultados,
+        'timestamp': datetime.now().isoformat()
+    }
@@ -0,0 +1,86 @@
+# utils/ml_http.py
+"""
+Sessão HTTP compartilhada para a API do Mercado Livre.
+
+Todas as chamadas do MercadoLivreAPISecure passam por uma única
+requests.Session com pool de conexões keep-alive. Assim as milhares de
+requisições de uma varredura completa reaproveitam o mesmo socket TLS
+em vez de pagar um handshake novo a cada chamada.
+"""
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def criar_sessao_ml(pool_size=20, max_retries=3, backoff_factor=0.5):
+    """
+    Cria a sessão com pool de conexões e adaptador de retry.
+
+    Args:
+        pool_size: conexões mantidas abertas por host (também é o número
+            de threads que conseguem usar a sessão sem abrir conexões extras)
+        max_retries: tentativas automáticas para falhas de conexão
+            (429/5xx são tratados pelo limitador de taxa do cliente)
+        backoff_factor: espera exponencial entre as tentativas
+
+    Returns:
+        requests.Session pronta para uso concorrente
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(),
+        allowed_methods=frozenset(['GET', 'PUT', 'DELETE', 'HEAD', 'OPTIONS']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+
+    sessao = requests.Session()
+    sessao.mount('https://', adapter)
+    sessao.mount('http://', adapter)
+    sessao.headers.update({'Connection': 'keep-alive'})
+    return sessao
+
+
+def estatisticas_pool(sessao):
+    """
+    Soma os contadores dos pools do urllib3 montados na sessão.
+
+    Cada pool conta quantas conexões abriu (num_connections) e quantas
+    requisições enviou (num_requests); a diferença são as requisições
+    que reaproveitaram uma conexão já aberta.
+    """
+    abertas = 0
+    requisicoes = 0
+    hosts = []
+
+    adaptadores = {id(a): a for a in sessao.adapters.values()}
+    for adapter in adaptadores.values():
+        pools = getattr(getattr(adapter, 'poolmanager', None), 'pools', None)
+        if pools is None:
+            continue
+        for chave in list(pools.keys()):
+            pool = pools.get(chave)
+            if pool is None:
+                continue
+            abertas += getattr(pool, 'num_connections', 0)
+            requisicoes += getattr(pool, 'num_requests', 0)
+            hosts.append(getattr(pool, 'host', str(chave)))
+
+    reutilizadas = max(requisicoes - abertas, 0)
+    return {
+        'conexoes_abertas': abertas,
+        'requisicoes': requisicoes,
+        'conexoes_reutilizadas': reutilizadas,
+        'taxa_reuso': round(reutilizadas / requisicoes * 100, 1) if requisicoes else 0.0,
+        'hosts': hosts,
+    }
@@ -0,0 +1,155 @@
+# utils/ml_multicontas.py
+"""
+Execução de operações de leitura em todas as contas do Mercado Livre.
+
+Cada conta usa seu próprio cliente (mercadolivre_api_secure.cliente_ml),
+com limitador de taxa separado, e as contas rodam em paralelo. Os
+resultados voltam juntos, com cada linha marcada pela conta de origem
+(conta_id / conta_nome) e um resumo por conta em 'por_conta'.
+
+Novas operações são registradas com @operacao_multicontas('nome'); a função
+recebe (api, parametros, cancelar, progresso_callback) e devolve um dict.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+from config import Config
+
+OPERACOES = {}
+
+# Chaves com listas de linhas que são concatenadas entre as contas
+CHAVES_LISTA = ('resultados', 'linhas')
+
+
+def operacao_multicontas(nome):
+    """Registra uma função como operação disponível para o fan-out"""
+    def decorator(func):
+        OPERACOES[nome] = func
+        return func
+    return decorator
+
+
+@operacao_multicontas('resumo')
+def _op_resumo(api, parametros, cancelar, progresso_callback):
+    return api.resumo_conta()
+
+
+@operacao_multicontas('varredura')
+def _op_varredura(api, parametros, cancelar, progresso_callback):
+    limite = parametros.get('limite')
+    return api.buscar_todos_anuncios(
+        status=parametros.get('status', 'active'),
+        data_criacao_de=parametros.get('data_de'),
+        data_criacao_ate=parametros.get('data_ate'),
+        limite_total=int(limite) if limite else None,
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 4), 8)),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+
+
+@operacao_multicontas('qualidade')
+def _op_qualidade(api, parametros, cancelar, progresso_callback):
+    mlbs = api.listar_ids_conta(parametros.get('status', 'active'), cancelar=cancelar)
+    return api.gerar_relatorio_qualidade(
+        mlbs,
+        concorrencia=max(1, min(int(parametros.get('concorrencia') or 6), 12)),
+        progresso_callback=progresso_callback,
+        cancelar=cancelar
+    )
+
+
+def executar_em_contas(operacao, parametros=None, contas=None, concorrencia=None,
+                       progresso_callback=None, cancelar=None):
+    """
+    Executa `operacao` em todas as contas com token (ou só nas `contas` informadas).
+
+    O progresso de cada conta é acumulado e repassado ao progresso_callback
+    sempre na thread chamadora (os callbacks de job gravam no banco).
+
+    Returns:
+        {'sucesso', 'operacao', 'total_contas', 'contas_ok', 'por_conta', <listas marcadas>, 'timestamp'}
+    """
+    from mercadolivre_api_secure import cliente_ml
+    from token_manager_secure import ml_token_manager
+
+    if operacao not in OPERACOES:
+        return {'sucesso': False, 'erro': f'Operação inválida: {operacao}', 'operacoes': sorted(OPERACOES)}
+
+    parametros = parametros or {}
+    cancelar = cancelar or threading.Event()
+    concorrencia = concorrencia or Config.ML_MULTICONTAS_CONCORRENCIA
+
+    ids = list(contas or ml_token_manager.accounts.keys())
+    nomes = {i: (ml_token_manager.accounts.get(i) or {}).get('account_name', i) for i in ids}
+
+    por_conta = {}
+    executar = []
+    for account_id in ids:
+        conta = ml_token_manager.accounts.get(account_id)
+        if conta is None:
+            por_conta[account_id] = {'sucesso': False, 'erro': 'Conta não encontrada'}
+        elif not conta.get('access_token'):
+            por_conta[account_id] = {'sucesso': False, 'erro': 'Conta não tem token configurado'}
+        else:
+            executar.append(account_id)
+
+    print(f"🌐 Operação '{operacao}' em {len(executar)} conta(s) ({concorrencia} em paralelo)")
+
+    andamento = {account_id: (0, 'Aguardando...') for account_id in executar}
+    andamento_lock = threading.Lock()
+
+    def _rodar(account_id):
+        def _prog(msg, pct=None):
+            with andamento_lock:
+                andamento[account_id] = (pct if pct is not None else andamento[account_id][0], msg)
+        return OPERACOES[operacao](cliente_ml(account_id), parametros, cancelar, _prog)
+
+    def _informar():
+        if not progresso_callback or not andamento:
+            return
+        with andamento_lock:
+            media = sum(p for p, _ in andamento.values()) / len(andamento)
+            ativas = sum(1 for p, _ in andamento.values() if p < 100)
+        try:
+            progresso_callback(f"{len(executar) - ativas} de {len(executar)} contas concluídas", round(media))
+        except Exception:
+            pass
+
+    if executar:
+        with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(executar)))) as executor:
+            futures = {executor.submit(_rodar, account_id): account_id for account_id in executar}
+            pendentes = set(futures)
+            while pendentes:
+                concluidos, pendentes = wait(pendentes, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in concluidos:
+                    account_id = futures[future]
+                    try:
+                        por_conta[account_id] = future.result() or {}
+                    except Exception as e:
+                        por_conta[account_id] = {'sucesso': False, 'erro': str(e)}
+                    with andamento_lock:
+                        andamento[account_id] = (100, 'Concluído')
+                    status = '✅' if por_conta[account_id].get('sucesso') else '❌'
+                    print(f"   {status} {nomes[account_id]}")
+                _informar()
+
+    resultado = {
+        'sucesso': any(r.get('sucesso') for r in por_conta.values()),
+        'operacao': operacao,
+        'total_contas': len(ids),
+        'contas_ok': sum(1 for r in por_conta.values() if r.get('sucesso')),
+        'por_conta': {},
+        'timestamp': datetime.now().isoformat()
+    }
+    for account_id in ids:
+        parcial = dict(por_conta.get(account_id) or {})
+        for chave in CHAVES_LISTA:
+            linhas = parcial.pop(chave, None)
+            if isinstance(linhas, list):
+                resultado.setdefault(chave, []).extend(
+                    {**linha, 'conta_id': account_id, 'conta_nome': nomes[account_id]} for linha in linhas
+                )
+        resultado['por_conta'][account_id] = {**parcial, 'conta_nome': nomes[account_id]}
+    return resultado
@@ -0,0 +1,124 @@
+# utils/ml_qualidade_historico.py
+"""
+Histórico de qualidade dos anúncios (tabela ml_qualidade_snapshots).
+
+Os relatórios em massa gravam uma foto por anúncio; as consultas abaixo
+respondem aos dashboards direto do banco:
+  - queda_de_pontuacao(): quem piorou desde N dias atrás;
+  - piores_anuncios(): os N anúncios com menor score na foto mais recente;
+  - historico_mlb(): a evolução de um anúncio.
+"""
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func
+
+from models import db, MLQualidadeSnapshot
+
+
+def gravar_snapshots(linhas, capturado_em=None):
+    """
+    Grava as linhas de gerar_relatorio_qualidade que têm pontuação.
+    Retorna a quantidade de fotos gravadas.
+    """
+    capturado_em = capturado_em or datetime.utcnow()
+    total = 0
+    try:
+        for linha in linhas:
+            if linha.get('pontuacao') is None:
+                continue
+            db.session.add(MLQualidadeSnapshot(
+                mlb=linha['mlb'],
+                pontuacao=linha['pontuacao'],
+                nivel=linha.get('nivel'),
+                origem=linha.get('origem'),
+                total_pendencias=linha.get('total_pendencias', 0),
+                pendencias=json.dumps(linha.get('pendencias') or {}, ensure_ascii=False),
+                titulo=(linha.get('titulo') or '')[:255] or None,
+                categoria=linha.get('categoria'),
+                capturado_em=capturado_em
+            ))
+            total += 1
+        db.session.commit()
+        print(f"✅ {total} fotos de qualidade gravadas")
+        return total
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Erro ao gravar histórico de qualidade: {e}")
+        return 0
+
+
+def _ultima_foto_por_mlb(ate=None):
+    """Subquery (mlb, capturado_em) da foto mais recente de cada MLB, opcionalmente até uma data"""
+    query = db.session.query(
+        MLQualidadeSnapshot.mlb.label('mlb'),
+        func.max(MLQualidadeSnapshot.capturado_em).label('capturado_em')
+    )
+    if ate is not None:
+        query = query.filter(MLQualidadeSnapshot.capturado_em <= ate)
+    return query.group_by(MLQualidadeSnapshot.mlb).subquery()
+
+
+def _fotos_de(subquery):
+    alias = db.aliased(MLQualidadeSnapshot)
+    return alias, and_(alias.mlb == subquery.c.mlb, alias.capturado_em == subquery.c.capturado_em)
+
+
+def queda_de_pontuacao(dias=7, queda_minima=1.0, limite=100):
+    """
+    Anúncios cuja foto atual tem score menor que a última foto de `dias` atrás.
+
+    Returns:
+        lista de dicts ordenada pela maior queda
+    """
+    corte = datetime.utcnow() - timedelta(days=dias)
+    atual_sq = _ultima_foto_por_mlb()
+    antes_sq = _ultima_foto_por_mlb(ate=corte)
+    atual, cond_atual = _fotos_de(atual_sq)
+    antes, cond_antes = _fotos_de(antes_sq)
+
+    queda = (antes.pontuacao - atual.pontuacao).label('queda')
+    linhas = (
+        db.session.query(atual, antes.pontuacao.label('pontuacao_anterior'),
+                         antes.capturado_em.label('capturado_anterior'), queda)
+        .join(atual_sq, cond_atual)
+        .join(antes_sq, antes_sq.c.mlb == atual.mlb)
+        .join(antes, cond_antes)
+        .filter(antes.pontuacao - atual.pontuacao >= queda_minima)
+        .order_by(queda.desc())
+        .limit(limite)
+        .all()
+    )
+
+    return [
+        {
+            **foto.to_dict(),
+            'pontuacao_anterior': anterior,
+            'capturado_anterior': capturado_anterior.isoformat() if capturado_anterior else None,
+            'queda': round(valor_queda, 1),
+        }
+        for foto, anterior, capturado_anterior, valor_queda in linhas
+    ]
+
+
+def piores_anuncios(n=20, nivel=None):
+    """Os `n` anúncios com menor score considerando só a foto mais recente de cada um"""
+    atual_sq = _ultima_foto_por_mlb()
+    atual, cond_atual = _fotos_de(atual_sq)
+
+    query = db.session.query(atual).join(atual_sq, cond_atual)
+    if nivel:
+        query = query.filter(atual.nivel == nivel)
+    return [foto.to_dict() for foto in query.order_by(atual.pontuacao.asc()).limit(n).all()]
+
+
+def historico_mlb(mlb, dias=90):
+    """Evolução do score de um anúncio (mais antigo primeiro)"""
+    desde = datetime.utcnow() - timedelta(days=dias)
+    fotos = (
+        MLQualidadeSnapshot.query
+        .filter(MLQualidadeSnapshot.mlb == mlb, MLQualidadeSnapshot.capturado_em >= desde)
+        .order_by(MLQualidadeSnapshot.capturado_em.asc())
+        .all()
+    )
+    return [foto.to_dict() for foto in fotos]
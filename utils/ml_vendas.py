@@ -0,0 +1,348 @@
+# utils/ml_vendas.py
+"""
+Vendas do Mercado Livre agregadas por dia (tabelas ml_vendas_dia,
+ml_vendas_pedido e ml_vendas_marca).
+
+atualizar_vendas() faz duas buscas em /orders/search, cada uma com a
+primeira página (que informa o total) e as demais baixadas em paralelo:
+
+- pedidos novos: só os criados a partir da marca d'água da conta,
+  ordenados por data (date_asc). Cada um é gravado em ml_vendas_pedido com
+  o quanto soma ao seu dia e somado em ml_vendas_dia; a marca avança para o
+  último pedido somado. Se alguma página falhar, só as páginas contíguas
+  anteriores a ela são somadas; o restante volta na próxima atualização.
+- revisão: pedidos já somados que o ML atualizou depois da última revisão.
+  Se o status mudou (cancelado, inválido...), só a diferença é aplicada ao
+  dia, então cancelamentos saem das vendas já somadas.
+
+resumo_vendas() responde o dashboard direto do banco (vendas, pedidos e
+ticket médio dos últimos N dias).
+
+O dia de cada pedido, a janela da primeira carga e o "hoje" do resumo
+usam o mesmo fuso (Config.ML_VENDAS_FUSO), independente do fuso do
+servidor e do offset devolvido pelo ML.
+"""
+import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from models import db, MLVendasDia, MLVendasMarca, MLVendasPedido
+
+POR_PAGINA = 50   # máximo aceito por /orders/search
+STATUS_IGNORADOS = {'cancelled', 'invalid'}   # pedidos que não entram nas vendas
+MARGEM_REVISAO = timedelta(minutes=10)        # sobreposição: o ML demora a indexar as atualizações
+LOTE_CONSULTA = 500                           # IDs por IN (...) na consulta de ml_vendas_pedido
+
+
+def _fuso():
+    try:
+        return ZoneInfo(Config.ML_VENDAS_FUSO)
+    except (ZoneInfoNotFoundError, ValueError):
+        # Sem base tzdata (ex.: Windows sem o pacote): horário de Brasília fixo
+        return timezone(timedelta(hours=-3))
+
+
+FUSO = _fuso()
+
+
+def _api_padrao():
+    # Importação tardia: mercadolivre_api_secure cria a instância global no import
+    from mercadolivre_api_secure import ml_api_secure
+    return ml_api_secure
+
+
+def _data_pedido(pedido):
+    try:
+        return datetime.fromisoformat((pedido.get('date_created') or '').replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def _valor_pedido(pedido):
+    try:
+        return float(pedido.get('total_amount', pedido.get('total', 0)) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _contribuicao(pedido):
+    """(conta, valor) que o pedido soma ao seu dia em ml_vendas_dia"""
+    if pedido.get('status') in STATUS_IGNORADOS:
+        return False, 0.0
+    return True, _valor_pedido(pedido)
+
+
+def _hoje():
+    return datetime.now(FUSO).date()
+
+
+def _inicio_janela(dias):
+    """Meia-noite (em FUSO) de `dias` dias atrás, contando hoje"""
+    inicio = datetime.combine(_hoje() - timedelta(days=dias - 1), datetime.min.time(), tzinfo=FUSO)
+    return inicio.isoformat(timespec='milliseconds')
+
+
+def _buscar_paginas(api, headers, params, concorrencia):
+    """
+    Busca em /orders/search a primeira página e, em paralelo, as demais.
+
+    Returns:
+        (páginas na ordem dos offsets, com None nas que falharam, total
+        informado pela primeira) ou None se a primeira falhar
+    """
+    def _pagina(offset):
+        resp = api._request('GET', '/orders/search', headers=headers,
+                            params={**params, 'offset': offset}, timeout=15)
+        if resp.status_code != 200:
+            print(f"  ⚠️  /orders/search offset {offset}: HTTP {resp.status_code}")
+            return None
+        return resp.json()
+
+    primeira = _pagina(0)
+    if primeira is None:
+        return None
+    total = (primeira.get('paging') or {}).get('total', 0)
+
+    paginas = [primeira]
+    offsets = list(range(POR_PAGINA, total, POR_PAGINA))
+    if offsets:
+        with ThreadPoolExecutor(max_workers=max(1, min(concorrencia, len(offsets)))) as executor:
+            paginas.extend(executor.map(_pagina, offsets))
+    return paginas, total
+
+
+def _pedidos_atualizados(api, headers, seller_id, desde, concorrencia):
+    """Pedidos da conta atualizados pelo ML a partir de `desde` -> ({order_id: pedido}, completo)"""
+    params = {
+        'seller': seller_id,
+        'order.date_last_updated.from': desde,
+        'sort': 'date_asc',
+        'limit': POR_PAGINA,
+    }
+    busca = _buscar_paginas(api, headers, params, concorrencia)
+    if busca is None:
+        return {}, False
+
+    paginas, total = busca
+    atualizados, completo = {}, True
+    for pagina in paginas:
+        if pagina is None:
+            completo = False
+            continue
+        # Pedidos atualizados durante a busca deslocam as páginas: algum pode ter ficado de fora
+        if (pagina.get('paging') or {}).get('total', total) != total:
+            completo = False
+        for pedido in pagina.get('results', []):
+            if pedido.get('id') is not None:
+                atualizados[str(pedido['id'])] = pedido
+    return atualizados, completo
+
+
+def _registrados(seller_id, order_ids):
+    """Linhas de ml_vendas_pedido dos IDs informados, por order_id"""
+    order_ids = list(order_ids)
+    registrados = {}
+    for i in range(0, len(order_ids), LOTE_CONSULTA):
+        for linha in MLVendasPedido.query.filter(
+            MLVendasPedido.seller_id == seller_id,
+            MLVendasPedido.order_id.in_(order_ids[i:i + LOTE_CONSULTA])
+        ).all():
+            registrados[linha.order_id] = linha
+    return registrados
+
+
+def atualizar_vendas(concorrencia=None, dias_iniciais=7, api=None):
+    """
+    Soma em ml_vendas_dia os pedidos criados desde a marca d'água da conta
+    e aplica as mudanças de status dos pedidos já somados.
+
+    Args:
+        concorrencia: páginas de /orders/search buscadas em paralelo
+        dias_iniciais: janela da primeira carga (conta ainda sem marca)
+        api: cliente MercadoLivreAPISecure (padrão: instância global)
+
+    Returns:
+        dict com sucesso, seller_id, novos_pedidos, revisados, paginas, completo, marca
+    """
+    api = api or _api_padrao()
+    concorrencia = concorrencia or Config.ML_PEDIDOS_CONCORRENCIA
+
+    try:
+        headers = api._get_headers()
+        resp_me = api._request('GET', '/users/me', headers=headers, timeout=10)
+        if resp_me.status_code != 200:
+            return {'sucesso': False, 'erro': 'Erro ao obter dados do usuário'}
+        seller_id = str(resp_me.json()['id'])
+
+        marca = MLVendasMarca.query.filter_by(seller_id=seller_id).first()
+        anterior = marca.ultimo_pedido_em if marca else None
+        revisado_anterior = marca.revisado_ate if marca else None
+        ja_somados = marca.get_ids_no_limite() if marca else set()
+        # Próxima revisão parte daqui: o que o ML atualizar durante esta busca entra nela
+        inicio = datetime.now(FUSO).isoformat(timespec='milliseconds')
+
+        # 1. Pedidos novos
+        params = {
+            'seller': seller_id,
+            'order.date_created.from': anterior or _inicio_janela(dias_iniciais),
+            'sort': 'date_asc',
+            'limit': POR_PAGINA,
+        }
+        busca = _buscar_paginas(api, headers, params, concorrencia)
+        if busca is None:
+            return {'sucesso': False, 'erro': 'Erro ao buscar pedidos', 'seller_id': seller_id}
+        paginas, _ = busca
+
+        # Só o prefixo contíguo de páginas: a marca nunca passa de um pedido não somado
+        pedidos, completo = [], True
+        for pagina in paginas:
+            if pagina is None:
+                completo = False
+                break
+            pedidos.extend(pagina.get('results', []))
+
+        novos_pedidos = {}
+        vistos = set()
+        ultimo, ultimo_txt, ids_no_limite = None, anterior, set()
+        if anterior:
+            ultimo = _data_pedido({'date_created': anterior})
+            ids_no_limite = set(ja_somados)
+
+        for pedido in pedidos:
+            pedido_id, criado_em = pedido.get('id'), _data_pedido(pedido)
+            if pedido_id is None or criado_em is None or pedido_id in vistos:
+                continue
+            vistos.add(pedido_id)
+            if criado_em == ultimo:
+                ids_no_limite.add(pedido_id)
+            elif ultimo is None or criado_em > ultimo:
+                ultimo, ultimo_txt, ids_no_limite = criado_em, pedido['date_created'], {pedido_id}
+            if pedido_id in ja_somados:
+                continue
+            novos_pedidos[str(pedido_id)] = (criado_em.astimezone(FUSO).date(), pedido)
+
+        # 2. Revisão dos pedidos já somados (a primeira carga não tem o que revisar)
+        atualizados, revisao_completa = {}, True
+        if marca is not None:
+            if revisado_anterior:
+                desde = (datetime.fromisoformat(revisado_anterior) - MARGEM_REVISAO).isoformat(timespec='milliseconds')
+            else:
+                desde = _inicio_janela(dias_iniciais)
+            atualizados, revisao_completa = _pedidos_atualizados(api, headers, seller_id, desde, concorrencia)
+            if not revisao_completa:
+                print(f"  ⚠️  Vendas ML {seller_id}: revisão parcial, repetida na próxima atualização")
+
+        if marca is None and not novos_pedidos:
+            print(f"📊 Vendas ML {seller_id}: nenhum pedido na janela inicial")
+            return {'sucesso': True, 'seller_id': seller_id, 'novos_pedidos': 0, 'revisados': 0,
+                    'paginas': len(paginas), 'completo': completo, 'marca': anterior}
+
+        nova_marca = {'revisado_ate': inicio if revisao_completa else revisado_anterior}
+        if novos_pedidos:
+            nova_marca.update({
+                'ultimo_pedido_em': ultimo_txt,
+                'ids_no_limite': json.dumps(sorted(ids_no_limite)),
+            })
+        # A marca é gravada antes dos totais e condicionada à marca lida:
+        # outro worker que somou os mesmos pedidos antes faz esta transação desistir.
+        if marca is None:
+            db.session.add(MLVendasMarca(seller_id=seller_id, **nova_marca))
+            db.session.flush()
+        elif not MLVendasMarca.query.filter_by(
+            seller_id=seller_id, ultimo_pedido_em=anterior, revisado_ate=revisado_anterior
+        ).update(nova_marca, synchronize_session=False):
+            db.session.rollback()
+            print(f"⏭️  Vendas ML {seller_id}: atualizadas por outro processo")
+            return {'sucesso': True, 'seller_id': seller_id, 'novos_pedidos': 0, 'revisados': 0,
+                    'paginas': len(paginas), 'completo': completo, 'marca': anterior}
+
+        registrados = _registrados(seller_id, set(novos_pedidos) | set(atualizados))
+        por_dia = defaultdict(lambda: [0, 0.0])
+        novos = 0
+        for order_id, (dia, pedido) in novos_pedidos.items():
+            if order_id in registrados:
+                continue
+            conta, valor = _contribuicao(pedido)
+            db.session.add(MLVendasPedido(seller_id=seller_id, order_id=order_id, dia=dia,
+                                          status=pedido.get('status'), conta=conta, total=valor))
+            if conta:
+                por_dia[dia][0] += 1
+                por_dia[dia][1] += valor
+                novos += 1
+
+        # Pedidos ainda não somados (novos ou anteriores à primeira carga) não são revisados
+        revisados = 0
+        for order_id, pedido in atualizados.items():
+            registro = registrados.get(order_id)
+            if registro is None:
+                continue
+            conta, valor = _contribuicao(pedido)
+            conta_antes, valor_antes = bool(registro.conta), registro.total or 0.0
+            registro.status = pedido.get('status')
+            if conta == conta_antes and abs(valor - valor_antes) < 0.005:
+                continue
+            por_dia[registro.dia][0] += int(conta) - int(conta_antes)
+            por_dia[registro.dia][1] += valor - valor_antes
+            registro.conta, registro.total = conta, valor
+            revisados += 1
+
+        print(f"📊 Vendas ML {seller_id}: {novos} pedido(s) novo(s) e {revisados} revisado(s) em "
+              f"{len(paginas)} página(s){'' if completo else ' (parcial)'}")
+
+        if por_dia:
+            existentes = {
+                linha.dia: linha for linha in MLVendasDia.query.filter(
+                    MLVendasDia.seller_id == seller_id, MLVendasDia.dia.in_(list(por_dia))
+                ).all()
+            }
+            for dia, (qtd, valor) in por_dia.items():
+                linha = existentes.get(dia)
+                if linha is None:
+                    db.session.add(MLVendasDia(seller_id=seller_id, dia=dia, pedidos=qtd, total=valor))
+                else:
+                    linha.pedidos = (linha.pedidos or 0) + qtd
+                    linha.total = (linha.total or 0.0) + valor
+        db.session.commit()
+
+        return {
+            'sucesso': True,
+            'seller_id': seller_id,
+            'novos_pedidos': novos,
+            'revisados': revisados,
+            'paginas': len(paginas),
+            'completo': completo and revisao_completa,
+            'marca': ultimo_txt,
+        }
+
+    except IntegrityError:
+        db.session.rollback()
+        print("⏭️  Vendas ML: primeira carga feita por outro processo")
+        return {'sucesso': True, 'seller_id': seller_id, 'novos_pedidos': 0, 'revisados': 0, 'completo': True}
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Erro ao atualizar vendas ML: {e}")
+        return {'sucesso': False, 'erro': str(e)}
+
+
+def resumo_vendas(seller_id, dias=7):
+    """Vendas, pedidos e ticket médio dos últimos `dias` dias (hoje incluso) a partir do banco"""
+    desde = _hoje() - timedelta(days=dias - 1)
+    linhas = (
+        MLVendasDia.query
+        .filter(MLVendasDia.seller_id == str(seller_id), MLVendasDia.dia >= desde)
+        .order_by(MLVendasDia.dia.asc())
+        .all()
+    )
+    pedidos = sum(linha.pedidos or 0 for linha in linhas)
+    total = sum(linha.total or 0.0 for linha in linhas)
+    return {
+        'vendas': round(total, 2),
+        'pedidos': pedidos,
+        'ticket_medio': round(total / pedidos, 2) if pedidos else 0,
+        'por_dia': [linha.to_dict() for linha in linhas],
+    }
@@ -0,0 +1,130 @@
+# utils/rate_limiter.py
+"""
+Limitador de taxa adaptativo (token bucket) para a API do Mercado Livre.
+
+Um único limitador por processo fica na frente de todas as requisições
+do cliente ML. Ele libera no máximo `rps` requisições por segundo
+(com rajada de `rajada` fichas), reduz a taxa pela metade quando a API
+responde 429/5xx, pausa todo o tráfego pelo tempo pedido no Retry-After
+e volta a acelerar sozinho depois de uma sequência de sucessos.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class LimitadorTaxaAdaptativo:
+    """
+    Token bucket thread-safe com ajuste AIMD da taxa.
+
+    Args:
+        rps: taxa máxima (requisições por segundo)
+        rps_minimo: piso da taxa após reduções sucessivas
+        rajada: fichas acumuláveis (requisições liberadas de uma vez)
+        sucessos_para_subir: respostas OK seguidas antes de aumentar a taxa
+        incremento: quanto a taxa sobe a cada aumento (req/s)
+    """
+
+    def __init__(self, rps=10.0, rps_minimo=1.0, rajada=None, sucessos_para_subir=20, incremento=0.5):
+        self.rps_maximo = float(rps)
+        self.rps_minimo = min(float(rps_minimo), self.rps_maximo)
+        self.rajada = float(rajada or max(1.0, self.rps_maximo))
+        self.sucessos_para_subir = sucessos_para_subir
+        self.incremento = incremento
+
+        self._lock = threading.Lock()
+        self._taxa = self.rps_maximo
+        self._fichas = self.rajada
+        self._ultima_recarga = time.monotonic()
+        self._pausado_ate = 0.0
+        self._sucessos_seguidos = 0
+
+        self._total_liberadas = 0
+        self._total_limitadas = 0
+        self._tempo_espera = 0.0
+
+    # ------------------------------------------------------------------
+    # Liberação
+    # ------------------------------------------------------------------
+
+    def _recarregar(self, agora):
+        decorrido = agora - self._ultima_recarga
+        if decorrido > 0:
+            self._fichas = min(self.rajada, self._fichas + decorrido * self._taxa)
+            self._ultima_recarga = agora
+
+    def adquirir(self):
+        """Bloqueia até haver uma ficha disponível (e fora de pausa por Retry-After)"""
+        esperou = 0.0
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                if agora < self._pausado_ate:
+                    espera = self._pausado_ate - agora
+                else:
+                    self._recarregar(agora)
+                    if self._fichas >= 1:
+                        self._fichas -= 1
+                        self._total_liberadas += 1
+                        self._tempo_espera += esperou
+                        return esperou
+                    espera = (1 - self._fichas) / self._taxa
+            time.sleep(espera)
+            esperou += espera
+
+    # ------------------------------------------------------------------
+    # Realimentação
+    # ------------------------------------------------------------------
+
+    def registrar_sucesso(self):
+        """Resposta dentro do limite: após N seguidas, acelera um degrau"""
+        with self._lock:
+            self._sucessos_seguidos += 1
+            if self._sucessos_seguidos >= self.sucessos_para_subir and self._taxa < self.rps_maximo:
+                self._taxa = min(self.rps_maximo, self._taxa + self.incremento)
+                self._sucessos_seguidos = 0
+
+    def registrar_limite(self, retry_after=None):
+        """
+        429/5xx: corta a taxa pela metade e, se a API informou Retry-After,
+        segura todas as threads até esse instante.
+        """
+        with self._lock:
+            self._total_limitadas += 1
+            self._sucessos_seguidos = 0
+            self._taxa = max(self.rps_minimo, self._taxa / 2)
+            self._fichas = min(self._fichas, 0.0)
+            if retry_after:
+                self._pausado_ate = max(self._pausado_ate, time.monotonic() + retry_after)
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'taxa_atual': round(self._taxa, 2),
+                'taxa_maxima': self.rps_maximo,
+                'taxa_minima': self.rps_minimo,
+                'liberadas': self._total_liberadas,
+                'limitadas': self._total_limitadas,
+                'espera_total_s': round(self._tempo_espera, 2),
+                'pausado': time.monotonic() < self._pausado_ate,
+            }
+
+
+def ler_retry_after(valor):
+    """Converte o header Retry-After (segundos ou data HTTP) em segundos; None se ausente/inválido"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def espera_backoff(tentativa, base=0.5, maximo=30.0):
+    """Backoff exponencial com jitter completo: uniforme em [0, min(maximo, base * 2^tentativa)]"""
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
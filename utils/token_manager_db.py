@@ -1,4 +1,6 @@
 # utils/token_manager_db.py
+import time
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 
 
@@ -12,6 +14,92 @@ def _get_models():
     return db, TokenConfig
 
 
+def _contexto_app():
+    """
+    Contexto Flask para acessar o banco fora de uma requisição
+    (threads de trabalho, jobs em background). Dentro de uma requisição
+    reaproveita o contexto atual.
+    """
+    import sys
+    from flask import has_app_context
+    if has_app_context():
+        return nullcontext()
+    # `python app.py` registra o módulo como __main__, não como 'app'
+    modulo = sys.modules.get('app') or sys.modules.get('__main__')
+    app = getattr(modulo, 'app', None)
+    if app is None:
+        from app import app
+    return app.app_context()
+
+
+@contextmanager
+def bloquear_token(service, espera_maxima=45):
+    """
+    Trava a linha do serviço em token_configs até o fim do bloco `with`.
+
+    O UPDATE "vazio" abre a transação de escrita: no PostgreSQL trava a
+    linha (outros workers esperam no mesmo UPDATE); no SQLite pega o lock
+    de escrita do arquivo. O SELECT ... FOR UPDATE reforça o lock onde o
+    banco suporta. Entrega {'data': dict_atual}; se o bloco marcar
+    estado['alterado'] = True, o dict é gravado no mesmo commit.
+
+    O bloco deve ser curto (só leitura e ajuste do dict): no SQLite o lock
+    é do banco inteiro e segura todos os outros escritores. Chamadas HTTP
+    ficam fora dele.
+
+    Uso:
+        with bloquear_token('mercadolivre') as estado:
+            estado['data']['accounts'][...] = ...
+            estado['alterado'] = True
+    """
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    db, TokenConfig = _get_models()
+
+    with _contexto_app():
+        inicio = time.time()
+        while True:
+            try:
+                db.session.execute(
+                    text("UPDATE token_configs SET updated_at = updated_at WHERE service = :service"),
+                    {'service': service}
+                )
+                break
+            except OperationalError:
+                # SQLite: "database is locked" enquanto outro worker renova
+                db.session.rollback()
+                if time.time() - inicio > espera_maxima:
+                    raise
+                time.sleep(0.5)
+
+        try:
+            config = (
+                TokenConfig.query
+                .filter_by(service=service)
+                .with_for_update()
+                .populate_existing()
+                .first()
+            )
+            estado = {'data': config.get_data() if config else {}, 'alterado': False}
+
+            yield estado
+
+            if estado.get('alterado'):
+                if config:
+                    config.set_data(estado['data'])
+                    config.updated_at = datetime.utcnow()
+                else:
+                    config = TokenConfig(service=service)
+                    config.set_data(estado['data'])
+                    db.session.add(config)
+            db.session.commit()
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+
 def salvar_token(service, token_data):
     """
     Salva token de um serviço no banco de dados.
@@ -46,6 +134,21 @@ def salvar_token(service, token_data):
         return False
 
 
+def ler_token_atual(service):
+    """
+    Lê o dict do serviço direto do banco, ignorando cópias já carregadas na
+    sessão. Funciona também fora de requisição (threads de trabalho).
+    """
+    try:
+        db, TokenConfig = _get_models()
+        with _contexto_app():
+            config = TokenConfig.query.filter_by(service=service).populate_existing().first()
+            return config.get_data() if config else None
+    except Exception as e:
+        print(f"❌ Erro ao ler token '{service}': {e}")
+        return None
+
+
 def obter_token(service):
     """
     Obtém token de um serviço do banco de dados.
@@ -0,0 +1,113 @@
+# utils/ttl_cache.py
+"""
+Cache em memória com validade (TTL) e limite de entradas (LRU).
+
+Thread-safe, pensado para respostas da API do ML que podem ser
+reaproveitadas por alguns minutos entre requisições e workers de lote.
+Com max_bytes, o tamanho de cada valor é medido (pickle) e as entradas
+menos usadas saem também quando o total em bytes passa do limite.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+def medir_tamanho(valor):
+    """Tamanho aproximado do valor em bytes (serializado)"""
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class CacheTTL:
+
+    def __init__(self, ttl=300, max_entradas=5000, max_bytes=None):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._dados = OrderedDict()   # chave -> (expira_em, valor, tamanho)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._removidos_lru = 0
+        self._expirados = 0
+
+    def _descartar(self, chave):
+        registro = self._dados.pop(chave, None)
+        if registro is not None:
+            self._bytes -= registro[2]
+        return registro
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            registro = self._dados.get(chave)
+            if registro is None or registro[0] < time.monotonic():
+                if registro is not None:
+                    self._descartar(chave)
+                    self._expirados += 1
+                self._misses += 1
+                return padrao
+            self._dados.move_to_end(chave)
+            self._hits += 1
+            return registro[1]
+
+    def _inserir(self, chave, valor, ttl, tamanho):
+        """Grava e aplica os limites da LRU (chamar com self._lock)"""
+        self._descartar(chave)
+        self._dados[chave] = (time.monotonic() + (self.ttl if ttl is None else ttl), valor, tamanho)
+        self._bytes += tamanho
+        while self._dados and (
+            len(self._dados) > self.max_entradas
+            or (self.max_bytes and self._bytes > self.max_bytes and len(self._dados) > 1)
+        ):
+            self._descartar(next(iter(self._dados)))
+            self._removidos_lru += 1
+
+    def guardar(self, chave, valor, ttl=None):
+        tamanho = medir_tamanho(valor) if self.max_bytes else 0
+        with self._lock:
+            self._inserir(chave, valor, ttl, tamanho)
+
+    def remover(self, chave):
+        with self._lock:
+            self._descartar(chave)
+
+    def remover_onde(self, predicado):
+        """Remove todas as chaves para as quais predicado(chave) é verdadeiro"""
+        with self._lock:
+            for chave in [c for c in self._dados if predicado(c)]:
+                self._descartar(chave)
+
+    def purgar_vencidos(self):
+        """Remove as entradas vencidas (normalmente só saem quando consultadas)"""
+        agora = time.monotonic()
+        with self._lock:
+            vencidas = [c for c, registro in self._dados.items() if registro[0] < agora]
+            for chave in vencidas:
+                self._descartar(chave)
+            self._expirados += len(vencidas)
+        return len(vencidas)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+            self._bytes = 0
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self._hits + self._misses
+            return {
+                'entradas': len(self._dados),
+                'bytes': self._bytes if self.max_bytes else None,
+                'max_entradas': self.max_entradas,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'removidos_lru': self._removidos_lru,
+                'expirados': self._expirados,
+                'taxa_acerto': round(self._hits / consultas * 100, 1) if consultas else 0.0,
+                'ttl_segundos': self.ttl,
+            }